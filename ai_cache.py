@@ -0,0 +1,143 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Two-tier cache for AI responses: in-memory LRU in front of SQLite.
+
+    Entries expire after `ttl` seconds. The memory tier holds at most
+    `max_entries` items; the disk tier is pruned to `max_disk_entries`
+    (oldest first). Pass `path=None` for a memory-only cache.
+
+    The SQLite file runs in WAL mode so several worker processes can share
+    it: each keeps its own memory tier, and a result computed by one worker
+    is a disk hit for the others. `table` lets several caches share a file.
+    """
+
+    def __init__(self, path=None, ttl=24 * 3600, max_entries=512, max_disk_entries=10000, table="ai_cache"):
+        if not table.isidentifier():
+            raise ValueError(f"invalid cache table name '{table}'")
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+            # readers never block the writer; other processes wait instead of failing on a busy file
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("PRAGMA busy_timeout=10000")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_created ON {table}(created)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model, kind, inputs):
+        """Build a stable key from the model ID, prompt kind and normalized inputs."""
+        return json.dumps([model, kind, inputs], sort_keys=True, separators=(",", ":"))
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                value, created = entry
+                if now - created < self.ttl:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if now - row[1] < self.ttl:
+                        value = json.loads(row[0])
+                        self._remember(key, value, row[1])
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), now),
+                )
+                self._db.execute(
+                    f"DELETE FROM {self.table} WHERE created < ? OR key IN ("
+                    f" SELECT key FROM {self.table} ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (now - self.ttl, self.max_disk_entries),
+                )
+                self._db.commit()
+
+    def touch(self, key):
+        """Restart an entry's `ttl` without rewriting it; returns whether it was present."""
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            found = entry is not None
+            if found:
+                self._mem[key] = (entry[0], now)
+            if self._db is not None:
+                found = self._db.execute(
+                    f"UPDATE {self.table} SET created = ? WHERE key = ?", (now, key)
+                ).rowcount > 0 or found
+                self._db.commit()
+            return found
+
+    def delete(self, key):
+        """Remove one entry; returns whether it was present."""
+        with self._lock:
+            found = self._mem.pop(key, None) is not None
+            if self._db is not None:
+                found = self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,)).rowcount > 0 or found
+                self._db.commit()
+            return found
+
+    def _remember(self, key, value, created):
+        self._mem[key] = (value, created)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "memory_entries": len(self._mem),
+            }
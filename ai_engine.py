@@ -1,14 +1,349 @@
 import requests
 import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from ai_cache import ResponseCache
+from metrics import AI_ERRORS, AI_TOKENS
+
+
+# Structured output (Ollama JSON-schema format mode) and generation budgets
+MAX_INSIGHTS = 6
+INSIGHT_TOKENS = 320
+MAX_SCHEDULE_ENTRIES = 26
+SCHEDULE_BASE_TOKENS = 48
+SCHEDULE_TOKENS_PER_ENTRY = 40
+
+INSIGHT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "insights": {"type": "array", "items": {"type": "string"}, "maxItems": MAX_INSIGHTS}
+    },
+    "required": ["insights"]
+}
+
+SCHEDULE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "weeks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "week": {"type": "integer"},
+                    "phase": {"type": "string"},
+                    "activities": {"type": "array", "items": {"type": "string"}, "maxItems": 4}
+                },
+                "required": ["week", "phase", "activities"]
+            },
+            "maxItems": MAX_SCHEDULE_ENTRIES
+        }
+    },
+    "required": ["weeks"]
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when the circuit breaker is short-circuiting calls to the model."""
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail immediately. Once `reset_timeout` seconds have passed a single probe
+    is let through (half-open); success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and receive the same result (or exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.merged = 0
+
+    def do(self, key, fn):
+        call, leader = self.join(key)
+        if not leader:
+            return self.wait(call)
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result
+
+    def join(self, key):
+        """Join the call for `key`: (call, True) if this caller must run it
+        and then `finish` it, (call, False) if it should `wait` for it."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.executions += 1
+            else:
+                self.merged += 1
+        return call, leader
+
+    def wait(self, call):
+        """Block until the leader finishes `call`; return its result or raise its exception."""
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return dict(call.result, shared=True) if isinstance(call.result, dict) else call.result
+
+    def finish(self, key, call, result=None, error=None):
+        """Publish the leader's result (or exception) to every waiting caller."""
+        call.result, call.error = result, error
+        with self._lock:
+            del self._calls[key]
+        call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {"executions": self.executions, "merged": self.merged, "in_flight": len(self._calls)}
+
+
+class GenerationLimiter:
+    """Caps how many generations run on Ollama at once, across every caller.
+
+    `slot()` blocks until one of `max_concurrent` slots is free (None =
+    unlimited). Cache hits and single-flight followers never take a slot.
+    """
+
+    def __init__(self, max_concurrent=None):
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+
+    @contextmanager
+    def slot(self):
+        if self._slots is not None:
+            with self._lock:
+                self.waiting += 1
+            try:
+                self._slots.acquire()
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        with self._lock:
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {"max_concurrent": self.max_concurrent, "active": self.active, "waiting": self.waiting}
+
+
+def _error_reason(exc):
+    """Short label for a failed model call, used as the `reason` metric label."""
+    if isinstance(exc, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(exc, requests.Timeout):
+        return "timeout"
+    if isinstance(exc, requests.ConnectionError):
+        return "connection"
+    return "other"
+
 
 class AIEngine:
-    def __init__(self, model="granite:3.3-2b", base_url="http://localhost:11434/api/generate"):
+    def __init__(self, model="granite:3.3-2b", base_url="http://localhost:11434/api/generate", cache=None,
+                 timeout=30, connect_timeout=3, pool_size=10, breaker=None, keep_alive="30m",
+                 warmup_timeout=180, limiter=None):
         self.model = model
         self.base_url = base_url
+        # how long Ollama keeps the model loaded after each request (duration string or seconds; -1 = forever)
+        self.keep_alive = keep_alive
+        self.warmup_timeout = warmup_timeout
+        self.model_status = {"available": None, "ready": False, "load_seconds": None,
+                             "warmup_seconds": None, "error": None, "checked_at": None}
+        # Prompt/response cache; memory-only unless a disk-backed one is passed in
+        self.cache = cache if cache is not None else ResponseCache()
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        # Keep-alive connection pool shared by every request through this engine
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        # identical prompts already in flight share one upstream generation
+        self.flights = SingleFlight()
+        # every generation (blocking or streamed, from any endpoint) holds one slot
+        self.limiter = limiter if limiter is not None else GenerationLimiter()
 
-    def analyze_project(self, project_data):
-        """Use IBM Granite to provide AI-powered construction insights."""
-        prompt = f"""
+    def _post(self, payload, stream=False):
+        """POST to Ollama through the pooled session, guarded by the circuit breaker.
+
+        Raises `CircuitOpenError` without touching the network while the
+        circuit is open so callers drop straight to their fallbacks.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("AI model circuit is open; skipping call")
+        try:
+            response = self.session.post(
+                self.base_url,
+                json=payload,
+                timeout=(self.connect_timeout, self.timeout),
+                stream=stream
+            )
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if response.status_code == 200:
+            self.breaker.record_success()
+            # a model that answers is loaded, even if the startup warm-up missed it
+            self.model_status.update(ready=True, error=None)
+        else:
+            self.breaker.record_failure()
+        return response
+
+    @staticmethod
+    def _record_usage(kind, body):
+        """Count the prompt/eval tokens Ollama reports on a finished generation."""
+        AI_TOKENS.inc(body.get("prompt_eval_count") or 0, kind=kind, type="prompt")
+        AI_TOKENS.inc(body.get("eval_count") or 0, kind=kind, type="eval")
+
+    def _api_url(self, endpoint):
+        """URL of another Ollama endpoint on the same host as `base_url`."""
+        root = self.base_url.rsplit("/api/", 1)[0]
+        return f"{root}/api/{endpoint}"
+
+    def _model_matches(self, name):
+        # Ollama lists untagged models as "name:latest"
+        return name == self.model or name == f"{self.model}:latest"
+
+    def check_model(self):
+        """Return True if Ollama lists `self.model` (GET /api/tags)."""
+        response = self.session.get(self._api_url("tags"), timeout=(self.connect_timeout, self.timeout))
+        response.raise_for_status()
+        names = [m.get("name") or m.get("model") for m in response.json().get("models", [])]
+        return any(self._model_matches(n) for n in names)
+
+    def warm_up(self):
+        """Check the model exists and load it with a one-token generation.
+
+        Runs at startup so the first real request does not pay the model
+        load. Bypasses the circuit breaker and uses `warmup_timeout`, since a
+        cold load can take far longer than a normal generation. Results land
+        in `model_status`; returns whether the model is ready.
+        """
+        status = self.model_status
+        started = time.time()
+        try:
+            status["available"] = self.check_model()
+            if not status["available"]:
+                raise RuntimeError(f"model '{self.model}' not found; run 'ollama pull {self.model}'")
+            response = self.session.post(self.base_url, json={
+                "model": self.model,
+                "prompt": "Reply with OK.",
+                "stream": False,
+                "keep_alive": self.keep_alive,
+                "options": {"num_predict": 1}
+            }, timeout=(self.connect_timeout, self.warmup_timeout))
+            response.raise_for_status()
+            body = response.json()
+            status.update(ready=True, error=None,
+                          load_seconds=round((body.get("load_duration") or 0) / 1e9, 3))
+        except Exception as e:
+            status.update(ready=False, error=str(e))
+        status.update(warmup_seconds=round(time.time() - started, 3), checked_at=started)
+        return status["ready"]
+
+    def model_stats(self):
+        return dict(self.model_status, model=self.model, keep_alive=self.keep_alive)
+
+    def _cache_key(self, kind, project_data, fields):
+        """Normalize the prompt inputs so equivalent requests share a cache entry."""
+        inputs = {}
+        for field in fields:
+            value = project_data.get(field)
+            if value is None or value == '':
+                inputs[field] = None
+                continue
+            try:
+                num = float(value)
+                inputs[field] = int(num) if num.is_integer() else round(num, 2)
+            except (TypeError, ValueError):
+                inputs[field] = str(value).strip().upper()
+        return ResponseCache.make_key(self.model, kind, inputs)
+
+    def _cached(self, key):
+        hit = self.cache.get(key)
+        if hit is not None:
+            return dict(hit, cached=True)
+        return None
+
+    def _analysis_prompt(self, project_data):
+        return f"""
         Analyze the following construction project parameters and provide professional advice:
         - Built-up Area: {project_data['area']} sq yards
         - Number of Floors: {project_data['floors']}
@@ -20,80 +355,249 @@ class AIEngine:
         3. Tips for optimizing the construction schedule.
         4. Resource intensity assessment.
         
-        Keep the response professional and structured.
+        Respond only with JSON of the form {{"insights": ["...", "..."]}}:
+        {MAX_INSIGHTS} or fewer items, one or two sentences each.
         """
+
+    def _schedule_entries(self, project_data):
+        """(entries, weeks_per_entry, total_weeks) for the schedule prompt."""
+        try:
+            days = float(project_data.get('estimated_days') or 90)
+        except (TypeError, ValueError):
+            days = 90.0
+        total_weeks = max(1, math.ceil(days / 7.0))
+        per_entry = math.ceil(total_weeks / MAX_SCHEDULE_ENTRIES)
+        return math.ceil(total_weeks / per_entry), per_entry, total_weeks
+
+    def _schedule_prompt(self, project_data):
+        entries, per_entry, total_weeks = self._schedule_entries(project_data)
+        span = "one entry per week" if per_entry == 1 else \
+            f"one entry per {per_entry} weeks, where \"week\" is the first week of the entry"
+        return f"""
+        Create a week-by-week construction schedule for a {project_data['area']} sq yard, {project_data['floors']}-floor building.
+        Total estimated duration: {project_data.get('estimated_days', 90)} days ({total_weeks} weeks).
         
+        List key activities for each week from site preparation to final finishing.
+        Respond only with JSON of the form
+        {{"weeks": [{{"week": 1, "phase": "...", "activities": ["...", "..."]}}]}}
+        with exactly {entries} entries ({span}) and at most 4 short activities each.
+        """
+
+    def _generate_payload(self, prompt, schema, num_predict, stream=False):
+        """Ollama request in JSON-schema format mode with an explicit token budget."""
+        # rough prompt size (~4 chars/token); round the context up to a power of two
+        needed = len(prompt) // 4 + num_predict + 64
+        num_ctx = max(1024, 1 << (needed - 1).bit_length())
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "format": schema,
+            "keep_alive": self.keep_alive,
+            "options": {"num_predict": num_predict, "num_ctx": num_ctx, "temperature": 0.2}
+        }
+
+    def _analysis_payload(self, project_data, stream=False):
+        return self._generate_payload(self._analysis_prompt(project_data), INSIGHT_SCHEMA,
+                                      INSIGHT_TOKENS, stream)
+
+    def _schedule_payload(self, project_data, stream=False):
+        entries = self._schedule_entries(project_data)[0]
+        return self._generate_payload(self._schedule_prompt(project_data), SCHEDULE_SCHEMA,
+                                      SCHEDULE_BASE_TOKENS + SCHEDULE_TOKENS_PER_ENTRY * entries, stream)
+
+    @staticmethod
+    def _load_json(raw):
         try:
-            response = requests.post(
-                self.base_url,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=30
-            )
+            return json.loads(raw)
+        except (TypeError, ValueError):
+            return None
 
-            if response.status_code == 200:
-                raw = response.json().get("response", "")
-                # Normalize to a list of bullet points if possible
-                lines = [ln.strip(' •\n') for ln in raw.splitlines() if ln.strip()]
-                if len(lines) == 0 and raw:
-                    # try splitting by sentences
-                    lines = [s.strip() for s in raw.split('.') if s.strip()]
+    @classmethod
+    def _parse_insights(cls, raw):
+        doc = cls._load_json(raw)
+        if isinstance(doc, dict) and isinstance(doc.get("insights"), list):
+            lines = [str(item).strip(' •\n') for item in doc["insights"] if str(item).strip()]
+            if lines:
                 return {"ok": True, "insights": lines, "raw": raw}
-            else:
-                return {"ok": False, "error": "Error connecting to local AI model. Please ensure Ollama is running."}
+        # not valid JSON (e.g. cut off by num_predict): fall back to line splitting
+        # Normalize to a list of bullet points if possible
+        lines = [ln.strip(' •\n') for ln in raw.splitlines() if ln.strip()]
+        if len(lines) == 0 and raw:
+            # try splitting by sentences
+            lines = [s.strip() for s in raw.split('.') if s.strip()]
+        return {"ok": True, "insights": lines, "raw": raw}
+
+    @classmethod
+    def _parse_schedule(cls, raw):
+        doc = cls._load_json(raw)
+        if isinstance(doc, dict) and isinstance(doc.get("weeks"), list):
+            weeks = []
+            for i, entry in enumerate(doc["weeks"]):
+                if not isinstance(entry, dict) or not str(entry.get("phase", "")).strip():
+                    # dropping it would quietly shorten the plan: reject the answer (the caller falls back)
+                    AI_ERRORS.inc(kind="schedule", reason="parse")
+                    return {"ok": False, "error": f"AI schedule entry {i + 1} has no phase", "raw": raw}
+                try:
+                    week_num = int(entry.get("week"))
+                except (TypeError, ValueError):
+                    # keep the entry; number it after the previous one
+                    week_num = (weeks[-1]["week"] + 1) if weeks and weeks[-1]["week"] else i + 1
+                activities = entry.get("activities") or []
+                if isinstance(activities, str):
+                    activities = activities.split(',')
+                weeks.append({"week": week_num, "phase": str(entry["phase"]).strip(),
+                              "activities": [str(a).strip() for a in activities if str(a).strip()]})
+            if weeks:
+                return {"ok": True, "weeks": weeks, "raw": raw}
+
+        # Attempt to parse simple week-by-week lines
+        weeks = []
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            # Expect formats like: "Week 1: Site prep - activities"
+            parts = line.split(':', 1)
+            if len(parts) == 2 and parts[0].strip().lower().startswith('week'):
+                week_label = parts[0].strip()
+                phase_activities = parts[1].strip()
+                # split phase and activities if hyphenated
+                if ' - ' in phase_activities:
+                    phase, acts = phase_activities.split(' - ', 1)
+                    activities = [a.strip() for a in acts.split(',') if a.strip()]
+                else:
+                    phase = phase_activities
+                    activities = []
+                try:
+                    week_num = int(''.join(filter(str.isdigit, week_label)))
+                except Exception:
+                    week_num = None
+                weeks.append({"week": week_num, "phase": phase.strip(), "activities": activities})
+        return {"ok": True, "weeks": weeks, "raw": raw}
+
+    def _store(self, key, result):
+        # Only cache usable results so a bad generation is retried next time
+        if result.get("insights") or result.get("weeks"):
+            self.cache.set(key, result)
+        return result
+
+    def insight_key(self, project_data):
+        """Normalized key of an `analyze_project` call (also used to match saved projects)."""
+        return self._cache_key("analyze", project_data, ("area", "floors", "timeline"))
+
+    def schedule_key(self, project_data):
+        """Normalized key of a `generate_weekly_schedule` call."""
+        return self._cache_key("schedule", project_data, ("area", "floors", "estimated_days"))
+
+    def analyze_project(self, project_data):
+        """Use IBM Granite to provide AI-powered construction insights."""
+        key = self.insight_key(project_data)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        return self.flights.do(key, lambda: self._analyze(key, project_data))
+
+    def _analyze(self, key, project_data):
+        try:
+            with self.limiter.slot():
+                response = self._post(self._analysis_payload(project_data))
+
+                if response.status_code == 200:
+                    body = response.json()
+                    self._record_usage("analyze", body)
+                    return self._store(key, self._parse_insights(body.get("response", "")))
+                else:
+                    AI_ERRORS.inc(kind="analyze", reason="http_status")
+                    return {"ok": False, "error": "Error connecting to local AI model. Please ensure Ollama is running."}
         except Exception as e:
+            AI_ERRORS.inc(kind="analyze", reason=_error_reason(e))
             return {"ok": False, "error": f"AI Integration Error: {str(e)}"}
 
     def generate_weekly_schedule(self, project_data):
         """Generate a high-level weekly schedule using AI."""
-        prompt = f"""
-        Create a week-by-week construction schedule for a {project_data['area']} sq yard, {project_data['floors']}-floor building.
-        Total estimated duration: {project_data.get('estimated_days', 90)} days.
-        
-        List key activities for each week from site preparation to final finishing.
-        Format as a simple list.
-        """
-        
+        key = self.schedule_key(project_data)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        return self.flights.do(key, lambda: self._schedule(key, project_data))
+
+    def _schedule(self, key, project_data):
         try:
-            response = requests.post(
-                self.base_url,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=30
-            )
+            with self.limiter.slot():
+                response = self._post(self._schedule_payload(project_data))
 
-            if response.status_code == 200:
-                raw = response.json().get("response", "")
-                # Attempt to parse simple week-by-week lines
-                weeks = []
-                for line in raw.splitlines():
-                    if not line.strip():
-                        continue
-                    # Expect formats like: "Week 1: Site prep - activities"
-                    parts = line.split(':', 1)
-                    if len(parts) == 2 and parts[0].strip().lower().startswith('week'):
-                        week_label = parts[0].strip()
-                        phase_activities = parts[1].strip()
-                        # split phase and activities if hyphenated
-                        if ' - ' in phase_activities:
-                            phase, acts = phase_activities.split(' - ', 1)
-                            activities = [a.strip() for a in acts.split(',') if a.strip()]
-                        else:
-                            phase = phase_activities
-                            activities = []
-                        try:
-                            week_num = int(''.join(filter(str.isdigit, week_label)))
-                        except Exception:
-                            week_num = None
-                        weeks.append({"week": week_num, "phase": phase.strip(), "activities": activities})
-                return {"ok": True, "weeks": weeks, "raw": raw}
-            else:
-                return {"ok": False, "error": "Error connecting to AI model."}
+                if response.status_code == 200:
+                    body = response.json()
+                    self._record_usage("schedule", body)
+                    return self._store(key, self._parse_schedule(body.get("response", "")))
+                else:
+                    AI_ERRORS.inc(kind="schedule", reason="http_status")
+                    return {"ok": False, "error": "Error connecting to AI model."}
         except Exception as e:
+            AI_ERRORS.inc(kind="schedule", reason=_error_reason(e))
             return {"ok": False, "error": f"Failed to generate schedule via AI: {e}"}
+
+    def stream_analysis(self, project_data):
+        """Streaming variant of `analyze_project`.
+
+        Yields `{"token": str}` events as Granite generates and finishes with
+        `{"result": dict}` holding the same structure `analyze_project` returns.
+        Shares `analyze_project`'s single flight: while an identical generation
+        is running, this waits for it and yields its raw answer as one token.
+        """
+        key = self.insight_key(project_data)
+        yield from self._stream("analyze", key, self._analysis_payload(project_data, stream=True), self._parse_insights)
+
+    def stream_weekly_schedule(self, project_data):
+        """Streaming variant of `generate_weekly_schedule` (same event shape as `stream_analysis`)."""
+        key = self.schedule_key(project_data)
+        yield from self._stream("schedule", key, self._schedule_payload(project_data, stream=True), self._parse_schedule)
+
+    def _stream(self, kind, key, payload, parse):
+        cached = self._cached(key)
+        if cached is not None:
+            yield {"token": cached.get("raw", "")}
+            yield {"result": cached}
+            return
+
+        # same flight as analyze_project / generate_weekly_schedule: an identical
+        # generation already running (streamed or not) is waited for, not repeated
+        call, leader = self.flights.join(key)
+        if not leader:
+            result = self.flights.wait(call)
+            yield {"token": result.get("raw", "")}
+            yield {"result": result}
+            return
+
+        # what followers get if this stream is closed before the model finishes
+        result = {"ok": False, "error": "AI stream was closed before the model finished."}
+        try:
+            # the slot is held for the whole stream; closing the generator releases it
+            with self.limiter.slot():
+                response = self._post(payload, stream=True)
+                if response.status_code != 200:
+                    AI_ERRORS.inc(kind=kind, reason="http_status")
+                    result = {"ok": False, "error": "Error connecting to AI model."}
+                else:
+                    # Ollama streams one JSON object per line: {"response": "...", "done": bool}
+                    chunks = []
+                    with response:
+                        for line in response.iter_lines():
+                            if not line:
+                                continue
+                            chunk = json.loads(line)
+                            token = chunk.get("response", "")
+                            if token:
+                                chunks.append(token)
+                                yield {"token": token}
+                            if chunk.get("done"):
+                                # the final chunk carries the generation stats
+                                self._record_usage(kind, chunk)
+                                break
+                    result = self._store(key, parse("".join(chunks)))
+        except Exception as e:
+            AI_ERRORS.inc(kind=kind, reason=_error_reason(e))
+            result = {"ok": False, "error": f"AI Integration Error: {str(e)}"}
+        finally:
+            self.flights.finish(key, call, result)
+        yield {"result": result}
@@ -1,9 +1,33 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g
 import requests
+import os
+import io
+import csv
+import json
+import hashlib
+import datetime
+import queue
 import time
 import math
-from ai_engine import AIEngine
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from ai_engine import AIEngine, GenerationLimiter
+from ai_cache import ResponseCache
+from job_queue import BoundedExecutor, JobQueue, QueueFullError
+from scheduler import schedule_cache_info
+from project_store import ProjectStore, FILTERS as PROJECT_FILTERS, SORT_COLUMNS as PROJECT_SORTS
+from plan_session import SessionStore, INPUT_DEFAULTS as SESSION_INPUTS
 from calculator import ConstructionCalculator
+from boq import RATES_DIR, BOQ_ITEMS, CATEGORIES as BOQ_CATEGORIES, configure_rates, rate_book, compare_regions
+from blueprint_gen import layout_cache_info, geometry_cache_info, set_shared_cache, set_floor_pool
+from blueprint_svg import (attach_svg_urls, get_rendered, zip_floors, render_cache_info,
+                           set_shared_cache as set_svg_cache, REFRESH_INTERVAL as SVG_REFRESH_INTERVAL)
+from blueprint_codec import encode_blueprint, FORMATS as BLUEPRINT_FORMATS
+from compression import compress_response, available_encodings
+from batch_calc import estimate_batch
+from risk_sim import simulate
+from sweep import ParameterSweep, METRICS as SWEEP_METRICS, metric_lists
+from metrics import REGISTRY, HTTP_SECONDS, AI_FALLBACKS, AI_REUSED, CallbackGauge, timed, timed_call, server_timing
 
 app = Flask(__name__)
 
@@ -11,36 +35,208 @@ app = Flask(__name__)
 # ⚠️ IMPORTANT: Run 'ollama list' in terminal and match this name exactly
 # Common names: "granite3.3:2b" or "granite:3.3-2b"
 MODEL_ID = "granite3.3:2b" 
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
+OLLAMA_API_URL = os.environ.get("OLLAMA_API_URL", "http://localhost:11434/api/generate")
+# Disk-backed AI response cache (survives restarts); TTL in seconds
+AI_CACHE_PATH = os.environ.get("AI_CACHE_PATH", "ai_cache.db")
+AI_CACHE_TTL = int(os.environ.get("AI_CACHE_TTL", 24 * 3600))
+# How long Ollama keeps the model in memory after each request ("30m", "24h",
+# or seconds; -1 = never unload)
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+# Check the model and load it at startup rather than on the first request
+AI_WARMUP = os.environ.get("AI_WARMUP", "1") != "0"
+AI_WARMUP_RETRIES = int(os.environ.get("AI_WARMUP_RETRIES", 5))
+# Schedules come from the critical-path scheduler (scheduler.py); AI_SCHEDULE=1
+# asks the model for them instead, keeping the scheduler as the fallback
+AI_SCHEDULE = os.environ.get("AI_SCHEDULE", "0") == "1"
+AI_CALLS = ("insight", "schedule") if AI_SCHEDULE else ("insight",)
+# Tallest building accepted (floors incl. ground); the critical-path schedule and
+# the all-floors blueprint grow linearly with it and run on every plan request
+MAX_FLOORS = int(os.environ.get("MAX_FLOORS", 50))
 
-print("="*70)
-print("Construction Planning System")
-print(f" Model: {MODEL_ID}")
-print(" Running locally via Ollama")
-print("="*70)
+# Sweeps up to this many points come back as one JSON grid; larger ones stream as NDJSON
+SWEEP_GRID_LIMIT = 10000
+SWEEP_MAX_POINTS = 5_000_000
+# Processes for packing the distinct floor programs of big multi-floor
+# layouts (blueprint_gen.set_floor_pool); 0 packs them in the request thread
+BLUEPRINT_PROCESSES = int(os.environ.get("BLUEPRINT_PROCESSES", 0))
 
-# Initialize AI engine (used as primary AI interface)
-AI_ENGINE = AIEngine(model=MODEL_ID, base_url=OLLAMA_API_URL)
+# Upper bounds on Monte Carlo draws and histogram bins per request, and processes used for them
+RISK_MAX_SAMPLES = 2_000_000
+RISK_MAX_BINS = 1000
+RISK_WORKERS = int(os.environ.get("RISK_WORKERS", 1))
+
+# Default latency budget (ms) for the AI part of /api/calculate; unset = wait for the model.
+# Requests can override it with "latency_budget_ms".
+AI_LATENCY_BUDGET_MS = os.environ.get("AI_LATENCY_BUDGET_MS")
+
+# AI_JOB_WORKERS caps concurrent generations sent to Ollama from every endpoint
+# (the engine's GenerationLimiter) and runs that many /api/jobs workers;
+# AI_JOB_QUEUE_DEPTH caps the job backlog before new jobs are rejected with 429
+AI_JOB_WORKERS = int(os.environ.get("AI_JOB_WORKERS", 2))
+AI_JOB_QUEUE_DEPTH = int(os.environ.get("AI_JOB_QUEUE_DEPTH", 100))
+# Model calls made inside requests run on AI_EXECUTOR_WORKERS threads with at most
+# AI_EXECUTOR_QUEUE more waiting; beyond that a request gets the fallback at once
+AI_EXECUTOR_WORKERS = int(os.environ.get("AI_EXECUTOR_WORKERS", 8))
+AI_EXECUTOR_QUEUE = int(os.environ.get("AI_EXECUTOR_QUEUE", 16))
+
+# Saved projects (/api/projects); "" disables saving
+PROJECTS_PATH = os.environ.get("PROJECTS_PATH", "projects.db")
+
+# Rendered blueprint SVGs are content-addressed (/api/blueprint/<hash>.svg) and
+# cannot be re-rendered from the URL. The server keeps each one SVG_CACHE_TTL
+# seconds after it was last served (at most SVG_CACHE_ENTRIES of them), and
+# clients cache them, and /api/calculate ETags stay valid, for SVG_MAX_AGE
+# seconds, which is capped so it never outlives that retention
+SVG_CACHE_TTL = int(os.environ.get("SVG_CACHE_TTL", 30 * 24 * 3600))
+SVG_CACHE_ENTRIES = int(os.environ.get("SVG_CACHE_ENTRIES", 20000))
+SVG_MAX_AGE = max(1, min(int(os.environ.get("SVG_MAX_AGE", 24 * 3600)), SVG_CACHE_TTL - SVG_REFRESH_INTERVAL))
+SVG_ZIP_MAX_FLOORS = 200
+
+# Interactive edit sessions (/api/sessions): idle lifetime (s) and per-process cap
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 3600))
+SESSION_MAX = int(os.environ.get("SESSION_MAX", 1000))
+
+# Regional rate tables for the bill of quantities (one JSON file per region,
+# see boq.load_rate_tables); edited files are picked up within RATES_CHECK_INTERVAL s
+RATES_PATH = os.environ.get("RATES_PATH", RATES_DIR)
+RATES_CHECK_INTERVAL = float(os.environ.get("RATES_CHECK_INTERVAL", 30))
+
+# Response compression (gzip, plus brotli when the `brotli` package is installed)
+# for buffered text/JSON responses of at least COMPRESS_MIN_BYTES
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 5))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 5))
+
+# Part of the /api/calculate ETag; bump when a code change alters the response
+# for the same inputs, so clients holding old ETags get the new body
+CALC_ETAG_VERSION = 4
+
+# Process-wide services. They hold threads, sockets and SQLite handles, so
+# they are built by create_app() in each worker process (after a fork), not
+# at import time.
+AI_ENGINE = None
+AI_EXECUTOR = None
+AI_JOBS = None
+SESSIONS = None
+PROJECTS = None
+_INIT_LOCK = threading.Lock()
+
+def _keep_alive(value):
+    # Ollama takes durations as strings and plain seconds as numbers
+    return int(value) if value.lstrip("-").isdigit() else value
+
+def _warm_up_model(engine, retries):
+    """Background start-up task: load the model, retrying with backoff while Ollama is unreachable."""
+    for attempt in range(retries):
+        if engine.warm_up():
+            status = engine.model_stats()
+            print(f"✅ Model {engine.model} ready (load {status['load_seconds']}s, warm-up {status['warmup_seconds']}s)")
+            return
+        status = engine.model_stats()
+        print(f"⚠️ Model warm-up failed (attempt {attempt + 1}/{retries}): {status['error']}")
+        if status["available"] is False:
+            return  # not pulled; retrying will not help
+        time.sleep(min(60, 5 * 2 ** attempt))
+
+def create_app():
+    """Build the AI engine, executors and shared caches, then return the app.
+
+    Safe to call more than once; later calls return the same app. The AI
+    response cache and the blueprint layout cache live in the SQLite file at
+    `AI_CACHE_PATH`, so every worker process reads what the others computed.
+    """
+    global AI_ENGINE, AI_EXECUTOR, AI_JOBS, SESSIONS, PROJECTS
+    with _INIT_LOCK:
+        if AI_ENGINE is not None:
+            return app
+
+        print("="*70)
+        print("Construction Planning System")
+        print(f" Model: {MODEL_ID}")
+        print(" Running locally via Ollama")
+        print("="*70)
+
+        # Initialize AI engine (used as primary AI interface)
+        engine = AIEngine(
+            model=MODEL_ID,
+            base_url=OLLAMA_API_URL,
+            cache=ResponseCache(path=AI_CACHE_PATH, ttl=AI_CACHE_TTL),
+            keep_alive=_keep_alive(OLLAMA_KEEP_ALIVE),
+            limiter=GenerationLimiter(AI_JOB_WORKERS),
+        )
+        if AI_CACHE_PATH:
+            # the in-process lru_cache is the memory tier, so keep none here
+            set_shared_cache(ResponseCache(path=AI_CACHE_PATH, ttl=AI_CACHE_TTL, max_entries=0,
+                                           table="layout_cache"))
+            set_svg_cache(ResponseCache(path=AI_CACHE_PATH, ttl=SVG_CACHE_TTL, max_entries=0,
+                                        max_disk_entries=SVG_CACHE_ENTRIES, table="blueprint_svg"))
+        if BLUEPRINT_PROCESSES > 0:
+            set_floor_pool(ProcessPoolExecutor(max_workers=BLUEPRINT_PROCESSES))
+        # Worker threads for model calls so insight + schedule run side by side
+        AI_EXECUTOR = BoundedExecutor(workers=AI_EXECUTOR_WORKERS, max_queue=AI_EXECUTOR_QUEUE,
+                                      thread_name_prefix="ai")
+        AI_JOBS = JobQueue(workers=AI_JOB_WORKERS, max_depth=AI_JOB_QUEUE_DEPTH)
+        PROJECTS = ProjectStore(PROJECTS_PATH) if PROJECTS_PATH else None
+        rates = configure_rates(RATES_PATH, RATES_CHECK_INTERVAL).table
+        print(f"💱 Rate tables: {', '.join(rates.regions)} (version {rates.version})")
+        SESSIONS = SessionStore(
+            max_sessions=SESSION_MAX, ttl=SESSION_TTL,
+            backing=ResponseCache(path=AI_CACHE_PATH, ttl=SESSION_TTL, max_entries=0,
+                                  table="plan_sessions") if AI_CACHE_PATH else None
+        )
+        AI_ENGINE = engine
+        if AI_WARMUP:
+            threading.Thread(target=_warm_up_model, args=(engine, AI_WARMUP_RETRIES),
+                             name="ai-warmup", daemon=True).start()
+    return app
+
+# Process-level state exported on /metrics next to the request/stage histograms
+REGISTRY.register(CallbackGauge(
+    "construction_ai_cache", "AI response cache counters.", ("stat",),
+    lambda: {(k,): v for k, v in AI_ENGINE.cache.stats().items()}))
+REGISTRY.register(CallbackGauge(
+    "construction_ai_circuit_open", "1 while the model circuit breaker is open or half-open.", (),
+    lambda: {(): int(AI_ENGINE.breaker.stats()["state"] != "closed")}))
+REGISTRY.register(CallbackGauge(
+    "construction_ai_model_ready", "1 once the model answered the warm-up (or any) generation.", (),
+    lambda: {(): int(AI_ENGINE.model_status["ready"])}))
+REGISTRY.register(CallbackGauge(
+    "construction_ai_model_load_seconds", "Model load time reported by Ollama during warm-up.", (),
+    lambda: {(): AI_ENGINE.model_status["load_seconds"] or 0}))
+REGISTRY.register(CallbackGauge(
+    "construction_ai_single_flight", "Single-flight executions, merged callers and in-flight keys.", ("stat",),
+    lambda: {(k,): v for k, v in AI_ENGINE.flights.stats().items()}))
+REGISTRY.register(CallbackGauge(
+    "construction_ai_generations", "Generations running on Ollama and callers waiting for a slot.", ("stat",),
+    lambda: {(k,): AI_ENGINE.limiter.stats()[k] for k in ("active", "waiting")}))
+REGISTRY.register(CallbackGauge(
+    "construction_ai_executor", "In-request model call threads: running, queued and rejected submissions.", ("stat",),
+    lambda: {(k,): AI_EXECUTOR.stats()[k] for k in ("running", "queued", "rejected")}))
+REGISTRY.register(CallbackGauge(
+    "construction_ai_jobs", "Background AI job queue state.", ("stat",),
+    lambda: {(k,): v for k, v in AI_JOBS.stats().items()}))
 
 # Using unified ConstructionCalculator from calculator.py
 
 # ================= AI INTEGRATION (OLLAMA) =================
-def get_ai_insight(project_data):
-    """Call the `AIEngine` and provide a safe fallback if the model is unreachable.
+FALLBACK_INSIGHT = (
+    "• 🛡️ Risk: Monitor weather forecasts before concrete pouring to avoid curing issues.\n"
+    "• 💰 Cost: Lock in material prices early to mitigate market fluctuation risks.\n"
+    "• ⏱️ Timeline: Add a 5-day buffer for regulatory inspections and approvals.\n"
+    "(AI Model Offline - Showing Standard Recommendations)"
+)
 
-    The `AIEngine` expects keys like `area` and `floors` — map the project_data
-    coming from the API to that shape and use the engine. If the engine reports
-    an error or returns an empty response, return the canned recommendations.
-    """
+def _insight_payload(project_data):
     # Map to ai_engine expected keys
-    ai_payload = {
+    return {
         "area": project_data.get("built_up_area"),
         "floors": project_data.get("floors"),
         "timeline": project_data.get("duration_days") or project_data.get("duration_weeks")
     }
 
+def _resolve_insight(insight):
+    """Return the AI insight if usable, otherwise the canned recommendations."""
     try:
-        insight = AI_ENGINE.analyze_project(ai_payload)
         # Expect structured dict: {ok: bool, insights: [...], raw: '...'}
         if isinstance(insight, dict) and insight.get("ok"):
             return insight
@@ -48,81 +244,1036 @@ def get_ai_insight(project_data):
             raise RuntimeError(insight.get('error') if isinstance(insight, dict) else 'AI returned invalid response')
     except Exception as e:
         print(f"⚠️ AI Engine fallback activated: {e}")
+        AI_FALLBACKS.inc(kind="insight", reason="ai_error")
 
     # Fallback canned recommendations
-    return (
-        "• 🛡️ Risk: Monitor weather forecasts before concrete pouring to avoid curing issues.\n"
-        "• 💰 Cost: Lock in material prices early to mitigate market fluctuation risks.\n"
-        "• ⏱️ Timeline: Add a 5-day buffer for regulatory inspections and approvals.\n"
-        "(AI Model Offline - Showing Standard Recommendations)"
+    return FALLBACK_INSIGHT
+
+def _model_weeks(ai_schedule_resp):
+    """The weeks of a usable model schedule response, else None."""
+    if isinstance(ai_schedule_resp, dict) and ai_schedule_resp.get('ok') and ai_schedule_resp.get('weeks'):
+        return ai_schedule_resp.get('weeks')
+    return None
+
+def _resolve_schedule(ai_schedule_resp, calculator):
+    """Use the AI weekly schedule if it parsed into weeks, else the algorithmic one."""
+    weeks = _model_weeks(ai_schedule_resp)
+    if weeks:
+        return weeks
+    AI_FALLBACKS.inc(kind="schedule", reason="ai_error")
+    return calculator.generate_schedule()
+
+def _saved_ai(kind, key):
+    """Model output saved with an earlier project for the same (normalized) prompt inputs."""
+    if PROJECTS is None:
+        return None
+    value = PROJECTS.find_ai(kind, key)
+    if value is not None:
+        AI_REUSED.inc(kind=kind)
+    return value
+
+def _ai_schedule(payload):
+    """`AIEngine.generate_weekly_schedule`, or the saved result of an identical earlier call."""
+    saved = _saved_ai("schedule", AI_ENGINE.schedule_key(payload))
+    if saved is not None:
+        return {"ok": True, "weeks": saved}
+    return AI_ENGINE.generate_weekly_schedule(payload)
+
+def _ai_insight(project_data):
+    """`AIEngine.analyze_project`, or the saved result of an identical earlier
+    call; errors come back as {"ok": False, ...} for `_resolve_insight`."""
+    payload = _insight_payload(project_data)
+    saved = _saved_ai("insight", AI_ENGINE.insight_key(payload))
+    if saved is not None:
+        return saved
+    try:
+        return AI_ENGINE.analyze_project(payload)
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+def get_ai_insight(project_data):
+    """Call the `AIEngine` and provide a safe fallback if the model is unreachable.
+
+    The `AIEngine` expects keys like `area` and `floors` — map the project_data
+    coming from the API to that shape and use the engine. If the engine reports
+    an error or returns an empty response, return the canned recommendations.
+    An insight saved with an earlier project for the same inputs is reused.
+    """
+    return _resolve_insight(_ai_insight(project_data))
+
+def _submit_ai(kind, fn, *args):
+    """`AI_EXECUTOR.submit`, or None (counted as a queue_full fallback) when its backlog is full."""
+    try:
+        return AI_EXECUTOR.submit(fn, *args)
+    except QueueFullError:
+        AI_FALLBACKS.inc(kind=kind, reason="queue_full")
+        return None
+
+def _build_calculator(data):
+    return ConstructionCalculator(
+        built_up_area=data.get("built_up_area", 1000),
+        floors=data.get("floors", "G+2"),
+        daily_wage=data.get("daily_wage"),
+        cost_per_sq_yard=data.get("cost_per_sq_yard"),
+        region=data.get("region")
     )
 
+def _ai_inputs(data, costs):
+    """Project data for `get_ai_insight` and the weekly-schedule payload for `AIEngine`."""
+    ai_input = {
+        "built_up_area": data.get("built_up_area"),
+        "floors": data.get("floors"),
+        "total_cost": costs['total_cost'],
+        "duration_weeks": costs['duration_weeks']
+    }
+    ai_schedule_payload = {
+        "area": data.get("built_up_area"),
+        "floors": data.get("floors"),
+        "estimated_days": costs.get('duration_days')
+    }
+    return ai_input, ai_schedule_payload
+
+def _calculation(calculator, data, workers=None, costs=None, timings=None):
+    """Deterministic part of a plan: workers, costs, materials, bill of
+    quantities, blueprint, critical-path schedule, assumptions.
+
+    `boq` is None without a `region`: costs then use the flat per-sq-yard
+    rate, and a line-item bill at other rates would contradict them.
+    """
+    with timed("calculate", timings):
+        workers = workers or calculator.calculate_workers()
+        costs = costs or calculator.calculate_costs(workers)
+    with timed("materials", timings):
+        materials = calculator.calculate_materials()
+        boq = calculator.calculate_boq() if calculator.region else None
+    with timed("blueprint", timings):
+        blueprint = _generate_blueprint(calculator, data)
+    schedule, schedule_summary = _schedule_plan(calculator, timings)
+    return {
+        "workers": workers,
+        "total_workers": sum(workers.values()),
+        "materials": materials,
+        "boq": boq,
+        "costs": costs,
+        "blueprint": blueprint,
+        "schedule": schedule,
+        "schedule_summary": schedule_summary,
+        "assumptions": calculator.assumptions()
+    }
+
+def _schedule_plan(calculator, timings=None):
+    """Critical-path schedule as (weekly entries, summary without the weeks)."""
+    with timed("schedule", timings):
+        plan = calculator.critical_path_schedule()
+    return plan.pop("weeks"), plan
+
+def _generate_blueprint(calculator, data):
+    return attach_svg_urls(calculator.generate_blueprint(
+        room_options=data.get('room_options'),
+        room_program=data.get('room_program'),
+        all_floors=bool(data.get('all_floors')),
+        floor_programs=data.get('floor_programs'),
+        stair_core=data.get('stair_core')
+    ))
+
+def _run_simulation(calculator, options):
+    """Run the Monte Carlo risk model when the request carries a `simulation` block.
+
+    `options`: {"distributions": {...}, "samples": 100000, "seed": 42,
+    "bins": 40, "start_date": "YYYY-MM-DD"}; see `risk_sim.simulate`.
+    """
+    if not isinstance(options, dict):
+        return None
+    samples = min(int(options.get("samples", 100000)), RISK_MAX_SAMPLES)
+    return simulate(
+        calculator,
+        distributions=options.get("distributions"),
+        samples=samples,
+        seed=options.get("seed", 42),
+        bins=min(int(options.get("bins", 40)), RISK_MAX_BINS),
+        workers=RISK_WORKERS,
+        start_date=options.get("start_date")
+    )
+
+def _timings():
+    """Per-request stage timings; filled by `timed(...)` and sent as Server-Timing."""
+    if "timings" not in g:
+        g.timings = {}
+    return g.timings
+
+def _sse(event, payload):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def _blueprint_format(data):
+    """Requested blueprint wire format (body or query `blueprint_format`)."""
+    return (data or {}).get("blueprint_format") or request.args.get("blueprint_format") or "plain"
+
+def _input_error(data):
+    """Message for an unknown `blueprint_format` or `region`, or bad `floors` (answered with 400), else None."""
+    if _blueprint_format(data) not in BLUEPRINT_FORMATS:
+        return f"unknown blueprint_format; use one of {', '.join(BLUEPRINT_FORMATS)}"
+    error = _floors_error((data or {}).get("floors"))
+    if error:
+        return error
+    region = (data or {}).get("region")
+    if region:
+        try:
+            rate_book().table.region_index(region)
+        except ValueError as e:
+            return str(e)
+    return None
+
+def _number_error(field, value):
+    """Message unless `value` is a positive finite number, else None."""
+    try:
+        if not isinstance(value, bool) and math.isfinite(float(value)) and float(value) > 0:
+            return None
+    except (TypeError, ValueError):
+        pass
+    return f"{field} must be a positive number"
+
+def _floors_error(floors):
+    """Message unless `floors` is a floor count or "G+N" string up to MAX_FLOORS, else None.
+
+    `ConstructionCalculator._parse_floors` reads anything else as one floor.
+    """
+    if floors is None or isinstance(floors, int) and not isinstance(floors, bool):
+        count = floors
+    elif isinstance(floors, float) and floors.is_integer():
+        count = int(floors)
+    else:
+        s = str(floors).upper().strip()
+        try:
+            count = int(s.split("+")[-1]) + 1 if "+" in s else int(s)
+        except ValueError:
+            return f"invalid floors '{floors}'; use a floor count or \"G+N\""
+    if count is not None and count < 1:
+        return "floors must be at least 1 (G+0)"
+    if count is not None and count > MAX_FLOORS:
+        return f"at most {MAX_FLOORS} floors (G+{MAX_FLOORS - 1}) are supported"
+    return None
+
+def _batch_input_error(columns):
+    """`_input_error` per project for /api/calculate/batch: message for the first bad one, else None."""
+    checks = [
+        ("built_up_area", lambda v: _number_error("built_up_area", v)),
+        ("floors", _floors_error),
+        # optional rates: falsy means the default, as in the calculator
+        ("daily_wage", lambda v: v and _number_error("daily_wage", v)),
+        ("cost_per_sq_yard", lambda v: v and _number_error("cost_per_sq_yard", v)),
+        ("region", lambda v: _input_error({"region": v})),
+    ]
+    for field, check in checks:
+        values = columns[field]
+        rows = values if isinstance(values, list) else [values]
+        for i, value in enumerate(rows):
+            error = check(value)
+            if error:
+                return f"project {i}: {error}" if isinstance(values, list) else error
+    return None
+
+def _ai_deadline(data, started):
+    """(`latency_budget_ms`, monotonic deadline) for a request's model calls; both None without a budget."""
+    budget_ms = data.get("latency_budget_ms", AI_LATENCY_BUDGET_MS)
+    if budget_ms in (None, ""):
+        return None, None
+    return budget_ms, started + float(budget_ms) / 1000.0
+
+def _calculate_etag(calculator, data, fmt):
+    """ETag of a `/api/calculate` response, derived from the normalized inputs
+    (so "G+2" and 3 floors, or 1000 and 1000.0 sq yards, share one) and the
+    rate table version, so a rates reload changes it. It also changes every
+    SVG_MAX_AGE seconds: a body revalidated with 304 must not outlive the
+    blueprint SVGs its URLs point to."""
+    key = [
+        CALC_ETAG_VERSION, int(time.time() // SVG_MAX_AGE), MODEL_ID, AI_SCHEDULE, (calculator.rates or rate_book().table).version,
+        calculator.built_up_area_yards, calculator.num_floors, calculator.region,
+        calculator.DAILY_WAGE_PER_WORKER, calculator.COST_PER_SQ_YARD,
+        data.get("room_options"), data.get("room_program"), bool(data.get("all_floors")),
+        data.get("floor_programs"), data.get("stair_core"), data.get("simulation"), fmt,
+    ]
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+def _not_modified(etag):
+    response = app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    return response
+
 # ================= ROUTES =================
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+    if AI_ENGINE is None:
+        # served as a plain `app:app` (flask run, test client) without the factory
+        create_app()
+
+@app.after_request
+def _record_request(response):
+    # For streamed responses this is time to first byte, not the whole stream
+    elapsed = time.perf_counter() - g.get("request_started", time.perf_counter())
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+    timings = g.get("timings")
+    if timings is not None:
+        response.headers["Server-Timing"] = server_timing(dict(timings, total=elapsed))
+    return response
+
+@app.after_request
+def _compress(response):
+    # registered after _record_request, so it runs first: compression time is
+    # part of the recorded latency and shows up in Server-Timing
+    return compress_response(response, request.headers.get("Accept-Encoding"), COMPRESS_MIN_BYTES,
+                             COMPRESS_LEVEL, BROTLI_QUALITY, g.get("timings"))
+
 @app.route("/")
 def index():
     return render_template("index.html")
 
 @app.route("/api/calculate", methods=["POST"])
 def api_calculate():
+    """Full plan for one project.
+
+    Optional body fields besides the inputs: `latency_budget_ms`, `simulation`,
+    `save`/`name` (store it under /api/projects) and `blueprint_format`
+    ("columnar" for the compact blueprint encoding, see `blueprint_codec`).
+
+    Unsaved responses carry a weak ETag derived from the normalized inputs;
+    send it back as `If-None-Match` and an unchanged plan is answered with
+    304 before anything is computed. While an AI output is still the
+    fallback the ETag ends in "-partial", and the plan is recomputed (the
+    model's answer may be cached by now) and only 304'd if still partial.
+    """
     try:
+        started = time.monotonic()
         data = request.json
-        calculator = ConstructionCalculator(
-            built_up_area=data.get("built_up_area", 1000),
-            floors=data.get("floors", "G+2"),
-            daily_wage=data.get("daily_wage"),
-            cost_per_sq_yard=data.get("cost_per_sq_yard")
-        )
+        budget_ms, deadline = _ai_deadline(data, started)
+        error = _input_error(data)
+        if error:
+            return jsonify({"error": error}), 400
+        fmt = _blueprint_format(data)
+        calculator = _build_calculator(data)
+        etag = None if data.get("save") else _calculate_etag(calculator, data, fmt)
+        if etag and request.if_none_match.contains_weak(etag):
+            return _not_modified(etag)
+        timings = _timings()
         
-        workers = calculator.calculate_workers()
-        costs = calculator.calculate_costs(workers)
+        with timed("calculate", timings):
+            workers = calculator.calculate_workers()
+            costs = calculator.calculate_costs(workers)
         
         # Prepare data for AI
-        ai_input = {
-            "built_up_area": data.get("built_up_area"),
-            "floors": data.get("floors"),
-            "total_cost": costs['total_cost'],
-            "duration_weeks": costs['duration_weeks']
-        }
-        
+        ai_input, ai_schedule_payload = _ai_inputs(data, costs)
+
+        # Fire the model calls at once; wall time is the slower of the two. Each
+        # records its timing in its own dict, merged below only if it finishes in
+        # the budget: a late call must not touch the request's timings. They
+        # return raw results, resolved (and any fallback counted) here, once.
+        insight_timings, schedule_timings = {}, {}
+        insight_future = _submit_ai("insight", timed_call, "ai_insight", insight_timings, _ai_insight, ai_input)
+        schedule_future = None
+        if AI_SCHEDULE:
+            schedule_future = _submit_ai("schedule", timed_call, "ai_schedule", schedule_timings,
+                                         _ai_schedule, ai_schedule_payload)
+
+        # Deterministic work runs while the model calls are in flight
+        cpm_schedule, schedule_summary = _schedule_plan(calculator, timings)
+        with timed("materials", timings):
+            materials = calculator.calculate_materials()
+            boq = calculator.calculate_boq() if calculator.region else None
+        with timed("blueprint", timings):
+            blueprint = _generate_blueprint(calculator, data)
+        with timed("simulation", timings):
+            try:
+                risk = _run_simulation(calculator, data.get("simulation"))
+            except (ValueError, TypeError) as e:
+                return jsonify({"error": f"simulation: {e}"}), 400
+
+        # Past the latency budget, answer with the fallbacks. The model calls keep
+        # running and land in the AI cache, so the next identical request gets them.
+        ai_pending = []
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+
         # Get AI Insight (with fallback)
-        ai_insight = get_ai_insight(ai_input)
-        # Try AI-generated weekly schedule, fallback to algorithmic schedule
         try:
-            ai_schedule_payload = {
-                "area": data.get("built_up_area"),
-                "floors": data.get("floors"),
-                "estimated_days": costs.get('duration_days')
-            }
-            ai_schedule_resp = AI_ENGINE.generate_weekly_schedule(ai_schedule_payload)
-            if isinstance(ai_schedule_resp, dict) and ai_schedule_resp.get('ok') and ai_schedule_resp.get('weeks'):
-                schedule = ai_schedule_resp.get('weeks')
+            if insight_future is None:
+                ai_insight = FALLBACK_INSIGHT
             else:
-                schedule = calculator.generate_schedule()
-        except Exception:
-            schedule = calculator.generate_schedule()
+                ai_insight = _resolve_insight(insight_future.result(timeout=remaining()))
+                timings.update(insight_timings)
+        except FutureTimeout:
+            ai_pending.append("insight")
+            AI_FALLBACKS.inc(kind="insight", reason="latency_budget")
+            ai_insight = FALLBACK_INSIGHT
+        # AI-generated weekly schedule if enabled, otherwise (or on failure) the critical-path one
+        schedule = cpm_schedule
+        ai_weeks = None
+        if schedule_future is not None:
+            try:
+                schedule_resp = schedule_future.result(timeout=remaining())
+                timings.update(schedule_timings)
+                ai_weeks = _model_weeks(schedule_resp)
+                schedule = _resolve_schedule(schedule_resp, calculator)
+            except FutureTimeout:
+                ai_pending.append("schedule")
+                AI_FALLBACKS.inc(kind="schedule", reason="latency_budget")
+            except Exception:
+                AI_FALLBACKS.inc(kind="schedule", reason="ai_error")
+        if ai_pending:
+            print(f"⏱️ AI latency budget ({budget_ms} ms) exceeded; pending: {', '.join(ai_pending)}")
 
         result = {
             "workers": workers,
             "total_workers": sum(workers.values()),
-            "materials": calculator.calculate_materials(),
+            "materials": materials,
+            "boq": boq,
             "costs": costs,
-            "blueprint": calculator.generate_blueprint(room_options=data.get('room_options')), 
+            "blueprint": blueprint,
             "schedule": schedule,
+            "schedule_summary": schedule_summary,
             "ai_insight": ai_insight,
-            "assumptions": {
-                "location": "India",
-                "cost_per_sq_yard": calculator.COST_PER_SQ_YARD,
-                "overhead_percentage": calculator.OVERHEAD_PERCENTAGE
-            }
+            "assumptions": calculator.assumptions()
         }
+        if risk is not None:
+            result["risk"] = risk
+        if ai_pending:
+            result["ai_pending"] = ai_pending
+        if data.get("save") and PROJECTS is not None:
+            running = {"insight": insight_future, "schedule": schedule_future}
+            result["project_id"] = _save_project(data, calculator, result, ai_input, ai_schedule_payload, ai_weeks,
+                                                 {kind: running[kind] for kind in ai_pending})
+        if etag:
+            final = not ai_pending and isinstance(ai_insight, dict) and (ai_weeks is not None or not AI_SCHEDULE)
+            etag = etag if final else etag + "-partial"
+            if request.if_none_match.contains_weak(etag):
+                return _not_modified(etag)
+        with timed("serialize", timings):
+            result["blueprint"] = encode_blueprint(blueprint, fmt)
+            response = jsonify(result)
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Backend Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def _save_project(data, calculator, result, ai_input, schedule_payload, ai_weeks=None, pending=None):
+    """Save a finished plan to PROJECTS and return its id.
+
+    Model outputs are stored under the engine's prompt keys so later plans
+    with the same inputs reuse them; `pending` model calls (futures still
+    running past the latency budget) are attached to the project when they land.
+    """
+    insight_key = AI_ENGINE.insight_key(_insight_payload(ai_input))
+    schedule_key = AI_ENGINE.schedule_key(schedule_payload)
+    ai = {}
+    if isinstance(result["ai_insight"], dict) and result["ai_insight"].get("ok"):
+        ai["insight"] = (insight_key, result["ai_insight"])
+    if ai_weeks:
+        ai["schedule"] = (schedule_key, ai_weeks)
+    inputs = {k: v for k, v in data.items() if k not in ("save", "name")}
+    project_id = PROJECTS.save(inputs, calculator.num_floors, result, name=data.get("name"), ai=ai)
+    for kind, future in (pending or {}).items():
+        key = insight_key if kind == "insight" else schedule_key
+        future.add_done_callback(lambda f, kind=kind, key=key: _attach_ai(project_id, kind, key, f))
+    return project_id
+
+def _attach_ai(project_id, kind, key, future):
+    """Done-callback: store a model output that finished after its project was saved."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    value = future.result()
+    if kind == "insight":
+        value = value if isinstance(value, dict) and value.get("ok") else None
+    else:
+        value = _model_weeks(value)
+    if value:
+        PROJECTS.set_ai(project_id, kind, key, value)
+
+@app.route("/api/calculate/stream", methods=["POST"])
+def api_calculate_stream():
+    """Server-Sent Events variant of `/api/calculate`.
+
+    Emits `calculation` (workers, costs, materials, blueprint) immediately,
+    then `insight_token` / `schedule_token` events as Granite generates,
+    followed by the final `insight` and `schedule` payloads and `done`.
+    Tokens are raw model output (fragments of the JSON answer), useful as
+    progress only; render the parsed `insight` and `schedule` events.
+    Unless AI_SCHEDULE is set, `schedule` is the critical-path schedule and
+    follows `calculation` right away.
+    """
+    try:
+        data = request.json
+        error = _input_error(data)
+        if error:
+            return jsonify({"error": error}), 400
+        fmt = _blueprint_format(data)
+        calculator = _build_calculator(data)
+        calculation = _calculation(calculator, data, timings=_timings())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Backend Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    ai_input, schedule_payload = _ai_inputs(data, calculation["costs"])
+    insight_payload = _insight_payload(ai_input)
+    saved_insight = _saved_ai("insight", AI_ENGINE.insight_key(insight_payload))
+    saved_weeks = _saved_ai("schedule", AI_ENGINE.schedule_key(schedule_payload)) if AI_SCHEDULE else None
+
+    def generate():
+        yield _sse("calculation", dict(calculation, blueprint=encode_blueprint(calculation["blueprint"], fmt)))
+        if not AI_SCHEDULE:
+            yield _sse("schedule", calculation["schedule"])
+
+        # Both model streams feed one queue; None marks a finished stream
+        events = queue.Queue()
+
+        def pump(name, stream):
+            try:
+                for event in stream:
+                    events.put((name, event))
+            except Exception as e:
+                events.put((name, {"result": {"ok": False, "error": str(e)}}))
+            finally:
+                events.put((name, None))
+
+        # outputs saved with an earlier project need no model call
+        streams = []
+        if saved_insight is not None:
+            yield _sse("insight", saved_insight)
+        else:
+            streams.append(("insight", AI_ENGINE.stream_analysis(insight_payload)))
+        if saved_weeks is not None:
+            yield _sse("schedule", saved_weeks)
+        elif AI_SCHEDULE:
+            streams.append(("schedule", AI_ENGINE.stream_weekly_schedule(schedule_payload)))
+        pending = 0
+        for name, stream in streams:
+            if _submit_ai(name, pump, name, stream) is not None:
+                pending += 1
+            elif name == "insight":
+                yield _sse("insight", FALLBACK_INSIGHT)
+            else:
+                yield _sse("schedule", calculator.generate_schedule())
+
+        while pending:
+            name, event = events.get()
+            if event is None:
+                pending -= 1
+            elif "token" in event:
+                yield _sse(f"{name}_token", {"token": event["token"]})
+            elif name == "insight":
+                yield _sse("insight", _resolve_insight(event["result"]))
+            else:
+                yield _sse("schedule", _resolve_schedule(event["result"], calculator))
+        yield _sse("done", {})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _ai_plan_job(job):
+    """Job body for `/api/jobs`: the two model calls, one after the other, so
+    each job holds at most one generation slot."""
+    data, costs = job.payload["data"], job.payload["costs"]
+    ai_input, ai_schedule_payload = _ai_inputs(data, costs)
+    job.update(5, "insight")
+    ai_insight = timed_call("ai_insight", None, get_ai_insight, ai_input)
+    if not AI_SCHEDULE:
+        return {"ai_insight": ai_insight}
+    job.update(50, "schedule")
+    try:
+        with timed("ai_schedule"):
+            schedule = _resolve_schedule(_ai_schedule(ai_schedule_payload), _build_calculator(data))
+    except Exception:
+        AI_FALLBACKS.inc(kind="schedule", reason="ai_error")
+        schedule = _build_calculator(data).generate_schedule()
+    return {"ai_insight": ai_insight, "schedule": schedule}
+
+@app.route("/api/jobs", methods=["POST"])
+def api_jobs_submit():
+    """Queue the AI part of a plan and return the deterministic part right away.
+
+    Body: the `/api/calculate` payload plus optional `priority`
+    ("high" | "normal" | "low"). Responds 202 with a `job_id`; poll
+    `GET /api/jobs/<job_id>` for progress and the AI results.
+    """
+    try:
+        data = request.json
+        error = _input_error(data)
+        if error:
+            return jsonify({"error": error}), 400
+        fmt = _blueprint_format(data)
+        calculator = _build_calculator(data)
+        calculation = _calculation(calculator, data, timings=_timings())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Backend Error: {e}")
+        return jsonify({"error": str(e)}), 500
+    calculation["blueprint"] = encode_blueprint(calculation["blueprint"], fmt)
+
+    try:
+        job = AI_JOBS.submit(_ai_plan_job, {"data": data, "costs": calculation["costs"]},
+                             priority=data.get("priority", "normal"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({"error": str(e), "calculation": calculation}), 429, {"Retry-After": "5"}
+
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/api/jobs/{job.id}",
+        "position": AI_JOBS.position(job),
+        "calculation": calculation
+    }), 202
+
+@app.route("/api/jobs/<job_id>")
+def api_jobs_status(job_id):
+    job = AI_JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job id"}), 404
+    return jsonify(dict(job.to_dict(), position=AI_JOBS.position(job))), 200
+
+def _session_ai_call(session, name):
+    """Submit one model call for a session; the future resolves to the final
+    (fallback-substituted) insight or schedule."""
+    ai_input, schedule_payload = _ai_inputs(session.inputs, session.outputs["costs"])
+    calculator = _build_calculator(session.inputs)
+    if name == "insight":
+        future = _submit_ai(name, get_ai_insight, ai_input)
+    else:
+        future = _submit_ai(name, lambda: _resolve_schedule(_ai_schedule(schedule_payload), calculator))
+    if future is None:
+        future = Future()
+        future.set_result(FALLBACK_INSIGHT if name == "insight" else calculator.generate_schedule())
+    return future
+
+def _session_payload(session, names, include_ai, fmt="plain"):
+    result = {"session_id": session.id, "version": session.version}
+    outputs = {}
+    for name in names:
+        outputs[name] = session.outputs[name]
+        if name == "blueprint":
+            outputs[name] = encode_blueprint(outputs[name], fmt)
+        if name == "workers":
+            outputs["total_workers"] = sum(session.outputs["workers"].values())
+    done, pending = session.ai_results()
+    if include_ai:
+        if "insight" in done:
+            outputs["ai_insight"] = done["insight"]
+        if "schedule" in done:
+            outputs["schedule"] = done["schedule"]
+    result["outputs"] = outputs
+    result["ai_pending"] = pending
+    return result
+
+@app.route("/api/sessions", methods=["POST"])
+def api_sessions_create():
+    """Start an interactive session from a `/api/calculate`-style body.
+
+    Returns every deterministic output right away; the model calls run in
+    the background (`ai_pending`) and show up on `GET /api/sessions/<id>`.
+    Follow-up edits go to `PATCH /api/sessions/<id>` with only the changed
+    fields.
+    """
+    try:
+        data = request.json or {}
+        error = _input_error(data)
+        if error:
+            return jsonify({"error": error}), 400
+        fmt = _blueprint_format(data)
+        with timed("recalculate", _timings()):
+            session = SESSIONS.create({k: v for k, v in data.items() if k in SESSION_INPUTS})
+        with session.lock:
+            session.refresh_ai(lambda name: _session_ai_call(session, name), AI_CALLS)
+            payload = _session_payload(session, list(session.outputs), include_ai=True, fmt=fmt)
+        return jsonify(payload), 201
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Backend Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/sessions/<session_id>", methods=["GET"])
+def api_sessions_get(session_id):
+    error = _input_error(None)
+    if error:
+        return jsonify({"error": error}), 400
+    fmt = _blueprint_format(None)
+    session = SESSIONS.get(session_id)
+    if session is None:
+        return jsonify({"error": "unknown or expired session"}), 404
+    with session.lock:
+        return jsonify(dict(_session_payload(session, list(session.outputs), include_ai=True, fmt=fmt),
+                            inputs=session.inputs)), 200
+
+@app.route("/api/sessions/<session_id>", methods=["PATCH"])
+def api_sessions_update(session_id):
+    """Apply a delta (only the changed input fields) and return only what changed.
+
+    `changed` lists the recomputed outputs; a wage edit recomputes `costs`,
+    a room-options edit only re-decorates the cached blueprint geometry.
+    Model calls restart only when area, floors or duration change.
+    """
+    session = SESSIONS.get(session_id)
+    if session is None:
+        return jsonify({"error": "unknown or expired session"}), 404
+    try:
+        changes = dict(request.json or {})
+        error = _input_error(changes)
+        if error:
+            return jsonify({"error": error}), 400
+        fmt = _blueprint_format(changes)
+        changes.pop("blueprint_format", None)
+        with session.lock:
+            with timed("recalculate", _timings()):
+                changed = session.apply(changes)
+            restarted = session.refresh_ai(lambda name: _session_ai_call(session, name), AI_CALLS) if changed else []
+            SESSIONS.save(session)
+            payload = _session_payload(session, changed, include_ai=bool(restarted), fmt=fmt)
+        payload["changed"] = changed
+        return jsonify(payload), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Backend Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/sessions/<session_id>", methods=["DELETE"])
+def api_sessions_delete(session_id):
+    if not SESSIONS.delete(session_id):
+        return jsonify({"error": "unknown or expired session"}), 404
+    return "", 204
+
+def _project_query(args):
+    """(filters, sort, descending) from `/api/projects` query parameters."""
+    filters = {}
+    for name in PROJECT_FILTERS:
+        value = args.get(name)
+        if value in (None, ""):
+            continue
+        filters[name] = ConstructionCalculator._parse_floors(value) if name == "floors" else float(value)
+    sort = args.get("sort", "created")
+    if sort not in PROJECT_SORTS:
+        raise ValueError(f"unknown sort '{sort}'; use one of {', '.join(PROJECT_SORTS)}")
+    order = args.get("order", "desc")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be 'asc' or 'desc'")
+    return filters, sort, order == "desc"
+
+@app.route("/api/projects")
+def api_projects_list():
+    """Saved projects, newest first by default, one page at a time.
+
+    Query: `limit` (max 500), `sort` (created | built_up_area | floors |
+    total_cost), `order` (asc | desc), filters `min_area`, `max_area`,
+    `floors`, `min_cost`, `max_cost`, `since`, `until` (epoch seconds), and
+    `cursor` from the previous page's `next_cursor`.
+    """
+    if PROJECTS is None:
+        return jsonify({"error": "project store disabled (PROJECTS_PATH)"}), 404
+    try:
+        filters, sort, descending = _project_query(request.args)
+        rows, next_cursor = PROJECTS.list(filters, sort, descending, request.args.get("cursor"),
+                                          request.args.get("limit", 50))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"projects": rows, "next_cursor": next_cursor}), 200
+
+# CSV export: values read straight out of the stored result (see ProjectStore.export_rows)
+EXPORT_CSV_FIELDS = {
+    "labor_cost": "$.costs.labor_cost",
+    "material_cost": "$.costs.material_cost",
+    "overhead": "$.costs.overhead",
+    "total_workers": "$.total_workers",
+    "cement_bags": "$.materials.cement_bags",
+    "steel_kg": "$.materials.steel_kg",
+    "sand_tons": "$.materials.sand_tons",
+    "aggregate_cu_ft": "$.materials.aggregate_cu_ft",
+    "bricks": "$.materials.bricks",
+}
+EXPORT_CSV_COLUMNS = ("id", "name", "created", "built_up_area", "floors", "total_cost", "duration_days",
+                      "has_ai_insight") + tuple(EXPORT_CSV_FIELDS)
+
+def _csv_row(record):
+    record["created"] = datetime.datetime.fromtimestamp(record["created"], datetime.timezone.utc).isoformat(
+        timespec="seconds")
+    record["has_ai_insight"] = bool(record["has_ai_insight"])
+    return [record[column] for column in EXPORT_CSV_COLUMNS]
+
+@app.route("/api/projects/export")
+def api_projects_export():
+    """Stream every matching project as `format=csv` or `format=ndjson` (default).
+
+    Takes the list filters and sort; rows are read in batches, so memory
+    stays flat however many projects match. NDJSON carries inputs, full
+    results and AI outputs (`blueprint=1` adds the layouts).
+    """
+    if PROJECTS is None:
+        return jsonify({"error": "project store disabled (PROJECTS_PATH)"}), 404
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"error": "format must be 'csv' or 'ndjson'"}), 400
+    try:
+        filters, sort, descending = _project_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if fmt == "csv":
+        records = PROJECTS.export_rows(filters, sort, descending, extract=EXPORT_CSV_FIELDS)
+    else:
+        records = PROJECTS.export_rows(filters, sort, descending, include_blueprint=request.args.get("blueprint") == "1")
+
+    def generate_csv():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_CSV_COLUMNS)
+        for i, record in enumerate(records, 1):
+            writer.writerow(_csv_row(record))
+            if i % 500 == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    def generate_ndjson():
+        for record in records:
+            yield json.dumps(record) + "\n"
+
+    if fmt == "csv":
+        return Response(stream_with_context(generate_csv()), mimetype="text/csv",
+                        headers={"Content-Disposition": 'attachment; filename="projects.csv"'})
+    return Response(stream_with_context(generate_ndjson()), mimetype="application/x-ndjson",
+                    headers={"Content-Disposition": 'attachment; filename="projects.ndjson"'})
+
+@app.route("/api/projects/<int:project_id>", methods=["GET"])
+def api_projects_get(project_id):
+    """A saved project with its stored results; nothing is recomputed."""
+    project = PROJECTS.get(project_id) if PROJECTS is not None else None
+    if project is None:
+        return jsonify({"error": "unknown project"}), 404
+    # the render cache may have evicted the drawings since; this re-renders only those
+    attach_svg_urls(project["blueprint"])
+    return jsonify(project), 200
+
+@app.route("/api/projects/<int:project_id>", methods=["DELETE"])
+def api_projects_delete(project_id):
+    if PROJECTS is None or not PROJECTS.delete(project_id):
+        return jsonify({"error": "unknown project"}), 404
+    return "", 204
+
+@app.route("/api/calculate/batch", methods=["POST"])
+def api_calculate_batch():
+    """Price many projects in one vectorized pass.
+
+    Accepts either `{"projects": [{built_up_area, floors, daily_wage, cost_per_sq_yard, region}, ...]}`
+    or columnar lists under the same keys. Returns columnar results; AI
+    insights are only added when `include_ai` is true, within the same
+    `latency_budget_ms` as /api/calculate (late ones are the fallback).
+    """
+    try:
+        data = request.json or {}
+        budget_ms, deadline = _ai_deadline(data, time.monotonic())
+        fields = ("built_up_area", "floors", "daily_wage", "cost_per_sq_yard", "region")
+        if isinstance(data.get("projects"), list):
+            projects = data["projects"]
+            columns = {f: [p.get(f) for p in projects] for f in fields}
+        else:
+            columns = {f: data.get(f) for f in fields}
+        if columns["built_up_area"] is None:
+            return jsonify({"error": "built_up_area is required"}), 400
+        if columns["floors"] is None:
+            columns["floors"] = "G+2"
+        error = _batch_input_error(columns)
+        if error:
+            return jsonify({"error": error}), 400
+
+        result = estimate_batch(**columns)
+
+        if data.get("include_ai"):
+            # one model call per distinct (area, floors, duration); cache covers repeats
+            areas = columns["built_up_area"] if isinstance(columns["built_up_area"], list) else [columns["built_up_area"]] * result["count"]
+            floors = columns["floors"] if isinstance(columns["floors"], list) else [columns["floors"]] * result["count"]
+            keys = list(zip(areas, floors, result["costs"]["duration_weeks"]))
+            futures = {}
+            for key in keys:
+                if key not in futures:
+                    futures[key] = _submit_ai("insight", _ai_insight, {
+                        "built_up_area": key[0], "floors": key[1], "duration_weeks": key[2]
+                    })
+            # one budget for the whole batch, as in /api/calculate; late insights fall back
+            insights = {}
+            late = 0
+            for key, future in futures.items():
+                if future is None:
+                    insights[key] = FALLBACK_INSIGHT
+                    continue
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    insights[key] = _resolve_insight(future.result(timeout=remaining))
+                except FutureTimeout:
+                    late += 1
+                    AI_FALLBACKS.inc(kind="insight", reason="latency_budget")
+                    insights[key] = FALLBACK_INSIGHT
+            result["ai_insight"] = [insights[key] for key in keys]
+            if late:
+                print(f"⏱️ AI latency budget ({budget_ms} ms) exceeded; {late} batch insight(s) pending")
+                result["ai_pending"] = ["insight"]
+
         return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"❌ Backend Error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/sweep", methods=["POST"])
+def api_sweep():
+    """Evaluate a Cartesian parameter grid plus sensitivity analysis.
+
+    Body: `{"axes": {"built_up_area": {"start": 200, "stop": 5000, "num": 50},
+    "floors": ["G+0", ..., "G+5"], "daily_wage": {...}}, "metrics": [...]}`.
+    Small grids return a heatmap-ready JSON payload; large grids (or
+    `"stream": true`) stream NDJSON: a header line, one line per chunk of
+    flat-indexed results, then the sensitivity report.
+    """
+    try:
+        data = request.json or {}
+        sweep = ParameterSweep(data.get("axes"), max_points=SWEEP_MAX_POINTS)
+        metrics = tuple(data.get("metrics") or ("total_cost", "duration_days"))
+        bad = [m for m in metrics if m not in SWEEP_METRICS]
+        if bad:
+            return jsonify({"error": f"unknown metric(s): {', '.join(bad)}"}), 400
+        chunk_size = max(1000, int(data.get("chunk_size", 100000)))
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    header = {"parameters": sweep.names, "axes": sweep.axes_payload(), "shape": list(sweep.shape), "points": sweep.size}
+
+    if sweep.size <= SWEEP_GRID_LIMIT and not data.get("stream"):
+        payload = dict(header, grid=metric_lists(sweep.grid(metrics)), sensitivity=sweep.sensitivity(metrics))
+        return jsonify(payload), 200
+
+    def generate():
+        yield json.dumps(header) + "\n"
+        for offset, results in sweep.chunks(chunk_size, metrics):
+            yield json.dumps({"offset": offset, **metric_lists(results)}) + "\n"
+        yield json.dumps({"sensitivity": sweep.sensitivity(metrics)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route("/api/blueprint/<key>.svg")
+def blueprint_svg(key):
+    """One rendered floor plan by content hash (the `svg` URL on each blueprint floor)."""
+    entry = get_rendered(key)
+    if entry is None:
+        return jsonify({"error": "unknown or expired blueprint"}), 404
+    response = Response(entry["svg"], mimetype="image/svg+xml")
+    response.headers["Cache-Control"] = f"public, max-age={SVG_MAX_AGE}"
+    response.set_etag(key)
+    return response.make_conditional(request)
+
+@app.route("/api/blueprint/<keys>.zip")
+def blueprint_zip(keys):
+    """Several floors in one download: `/api/blueprint/<hash>-<hash>-....zip`."""
+    keys = keys.split("-")
+    if len(keys) > SVG_ZIP_MAX_FLOORS:
+        return jsonify({"error": f"at most {SVG_ZIP_MAX_FLOORS} floors per archive"}), 400
+    entries = [get_rendered(key) for key in keys]
+    if None in entries:
+        return jsonify({"error": "unknown or expired blueprint"}), 404
+    response = Response(zip_floors(entries), mimetype="application/zip")
+    response.headers["Content-Disposition"] = 'attachment; filename="blueprint.zip"'
+    response.headers["Cache-Control"] = f"public, max-age={SVG_MAX_AGE}"
+    response.set_etag("-".join(keys))
+    return response.make_conditional(request)
+
+@app.route("/api/rates")
+def api_rates():
+    """Loaded rate tables: regions, BOQ items and, with `?region=`, that region's rates."""
+    table = rate_book().table
+    payload = {
+        "version": table.version,
+        "loaded_at": table.loaded_at,
+        "regions": [table.describe(i) for i in range(len(table.regions))],
+        "items": [{"code": code, "description": description, "unit": unit, "category": category,
+                   "quantity_per_sq_yard": per_yard}
+                  for code, description, unit, category, per_yard in BOQ_ITEMS],
+        "categories": list(BOQ_CATEGORIES),
+    }
+    region = request.args.get("region")
+    if region:
+        try:
+            row = table.region_index(region)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 404
+        payload["rates"] = dict(zip((item[0] for item in BOQ_ITEMS), table.rates[row].tolist()))
+    return jsonify(payload)
+
+@app.route("/api/rates/reload", methods=["POST"])
+def api_rates_reload():
+    """Re-read the rate files now (each worker also notices edits by itself within
+    RATES_CHECK_INTERVAL). Invalid files are rejected and the old rates stay."""
+    try:
+        table = rate_book().reload()
+    except ValueError as e:
+        return jsonify({"error": str(e), "version": rate_book().table.version}), 422
+    print(f"💱 Rate tables reloaded (version {table.version})")
+    return jsonify({"version": table.version, "regions": list(table.regions)})
+
+@app.route("/api/boq", methods=["POST"])
+def api_boq():
+    """Bill of quantities for `{built_up_area, floors, region}`, or with
+    `"regions": [...]` (or "*" for all) the material totals in each region, cheapest first."""
+    data = request.json or {}
+    error = _input_error(data)
+    if error:
+        return jsonify({"error": error}), 400
+    try:
+        calculator = _build_calculator(data)
+        regions = data.get("regions")
+        if regions:
+            return jsonify(compare_regions(calculator.built_up_area_yards, calculator.num_floors,
+                                           None if regions == "*" else regions))
+        return jsonify(calculator.calculate_boq())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/health")
 def health():
-    return jsonify({"status": "healthy", "system": "Construction Planning System", "timestamp": time.time()})
+    return jsonify({
+        "status": "healthy",
+        "system": "Construction Planning System",
+        "timestamp": time.time(),
+        "ai_cache": AI_ENGINE.cache.stats(),
+        "ai_model": AI_ENGINE.model_stats(),
+        "ai_circuit": AI_ENGINE.breaker.stats(),
+        "ai_single_flight": AI_ENGINE.flights.stats(),
+        "ai_generations": AI_ENGINE.limiter.stats(),
+        "ai_executor": AI_EXECUTOR.stats(),
+        "blueprint_cache": layout_cache_info()._asdict(),
+        "blueprint_geometry_cache": geometry_cache_info()._asdict(),
+        "blueprint_svg_cache": render_cache_info(),
+        "schedule_cache": schedule_cache_info()._asdict(),
+        "sessions": SESSIONS.stats(),
+        "projects": PROJECTS.stats() if PROJECTS is not None else None,
+        "rates": rate_book().stats(),
+        "ai_jobs": AI_JOBS.stats()
+    })
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Development server; see wsgi.py / gunicorn.conf.py for production
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
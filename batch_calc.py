@@ -0,0 +1,161 @@
+import numpy as np
+from calculator import ConstructionCalculator
+from boq import price_batch, CATEGORIES
+
+
+def _column(values, n, default):
+    """Broadcast a scalar/list input to a float array, applying the calculator's
+    "falsy means default" rule for optional rates."""
+    if values is None or np.isscalar(values):
+        values = [values] * n
+    return np.array([v if v else default for v in values], dtype=np.float64)
+
+
+def _round_list(arr, ndigits):
+    # Python's round() is correctly rounded; np.round is not, and results
+    # must match ConstructionCalculator bit for bit.
+    return [round(v, ndigits) for v in arr.tolist()]
+
+
+def parse_floor_values(floors):
+    """Parse a list of floor specs ("G+2", 3, ...) into a float array."""
+    # floor strings repeat heavily ("G+2"), so parse each distinct value once
+    parsed = {}
+    for f in floors:
+        if f not in parsed:
+            parsed[f] = ConstructionCalculator._parse_floors(f)
+    return np.array([parsed[f] for f in floors], dtype=np.float64)
+
+
+def estimate_arrays(area, num_floors, wage, rate, overhead_percentage=None, productivity=None, material=None):
+    """Core worker/cost formulas of `ConstructionCalculator` on float arrays.
+
+    Inputs must already be parsed (numeric floors, defaults applied) and
+    broadcastable against each other. `overhead_percentage` and
+    `productivity` default to the class constants; `material` (e.g. BOQ
+    totals from `boq.price_batch`) replaces the `rate * 0.6` material cost.
+    Returns unrounded arrays.
+    """
+    C = ConstructionCalculator
+    # workers
+    base = np.ceil(area / 100.0) * 2
+    half = np.ceil(base / 2)
+    masons = np.maximum(4, base)
+    helpers = np.maximum(6, base * 2)
+    steel_workers = np.maximum(2, half)
+    carpenters = np.maximum(2, half)
+    supervisors = np.maximum(1, np.ceil(num_floors / 2))
+    total_workers = masons + helpers + steel_workers + carpenters + supervisors
+
+    if overhead_percentage is None:
+        overhead_percentage = C.OVERHEAD_PERCENTAGE
+    if productivity is None:
+        productivity = C.OUTPUT_PER_WORKER_DAY
+
+    # costs
+    area_floors = area * num_floors
+    days = np.maximum(30, np.ceil(area_floors / (np.maximum(1, total_workers) * productivity)))
+    labor = total_workers * days * wage
+    if material is None:
+        material = area_floors * (rate * 0.6)
+    overhead = (labor + material) * (overhead_percentage / 100.0)
+    return {
+        "masons": masons,
+        "helpers": helpers,
+        "steel_workers": steel_workers,
+        "carpenters": carpenters,
+        "supervisors": supervisors,
+        "total_workers": total_workers,
+        "duration_days": days,
+        "labor_cost": labor,
+        "material_cost": material,
+        "overhead": overhead,
+        "total_cost": labor + material + overhead,
+    }
+
+
+def estimate_batch(built_up_area, floors, daily_wage=None, cost_per_sq_yard=None, region=None):
+    """Vectorized `calculate_workers` / `calculate_costs` / `calculate_materials`.
+
+    Every argument is a list (one entry per project) or a scalar applied to all
+    projects. Returns a columnar dict whose values are lists in input order and
+    equal to what `ConstructionCalculator` would produce for each project.
+    Projects with a `region` are priced from its rate table (`boq`), like
+    the calculator; the result then also carries `region` and `material_by_category`.
+    """
+    C = ConstructionCalculator
+    area = np.asarray(built_up_area, dtype=np.float64).reshape(-1)
+    n = area.size
+    if np.isscalar(floors) or floors is None:
+        floors = [floors if floors is not None else 1] * n
+    num_floors = parse_floor_values(floors)
+    if num_floors.size != n:
+        raise ValueError("floors must have one entry per project")
+    wage = _column(daily_wage, n, C.DAILY_WAGE_PER_WORKER)
+    rate = _column(cost_per_sq_yard, n, C.COST_PER_SQ_YARD)
+    if wage.size != n or rate.size != n:
+        raise ValueError("daily_wage and cost_per_sq_yard must have one entry per project")
+
+    priced = None
+    material = None
+    regions = region if isinstance(region, list) else [region] * n
+    has_region = np.array([bool(r) for r in regions])
+    if has_region.size != n:
+        raise ValueError("region must have one entry per project")
+    if has_region.any():
+        priced = price_batch(area, num_floors, regions)
+        # same precedence as the calculator: explicit wage, then the region's, then the default
+        wages = daily_wage if isinstance(daily_wage, list) else [daily_wage] * n
+        region_wage = priced["daily_wage"]
+        use_region_wage = has_region & ~np.array([bool(w) for w in wages]) & ~np.isnan(region_wage)
+        wage = np.where(use_region_wage, region_wage, wage)
+        material = np.where(has_region, priced["totals"], area * num_floors * (rate * 0.6))
+
+    a = estimate_arrays(area, num_floors, wage, rate, material=material)
+    days = a["duration_days"]
+    area_floors = area * num_floors
+
+    # materials
+    area_ft_floors = (area * 9.0) * num_floors
+    steel_kg = area_floors * C.STEEL_PER_SQ_YARD_KG
+
+    as_int = lambda x: x.astype(np.int64).tolist()
+    result = {
+        "count": n,
+        "workers": {
+            "masons": as_int(a["masons"]),
+            "helpers": as_int(a["helpers"]),
+            "steel_workers": as_int(a["steel_workers"]),
+            "carpenters": as_int(a["carpenters"]),
+            "supervisors": as_int(a["supervisors"]),
+        },
+        "total_workers": as_int(a["total_workers"]),
+        "costs": {
+            "labor_cost": _round_list(a["labor_cost"], 2),
+            "material_cost": _round_list(a["material_cost"], 2),
+            "overhead": _round_list(a["overhead"], 2),
+            "total_cost": _round_list(a["total_cost"], 2),
+            "duration_days": as_int(days),
+            "duration_weeks": as_int(np.ceil(days / 7.0)),
+            "duration_months": _round_list(days / 30.0, 1),
+        },
+        "materials": {
+            "cement_bags": as_int(np.rint(area_floors * C.CEMENT_PER_SQ_YARD)),
+            "steel_kg": _round_list(steel_kg, 2),
+            "steel_tons": _round_list(steel_kg / 1000.0, 2),
+            "sand_tons": _round_list(area_floors * C.SAND_PER_SQ_YARD_TONS, 2),
+            "aggregate_cu_ft": _round_list(area_ft_floors * 1.5, 2),
+            "bricks": as_int(np.trunc(area_ft_floors * 8)),
+        },
+    }
+    if priced is not None:
+        table = priced["table"]
+        result["region"] = [table.regions[row] if given else None
+                            for row, given in zip(priced["rows"].tolist(), has_region.tolist())]
+        result["material_by_category"] = {
+            category: [round(v, 2) if given else None
+                       for v, given in zip(priced["categories"][:, k].tolist(), has_region.tolist())]
+            for k, category in enumerate(CATEGORIES)
+        }
+        result["rates_version"] = table.version
+    return result
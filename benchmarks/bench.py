@@ -0,0 +1,266 @@
+"""Micro-benchmarks for the calculator and blueprint hot paths.
+
+    python benchmarks/bench.py --save            # record benchmarks/baseline.json
+    python benchmarks/bench.py                   # compare against it; exit 1 on regression
+    python benchmarks/bench.py -k layouts --threshold 0.5
+
+Each case is timed with `timeit` (calibrated loop, best of `--repeat`
+runs) and reported as microseconds per call. Baselines are machine
+specific: save one on the base branch, then compare on the branch with
+the change.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import ConstructionCalculator  # noqa: E402
+from blueprint_gen import generate_floor_layouts, clear_layout_cache  # noqa: E402
+from scheduler import clear_schedule_cache  # noqa: E402
+from blueprint_svg import render_floor, layout_hash  # noqa: E402
+from blueprint_codec import encode_columnar  # noqa: E402
+from compression import compress  # noqa: E402
+from boq import price_batch, bill_of_quantities, compare_regions, rate_book  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+# Sweep dimensions (built-up area in sq yards, floor strings, room_options shapes)
+AREAS = (300, 1200, 6000)
+FLOORS = ("G+0", "G+2", "G+10")
+ROOM_OPTIONS = {
+    "none": None,
+    "two": {"bedroom": {"windows": 2, "door_side": "left"}, "bathroom": {"windows": 0}},
+    "all": {
+        "living": {"windows": 3, "door_side": "bottom"},
+        "master": {"windows": 2, "door_side": "left", "window_side": "top"},
+        "bedroom": {"windows": 2, "door_side": "right"},
+        "kitchen": {"windows": 1, "door_side": "top"},
+        "dining": {"windows": 2},
+        "guest": {"windows": 1, "door_side": "left"},
+        "bathroom": {"windows": 0},
+    },
+}
+ROOM_PROGRAMS = {
+    "office_60": {"office": 48, "meeting": 6, "toilet": 4, "pantry": 2},
+    "office_500": {"office": 420, "meeting": 40, "toilet": 24, "pantry": 16},
+}
+
+
+def _calculator_cases():
+    for area in AREAS:
+        for floors in FLOORS:
+            tag = f"area={area},floors={floors}"
+            calc = ConstructionCalculator(area, floors)
+            workers = calc.calculate_workers()
+            yield f"calculator.init[{tag}]", lambda a=area, f=floors: ConstructionCalculator(a, f)
+            yield f"calculator.workers[{tag}]", calc.calculate_workers
+            yield f"calculator.costs[{tag}]", lambda c=calc, w=workers: c.calculate_costs(w)
+            yield f"calculator.materials[{tag}]", calc.calculate_materials
+            yield f"calculator.schedule[{tag}]", calc.generate_schedule
+
+
+def _cold(fn):
+    def run():
+        clear_layout_cache()
+        return fn()
+    return run
+
+
+def _layout_cases():
+    for area in AREAS:
+        for floors in FLOORS:
+            calc = ConstructionCalculator(area, floors)
+            for shape, options in ROOM_OPTIONS.items():
+                tag = f"area={area},floors={floors},options={shape}"
+                call = lambda c=calc, o=options: generate_floor_layouts(c.built_up_area_ft, c.num_floors, room_options=o)
+                yield f"layouts.cold[{tag}]", _cold(call)
+                yield f"layouts.warm[{tag}]", call
+    for name, program in ROOM_PROGRAMS.items():
+        calc = ConstructionCalculator(20000, "G+0")
+        call = lambda c=calc, p=program: generate_floor_layouts(c.built_up_area_ft, c.num_floors, room_program=p)
+        yield f"layouts.program.cold[{name}]", _cold(call)
+    calc = ConstructionCalculator(20000, "G+9")
+    call = lambda c=calc: generate_floor_layouts(c.built_up_area_ft, c.num_floors, single_image=False,
+                                                 room_program=ROOM_PROGRAMS["office_60"])
+    yield "layouts.program.cold[office_60,all_floors=10]", _cold(call)
+
+
+def _schedule_cases():
+    def cold(calc):
+        def run():
+            clear_schedule_cache()
+            return calc.generate_schedule()
+        return run
+
+    for area in AREAS:
+        for floors in FLOORS:
+            yield f"schedule.cold[area={area},floors={floors}]", cold(ConstructionCalculator(area, floors))
+    # thousands of tasks: 20 zones x 21 floors x 8 activities
+    yield "schedule.cold[area=5000,floors=G+20]", cold(ConstructionCalculator(5000, "G+20"))
+
+
+def _svg_cases():
+    plans = {
+        "area=1200,floors=G+2": ConstructionCalculator(1200, "G+2").generate_blueprint(room_options=ROOM_OPTIONS["all"]),
+        "office_500": ConstructionCalculator(20000, "G+0").generate_blueprint(room_program=ROOM_PROGRAMS["office_500"]),
+    }
+    for tag, blueprint in plans.items():
+        yield f"svg.render[{tag}]", lambda f=blueprint[0]: render_floor(f)
+        yield f"svg.hash[{tag}]", lambda f=blueprint[0]: layout_hash(f)
+
+
+def _wire_cases():
+    # what /api/calculate spends turning a large all-floors blueprint into bytes
+    blueprint = ConstructionCalculator(12000, "G+20").generate_blueprint(
+        all_floors=True, room_program=ROOM_PROGRAMS["office_60"])
+    plain = json.dumps(blueprint).encode()
+    columnar = json.dumps(encode_columnar(blueprint)).encode()
+    yield "wire.json[plain]", lambda: json.dumps(blueprint)
+    yield "wire.json[columnar]", lambda: json.dumps(encode_columnar(blueprint))
+    yield "wire.gzip[plain]", lambda: compress(plain, "gzip")
+    yield "wire.gzip[columnar]", lambda: compress(columnar, "gzip")
+
+
+def _boq_cases():
+    import numpy as np
+    rng = np.random.default_rng(7)
+    regions = rate_book().table.regions
+    for n in (1000, 100000):
+        area = rng.uniform(300, 6000, n)
+        floors = rng.integers(1, 21, n).astype(np.float64)
+        mixed = [regions[i % len(regions)] for i in range(n)]
+        yield f"boq.price_batch[{n}x{len(regions)} regions]", lambda a=area, f=floors, r=mixed: price_batch(a, f, r)
+    yield "boq.bill[area=1200,floors=3]", lambda: bill_of_quantities(1200, 3, "IN-MH")
+    yield "boq.compare_regions[area=1200,floors=3]", lambda: compare_regions(1200, 3)
+
+
+def cases():
+    yield from _calculator_cases()
+    yield from _layout_cases()
+    yield from _schedule_cases()
+    yield from _svg_cases()
+    yield from _wire_cases()
+    yield from _boq_cases()
+
+
+def measure(fn, repeat=5, target=0.02):
+    """Best-of-`repeat` time per call in microseconds.
+
+    The loop count is scaled so one run takes about `target` seconds.
+    """
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= target / 10 or number >= 1 << 20:
+            break
+        number *= 10
+    number = max(1, int(number * target / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def environment():
+    import numpy
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "numpy": numpy.__version__,
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(pattern=None, repeat=5, names=None, quiet=False):
+    results = {}
+    for name, fn in cases():
+        if (pattern and pattern not in name) or (names is not None and name not in names):
+            continue
+        results[name] = round(measure(fn, repeat), 3)
+        if not quiet:
+            print(f"{name:<70} {results[name]:>12.2f} us")
+    return results
+
+
+def _slower(results, baseline, threshold):
+    return [name for name, current in results.items()
+            if baseline.get(name) and (current - baseline[name]) / baseline[name] > threshold]
+
+
+def confirm(results, baseline, threshold, repeat, rounds=3):
+    """Re-measure apparent regressions and keep each case's best time.
+
+    Microsecond-scale cases are easily disturbed by other load on the
+    machine; a real slowdown survives every re-run, noise usually does not.
+    """
+    for _ in range(rounds):
+        suspects = _slower(results, baseline, threshold)
+        if not suspects:
+            break
+        for name, value in run(repeat=repeat, names=set(suspects), quiet=True).items():
+            results[name] = min(results[name], value)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table and return the names that slowed down by more than `threshold`."""
+    regressions = []
+    print()
+    print(f"{'benchmark':<70} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<70} {'-':>12} {current:>12.2f} {'new':>8}")
+            continue
+        change = (current - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<70} {before:>12.2f} {current:>12.2f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON path")
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (default 0.25 = 25%%)")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per benchmark (best is kept)")
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, args.repeat)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2, sort_keys=True)
+        print(f"\nSaved {len(results)} results to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save first")
+        return 0
+    with open(args.baseline) as f:
+        saved = json.load(f)
+    if saved.get("environment") != environment():
+        print("\n⚠️ Baseline was recorded in a different environment; comparisons may be noisy")
+    baseline = saved.get("results", {})
+    results = confirm(results, baseline, args.threshold, args.repeat)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""Offline stand-in for the Ollama HTTP API, for load tests and CI.
+
+    python benchmarks/fake_ollama.py --port 11500 --latency lognormal:1.5,0.4 --error-rate 0.02
+    OLLAMA_API_URL=http://localhost:11500/api/generate python app.py
+
+Serves `POST /api/generate` (streaming and non-streaming) and `GET /api/tags`.
+Responses match the JSON schema the engine sends in `format`, so insights
+and schedules parse like real Granite output. Latency is drawn per request
+from `--latency`; in streaming mode it is spread across the tokens.
+
+Error injection (fractions of requests, checked in this order):
+    --error-rate    answer HTTP 500
+    --hang-rate     sleep `--hang-seconds` before answering (client read timeout)
+    --drop-rate     close the connection without a response
+"""
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_INSIGHTS = [
+    "Soil testing and a structural review are essential at this scale; budget two weeks before excavation.",
+    "Use Fe500D steel and OPC 53 grade cement for the frame; PPC is fine for plaster and masonry.",
+    "Overlap MEP rough-in with masonry on lower floors once the slab above is cured.",
+    "Stage material deliveries by floor to keep the site clear and reduce theft and wastage.",
+    "Plan crane or hoist time for slab pours; it is the main constraint above three floors.",
+    "Keep a 10% contingency for price swings in steel and cement over the build period.",
+]
+CANNED_PHASES = [
+    ("Site Preparation", ["Site clearing", "Leveling", "Temporary facilities"]),
+    ("Foundation Work", ["Excavation", "PCC", "Footings"]),
+    ("Plinth & Slab", ["Formwork", "Reinforcement", "Concrete pouring"]),
+    ("Superstructure", ["Columns", "Beams", "Slab casting"]),
+    ("Masonry", ["Brickwork", "Lintels"]),
+    ("MEP Rough-in", ["Conduits", "Plumbing lines"]),
+    ("Plastering", ["Internal plaster", "External plaster"]),
+    ("Flooring", ["Tiling", "Skirting"]),
+    ("Finishes", ["Painting", "Doors & windows", "Fixtures"]),
+    ("Handover", ["Snagging", "Cleaning", "Inspection"]),
+]
+
+
+def parse_latency(spec):
+    """Build a sampler (seconds) from `fixed:S`, `uniform:A,B`, `normal:MEAN,SD` or `lognormal:MEDIAN,SIGMA`."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda: values[0] * random.lognormvariate(0.0, values[1])
+    raise ValueError(f"unknown latency distribution '{kind}'")
+
+
+def _schedule_entries(prompt):
+    # the engine asks for "exactly N entries"; mirror that when present
+    marker = "with exactly "
+    if marker in prompt:
+        try:
+            return int(prompt.split(marker, 1)[1].split()[0])
+        except ValueError:
+            pass
+    return 12
+
+
+def canned_response(payload, responses=None):
+    """Text for one generation, shaped by the requested schema."""
+    schema = payload.get("format")
+    props = schema.get("properties", {}) if isinstance(schema, dict) else {}
+    if "weeks" in props:
+        if responses and "schedule" in responses:
+            return responses["schedule"]
+        entries = _schedule_entries(payload.get("prompt", ""))
+        weeks = []
+        for i in range(entries):
+            phase, activities = CANNED_PHASES[i * len(CANNED_PHASES) // entries]
+            weeks.append({"week": i + 1, "phase": phase, "activities": activities})
+        return json.dumps({"weeks": weeks})
+    if responses and "insights" in responses:
+        return responses["insights"]
+    return json.dumps({"insights": CANNED_INSIGHTS})
+
+
+def _tokens(text, size=12):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class FakeOllama:
+    def __init__(self, models=("granite3.3:2b",), latency="fixed:0", error_rate=0.0, hang_rate=0.0,
+                 hang_seconds=60.0, drop_rate=0.0, responses=None, load_seconds=0.0):
+        self.models = list(models)
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.drop_rate = drop_rate
+        self.responses = responses
+        # one-off delay on the first generation, like loading the model into memory
+        self.load_seconds = load_seconds
+        self._loaded = threading.Event()
+        self._load_lock = threading.Lock()
+        self.requests = 0
+
+    def fault(self):
+        """Pick the injected fault for one request: None, "error", "hang" or "drop"."""
+        roll = random.random()
+        for name, rate in (("error", self.error_rate), ("hang", self.hang_rate), ("drop", self.drop_rate)):
+            if roll < rate:
+                return name
+            roll -= rate
+        return None
+
+    def load_model(self):
+        if self._loaded.is_set():
+            return 0.0
+        with self._load_lock:
+            if self._loaded.is_set():
+                return 0.0
+            time.sleep(self.load_seconds)
+            self._loaded.set()
+            return self.load_seconds
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._json(200, {"models": [{"name": m, "model": m} for m in fake.models]})
+                else:
+                    self._json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._json(400, {"error": "invalid JSON"})
+                if self.path != "/api/generate":
+                    return self._json(404, {"error": "not found"})
+                fake.requests += 1
+                if payload.get("model") not in fake.models:
+                    return self._json(404, {"error": f"model '{payload.get('model')}' not found"})
+
+                fault = fake.fault()
+                if fault == "error":
+                    return self._json(500, {"error": "injected failure"})
+                if fault == "hang":
+                    time.sleep(fake.hang_seconds)
+                if fault == "drop":
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    self.close_connection = True
+                    return
+
+                load = fake.load_model()
+                latency = fake.sample_latency()
+                text = canned_response(payload, fake.responses)
+                stats = {
+                    "done": True,
+                    "total_duration": int((load + latency) * 1e9),
+                    "load_duration": int(load * 1e9),
+                    "prompt_eval_count": len(payload.get("prompt", "")) // 4,
+                    "eval_count": max(1, len(text) // 4),
+                }
+                if not payload.get("stream", True):
+                    time.sleep(latency)
+                    return self._json(200, dict(stats, model=payload["model"], response=text))
+
+                tokens = _tokens(text)
+                delay = latency / max(1, len(tokens))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for token in tokens:
+                    time.sleep(delay)
+                    self._chunk({"model": payload["model"], "response": token, "done": False})
+                self._chunk(dict(stats, model=payload["model"], response=""))
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _chunk(self, obj):
+                data = (json.dumps(obj) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=11500):
+        server = ThreadingHTTPServer((host, port), self.handler())
+        server.daemon_threads = True
+        return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--model", action="append", dest="models", help="model name to serve (repeatable)")
+    parser.add_argument("--latency", default="lognormal:1.0,0.35", help="per-request latency distribution")
+    parser.add_argument("--load-seconds", type=float, default=0.0, help="delay on the first generation")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--responses", help='JSON file with canned {"insights": "...", "schedule": "..."} text')
+    args = parser.parse_args(argv)
+
+    responses = None
+    if args.responses:
+        with open(args.responses) as f:
+            responses = json.load(f)
+    fake = FakeOllama(models=args.models or ["granite3.3:2b"], latency=args.latency,
+                      error_rate=args.error_rate, hang_rate=args.hang_rate, hang_seconds=args.hang_seconds,
+                      drop_rate=args.drop_rate, responses=responses, load_seconds=args.load_seconds)
+    server = fake.serve(args.host, args.port)
+    print(f"Fake Ollama on http://{args.host}:{args.port} (models: {', '.join(fake.models)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
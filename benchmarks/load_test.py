@@ -0,0 +1,254 @@
+"""Open-loop load driver for `/api/calculate` and `/health`.
+
+    # against a running server
+    python benchmarks/load_test.py --url http://localhost:5000 --rate 20 --duration 60
+
+    # fully offline: start the fake Ollama and the app, then drive them
+    python benchmarks/load_test.py --spawn --rate 20 --duration 30 --fake-args="--latency lognormal:1.5,0.4 --error-rate 0.05"
+
+Requests are fired on a fixed (or `--poisson`) schedule regardless of how
+fast earlier ones return, and latency is measured from the scheduled send
+time, so a saturated server shows up as growing latency rather than a
+quietly lower request rate. Reports p50/p95/p99 latency, throughput, error
+count and AI fallback rate per endpoint; fallbacks are also read from the
+server's `/metrics` counters before and after the run.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+DEFAULT_PAYLOAD = {"built_up_area": 1200, "floors": "G+2"}
+FLOOR_CHOICES = ("G+0", "G+1", "G+2", "G+3", "G+5")
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def scrape_fallbacks(base_url):
+    """{(kind, reason): count} from the server's construction_ai_fallbacks_total counter."""
+    try:
+        text = requests.get(f"{base_url}/metrics", timeout=5).text
+    except requests.RequestException:
+        return {}
+    out = {}
+    for line in text.splitlines():
+        if not line.startswith("construction_ai_fallbacks_total{"):
+            continue
+        labels, value = line[len("construction_ai_fallbacks_total{"):].rsplit("} ", 1)
+        parts = dict(item.split("=", 1) for item in labels.split(","))
+        out[(parts["kind"].strip('"'), parts["reason"].strip('"'))] = float(value)
+    return out
+
+
+class LoadRun:
+    def __init__(self, base_url, rate, duration, health_ratio=0.1, unique=False, poisson=False,
+                 timeout=60.0, concurrency=256, payload=None):
+        self.base_url = base_url.rstrip("/")
+        self.rate = rate
+        self.duration = duration
+        self.health_ratio = health_ratio
+        self.unique = unique
+        self.poisson = poisson
+        self.timeout = timeout
+        self.payload = payload or DEFAULT_PAYLOAD
+        self.pool = ThreadPoolExecutor(max_workers=concurrency)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.samples = {"/api/calculate": [], "/health": []}
+        self.errors = {"/api/calculate": 0, "/health": 0}
+        self.insight_fallbacks = 0
+        self.budget_fallbacks = 0
+
+    def _session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _calculate_body(self):
+        if not self.unique:
+            return self.payload
+        # distinct inputs defeat the AI and blueprint caches
+        return dict(self.payload, built_up_area=random.randint(200, 8000), floors=random.choice(FLOOR_CHOICES))
+
+    def _fire(self, endpoint, scheduled):
+        ok = False
+        fallback = pending = False
+        try:
+            if endpoint == "/health":
+                response = self._session().get(self.base_url + endpoint, timeout=self.timeout)
+            else:
+                response = self._session().post(self.base_url + endpoint, json=self._calculate_body(),
+                                                timeout=self.timeout)
+            ok = response.status_code < 400
+            if ok and endpoint == "/api/calculate":
+                body = response.json()
+                fallback = isinstance(body.get("ai_insight"), str)
+                pending = bool(body.get("ai_pending"))
+        except requests.RequestException:
+            pass
+        latency = time.perf_counter() - scheduled
+        with self.lock:
+            if ok:
+                self.samples[endpoint].append(latency)
+                self.insight_fallbacks += fallback
+                self.budget_fallbacks += pending
+            else:
+                self.errors[endpoint] += 1
+
+    def run(self):
+        before = scrape_fallbacks(self.base_url)
+        start = time.perf_counter()
+        next_at = start
+        futures = []
+        while next_at < start + self.duration:
+            now = time.perf_counter()
+            if next_at > now:
+                time.sleep(next_at - now)
+            endpoint = "/health" if random.random() < self.health_ratio else "/api/calculate"
+            futures.append(self.pool.submit(self._fire, endpoint, next_at))
+            gap = random.expovariate(self.rate) if self.poisson else 1.0 / self.rate
+            next_at += gap
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        self.pool.shutdown()
+        after = scrape_fallbacks(self.base_url)
+        return self.report(elapsed, before, after)
+
+    def report(self, elapsed, before, after):
+        endpoints = {}
+        for endpoint, values in self.samples.items():
+            values = sorted(values)
+            sent = len(values) + self.errors[endpoint]
+            if not sent:
+                continue
+            endpoints[endpoint] = {
+                "requests": sent,
+                "errors": self.errors[endpoint],
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1) if values else 0.0,
+            }
+        ok_calcs = len(self.samples["/api/calculate"])
+        server_fallbacks = {f"{kind}:{reason}": after.get((kind, reason), 0) - before.get((kind, reason), 0)
+                            for kind, reason in after}
+        return {
+            "target_rps": self.rate,
+            "duration_s": round(elapsed, 2),
+            "endpoints": endpoints,
+            "fallback_rate": {
+                "insight": round(self.insight_fallbacks / ok_calcs, 4) if ok_calcs else 0.0,
+                "latency_budget": round(self.budget_fallbacks / ok_calcs, 4) if ok_calcs else 0.0,
+            },
+            "server_fallbacks": {k: v for k, v in server_fallbacks.items() if v},
+        }
+
+
+def print_report(report):
+    print(f"\nTarget {report['target_rps']} req/s for {report['duration_s']} s")
+    print(f"{'endpoint':<18} {'reqs':>6} {'errs':>5} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint, s in report["endpoints"].items():
+        print(f"{endpoint:<18} {s['requests']:>6} {s['errors']:>5} {s['throughput_rps']:>7} "
+              f"{s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9} {s['max_ms']:>9}")
+    rates = report["fallback_rate"]
+    print(f"\nInsight fallback rate: {rates['insight']:.1%} (latency budget: {rates['latency_budget']:.1%})")
+    for name, count in sorted(report["server_fallbacks"].items()):
+        print(f"  server fallbacks {name}: {int(count)}")
+
+
+def _wait_until_up(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def spawn(app_port, fake_port, fake_args, env_overrides):
+    """Start the fake Ollama and the app (threaded, no debug reloader) as subprocesses."""
+    fake = subprocess.Popen([sys.executable, os.path.join(HERE, "fake_ollama.py"), "--port", str(fake_port)]
+                            + fake_args, cwd=ROOT)
+    _wait_until_up(f"http://127.0.0.1:{fake_port}/api/tags")
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    env = dict(os.environ,
+               OLLAMA_API_URL=f"http://127.0.0.1:{fake_port}/api/generate",
+               AI_CACHE_PATH=os.path.join(workdir, "ai_cache.db"),
+               **env_overrides)
+    log_path = os.path.join(workdir, "app.log")
+    with open(log_path, "w") as log:
+        app = subprocess.Popen([sys.executable, "-c",
+                                f"import app; app.create_app().run(host='127.0.0.1', port={app_port}, threaded=True)"],
+                               cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    print(f"App log: {log_path}")
+    _wait_until_up(f"http://127.0.0.1:{app_port}/health")
+    return [app, fake]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--rate", type=float, default=10.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to generate load")
+    parser.add_argument("--health-ratio", type=float, default=0.1, help="fraction of requests sent to /health")
+    parser.add_argument("--unique", action="store_true", help="randomize inputs so every request misses the caches")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times instead of fixed")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--payload", help="JSON file with the /api/calculate body")
+    parser.add_argument("--json", dest="json_out", help="also write the report to this file")
+    parser.add_argument("--spawn", action="store_true", help="start fake_ollama.py and the app locally")
+    parser.add_argument("--app-port", type=int, default=5055)
+    parser.add_argument("--fake-port", type=int, default=11500)
+    parser.add_argument("--fake-args", default="", help="extra arguments for fake_ollama.py")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="environment for the spawned app, e.g. AI_LATENCY_BUDGET_MS=2000")
+    args = parser.parse_args(argv)
+
+    payload = None
+    if args.payload:
+        with open(args.payload) as f:
+            payload = json.load(f)
+
+    procs = []
+    url = args.url
+    if args.spawn:
+        env = dict(item.split("=", 1) for item in args.app_env)
+        procs = spawn(args.app_port, args.fake_port, args.fake_args.split(), env)
+        url = f"http://127.0.0.1:{args.app_port}"
+    try:
+        report = LoadRun(url, args.rate, args.duration, args.health_ratio, args.unique, args.poisson,
+                         args.timeout, payload=payload).run()
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+ENCODING = "columnar-1"
+FORMATS = ("plain", "columnar")
+
+_ROOM_NUMBERS = ("area_sq_ft", "x", "y", "w", "h")
+_OPENING_NUMBERS = ("x", "y", "w", "h")
+
+
+def _opening_table():
+    table = {key: [] for key in _OPENING_NUMBERS}
+    table["orientation"] = []
+    return table
+
+
+def encode_columnar(blueprint):
+    """Compact wire form of a `blueprint_gen` layout list.
+
+    The plain blueprint repeats every key for every room, door and window;
+    here each field is one array, and repeated strings (floor and room names,
+    dimensions, orientations) are indexes into a shared `strings` table:
+
+        {"encoding": "columnar-1",
+         "strings": ["Ground Floor", "Office", "10' x 12'", "top", ...],
+         "floors":  {"floor": [0, ...], "canvas_w": [...], "canvas_h": [...],
+                     "svg": [...], "rooms": [<room count>, ...]},
+         "rooms":   {"name": [1, ...], "area_sq_ft": [...], "dims": [2, ...],
+                     "x": [...], "y": [...], "w": [...], "h": [...],
+                     "doors": [<door count>, ...], "windows": [<window count>, ...]},
+         "doors":   {"x": [...], "y": [...], "w": [...], "h": [...], "orientation": [3, ...]},
+         "windows": {... as doors ...}}
+
+    Rows are in document order: a floor's rooms are the next `rooms[i]` rows
+    of the room table, and likewise for doors and windows. `decode_columnar`
+    (and `decodeBlueprint` in script.js) rebuild the plain list.
+    """
+    strings, index = [], {}
+
+    def ref(value):
+        i = index.get(value)
+        if i is None:
+            i = index[value] = len(strings)
+            strings.append(value)
+        return i
+
+    floors = {"floor": [], "canvas_w": [], "canvas_h": [], "svg": [], "rooms": []}
+    rooms = {"name": [], "dims": [], "doors": [], "windows": []}
+    rooms.update((key, []) for key in _ROOM_NUMBERS)
+    openings = {"doors": _opening_table(), "windows": _opening_table()}
+
+    for floor in blueprint or ():
+        canvas = floor.get("canvas") or {}
+        floor_rooms = floor.get("rooms") or ()
+        floors["floor"].append(ref(floor.get("floor", "")))
+        floors["canvas_w"].append(canvas.get("w"))
+        floors["canvas_h"].append(canvas.get("h"))
+        floors["svg"].append(floor.get("svg"))
+        floors["rooms"].append(len(floor_rooms))
+        for room in floor_rooms:
+            rooms["name"].append(ref(room.get("name", "")))
+            rooms["dims"].append(ref(room.get("dims", "")))
+            for key in _ROOM_NUMBERS:
+                rooms[key].append(room.get(key))
+            for kind, table in openings.items():
+                items = room.get(kind) or ()
+                rooms[kind].append(len(items))
+                for item in items:
+                    for key in _OPENING_NUMBERS:
+                        table[key].append(item[key])
+                    table["orientation"].append(ref(item.get("orientation", "")))
+
+    return {"encoding": ENCODING, "strings": strings, "floors": floors, "rooms": rooms,
+            "doors": openings["doors"], "windows": openings["windows"]}
+
+
+def decode_columnar(encoded):
+    """Plain blueprint list from `encode_columnar` output."""
+    strings = encoded["strings"]
+    floors, rooms = encoded["floors"], encoded["rooms"]
+    cursor = {"rooms": 0, "doors": 0, "windows": 0}
+
+    def openings(kind, count):
+        table, start = encoded[kind], cursor[kind]
+        cursor[kind] = start + count
+        return [dict({key: table[key][i] for key in _OPENING_NUMBERS},
+                     orientation=strings[table["orientation"][i]]) for i in range(start, start + count)]
+
+    blueprint = []
+    for f, count in enumerate(floors["rooms"]):
+        floor_rooms = []
+        for r in range(cursor["rooms"], cursor["rooms"] + count):
+            room = {"name": strings[rooms["name"][r]], "area_sq_ft": rooms["area_sq_ft"][r],
+                    "dims": strings[rooms["dims"][r]]}
+            room.update((key, rooms[key][r]) for key in _OPENING_NUMBERS)
+            room["doors"] = openings("doors", rooms["doors"][r])
+            room["windows"] = openings("windows", rooms["windows"][r])
+            floor_rooms.append(room)
+        cursor["rooms"] += count
+        floor = {"floor": strings[floors["floor"][f]],
+                 "canvas": {"w": floors["canvas_w"][f], "h": floors["canvas_h"][f]},
+                 "rooms": floor_rooms}
+        if floors["svg"][f] is not None:
+            floor["svg"] = floors["svg"][f]
+        blueprint.append(floor)
+    return blueprint
+
+
+def encode_blueprint(blueprint, fmt=None):
+    """`blueprint` in the requested wire format ("plain" -- the default -- or "columnar")."""
+    if fmt in (None, "", "plain"):
+        return blueprint
+    if fmt == "columnar":
+        return encode_columnar(blueprint)
+    raise ValueError(f"unknown blueprint_format '{fmt}'; use one of {', '.join(FORMATS)}")
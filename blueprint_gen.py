@@ -1,4 +1,211 @@
-def generate_floor_layouts(area_sq_ft, floors=1, single_image=True, room_options=None):
+import json
+import math
+from bisect import bisect_right
+from collections import defaultdict
+from functools import lru_cache
+
+# canvas sizing for front-end SVG rendering (px)
+CANVAS_W = 760
+CANVAS_H = 460
+MARGIN = 12
+
+# Layouts are memoized on the exact input area. Room areas, dims and pixel
+# edges are all rounded from it, and any coarser key moves some of them
+# across a rounding boundary, so there is no quantum that leaves the drawing
+# unchanged; repeated inputs (the common case) still hit.
+LAYOUT_CACHE_SIZE = 256
+ROOM_PROFILE_CACHE_SIZE = 512
+# Part of the shared (cross-process) cache key; bump when layout output changes
+LAYOUT_VERSION = 4
+
+# room-program layouts (office / hostel floor plates)
+MAX_PROGRAM_ROOMS = 2000
+MAX_CANVAS_SCALE = 4.0
+
+# multi-floor layouts: stair core strip width (ft) and when to pack floors in
+# parallel (process start-up and pickling only pay off for big programs)
+STAIR_CORE_WIDTH_FT = (8.0, 12.0)
+PARALLEL_MIN_ROOMS = 4000
+
+# room programs by total floor area (coarse grouping)
+SMALL_ROOMS = ("Living Room", "Bedroom", "Kitchen", "Bathroom")
+MEDIUM_ROOMS = ("Living Room", "Master Bedroom", "Bedroom 2", "Kitchen", "Dining Area", "Bathroom 1")
+LARGE_ROOMS = ("Living Room", "Master Bedroom", "Bedroom 2", "Bedroom 3", "Kitchen", "Dining Room", "Guest Room", "Bathroom 1")
+ROOM_SETS = (SMALL_ROOMS, MEDIUM_ROOMS, LARGE_ROOMS)
+
+# room area weightings (higher -> larger share of floor area)
+WEIGHT_MAP = {
+    "living": 1.6,
+    "master": 1.4,
+    "bedroom": 1.0,
+    "kitchen": 1.0,
+    "dining": 0.9,
+    "bathroom": 0.4,
+    "guest": 0.9,
+    "study": 0.8,
+    "lobby": 3.0,
+    "reception": 2.0,
+    "conference": 2.0,
+    "meeting": 1.5,
+    "dorm": 1.2,
+    "pantry": 0.8,
+    "cabin": 0.7,
+    "store": 0.5,
+    "toilet": 0.4,
+}
+
+# aspect ratio (width / height) typical per room keyword: (min, max)
+ASPECT_MAP = {
+    "living": (1.4, 1.8),
+    "master": (1.2, 1.6),
+    "bedroom": (1.0, 1.4),
+    "kitchen": (1.0, 1.6),
+    "dining": (1.2, 1.6),
+    "bathroom": (1.0, 1.2),
+    "guest": (1.0, 1.4),
+    "study": (1.0, 1.4),
+}
+
+# room keywords that get windows by default
+WINDOWED_KEYWORDS = ("living", "bedroom", "kitchen", "dining", "master", "guest",
+                     "office", "cabin", "meeting", "conference", "dorm", "reception", "lobby")
+
+
+def room_set_index(area_per_floor):
+    """Index into ROOM_SETS of the default rooms for a floor of this area (sq ft)."""
+    if area_per_floor < 1000:
+        return 0
+    if area_per_floor < 2500:
+        return 1
+    return 2
+
+
+def _room_profile(name):
+    """Resolve (weight, aspect, has_default_windows) for a room name by keyword."""
+    key = name.lower()
+    weight = 1.0
+    for k, w in WEIGHT_MAP.items():
+        if k in key:
+            weight = w
+            break
+    # pick middle of the aspect range for deterministic layout
+    ar_min, ar_max = (1.0, 1.3)
+    for k, (mn, mx) in ASPECT_MAP.items():
+        if k in key:
+            ar_min, ar_max = mn, mx
+            break
+    windowed = any(k in key for k in WINDOWED_KEYWORDS)
+    return weight, (ar_min + ar_max) / 2.0, windowed
+
+
+@lru_cache(maxsize=ROOM_PROFILE_CACHE_SIZE)
+def _cached_profile(room_type):
+    return _room_profile(room_type)
+
+
+def room_profile(name):
+    """`_room_profile` memoized on the lower-cased room type; room programs
+    name their own types, so the memo is bounded."""
+    return _cached_profile(name.lower())
+
+
+def _door_at(side, x, y, w, h, door_w_px, door_h_px):
+    if side == 'top':
+        return {"x": int(x + (w - door_w_px) / 2), "y": int(y - 1), "w": door_w_px, "h": 4, "orientation": "top"}
+    if side == 'bottom':
+        return {"x": int(x + (w - door_w_px) / 2), "y": int(y + h - 1), "w": door_w_px, "h": 4, "orientation": "bottom"}
+    if side == 'left':
+        return {"x": int(x - 1), "y": int(y + (h - door_h_px) / 2), "w": 4, "h": door_h_px, "orientation": "left"}
+    return {"x": int(x + w - 1), "y": int(y + (h - door_h_px) / 2), "w": 4, "h": door_h_px, "orientation": "right"}
+
+
+def _windows_on(win_side, num_windows, x, y, w, h, window_w_px, window_h_px):
+    windows = []
+    for wi in range(num_windows):
+        if num_windows == 1:
+            wx = x + int((w - window_w_px) / 2)
+        else:
+            spacing = max(4, (w - (num_windows * window_w_px)) // (num_windows + 1))
+            wx = x + spacing * (wi + 1) + window_w_px * wi
+        if win_side == 'top':
+            wy = y - 1
+        elif win_side == 'bottom':
+            wy = y + h - window_h_px
+        elif win_side == 'left':
+            wx = x - 1
+            wy = y + int((h - window_h_px) / 2)
+        else:
+            wx = x + w - window_w_px
+            wy = y + int((h - window_h_px) / 2)
+        windows.append({"x": int(wx), "y": int(wy), "w": window_w_px, "h": window_h_px, "orientation": win_side})
+    return windows
+
+
+def _match_options(room_options, lowkey):
+    # allow room_options override per room (match by substring key, first match wins)
+    for k, v in room_options:
+        if k in lowkey:
+            return v
+    return {}
+
+
+def _options_key(room_options):
+    """Normalize `room_options` into a hashable cache key (keeps match order)."""
+    if not isinstance(room_options, dict) or not room_options:
+        return ""
+    return json.dumps([[str(k).lower(), v] for k, v in room_options.items()], sort_keys=True, default=str)
+
+
+def _program_key(room_program):
+    """Normalize a room program ({type: count} or [[type, count], ...]) into a cache key."""
+    if not room_program:
+        return ""
+    items = room_program.items() if isinstance(room_program, dict) else room_program
+    program = []
+    total = 0
+    for room_type, count in items:
+        count = int(count)
+        if count < 0:
+            raise ValueError(f"room count for '{room_type}' must not be negative")
+        if count:
+            program.append([str(room_type).strip().title(), count])
+            total += count
+    if total > MAX_PROGRAM_ROOMS:
+        raise ValueError(f"room program has {total} rooms per floor; limit is {MAX_PROGRAM_ROOMS}")
+    return json.dumps(program) if program else ""
+
+
+def _floor_programs_key(floor_programs, floors, default_key):
+    """Resolve per-floor programs into one program key per floor.
+
+    `floor_programs` is a list indexed by floor (None = default) or a dict
+    whose keys are floor indexes or inclusive ranges such as "1-19"; a key
+    outside 0..floors-1 or an inverted range raises ValueError.
+    """
+    keys = [default_key] * floors
+    if isinstance(floor_programs, dict):
+        for spec, program in floor_programs.items():
+            lo, _, hi = str(spec).partition('-')
+            try:
+                lo, hi = int(lo), int(hi or lo)
+            except ValueError:
+                raise ValueError(f"floor_programs key '{spec}' is not a floor or a range like '1-19'") from None
+            if lo > hi:
+                raise ValueError(f"floor_programs range '{spec}' is inverted")
+            if not 0 <= lo <= hi < floors:
+                raise ValueError(f"floor_programs key '{spec}' is outside floors 0-{floors - 1}")
+            program_key = _program_key(program) or default_key
+            for i in range(lo, hi + 1):
+                keys[i] = program_key
+    elif isinstance(floor_programs, (list, tuple)):
+        for i, program in enumerate(floor_programs[:floors]):
+            if program:
+                keys[i] = _program_key(program)
+    return json.dumps(keys)
+
+
+def generate_floor_layouts(area_sq_ft, floors=1, single_image=True, room_options=None, room_program=None,
+                           floor_programs=None, stair_core=None):
     """Return a list of floor layouts for given area (sq ft) and floor count.
 
     Output format: [{"floor": "Ground Floor", "canvas": {"w":..,"h":..}, "rooms": [{name,area_sq_ft,dims,x,y,w,h}, ...]}, ...]
@@ -7,249 +214,571 @@ def generate_floor_layouts(area_sq_ft, floors=1, single_image=True, room_options
     aspect ratio per room type, computes width/height in feet and converts
     to pixels using a floor-level pixels-per-foot scale, then packs rooms
     into rows (greedy) to create a clean blueprint-like layout.
+
+    Passing `room_program` (room type -> count, e.g. {"office": 240,
+    "meeting": 12, "toilet": 8}) switches to the large-floor-plate engine
+    in `_build_program_layouts`. With `single_image=False` every floor is
+    returned; `floor_programs` overrides the program per floor and
+    `stair_core` (default: on for multi-floor program layouts) reserves the
+    same stair strip on every floor.
+
+    Results are memoized on the normalized inputs (exact area); callers get
+    their own copy and may mutate it.
     """
-    import math
+    area_sq_ft = float(area_sq_ft)
+    if not (math.isfinite(area_sq_ft) and area_sq_ft > 0):
+        raise ValueError("built-up area must be a positive number")
+    floors = max(1, int(floors))
+    single_image = bool(single_image)
+    program_key = _program_key(room_program)
+    floors_key = ""
+    if floor_programs or (stair_core and not single_image):
+        floors_key = _floor_programs_key(floor_programs, floors, program_key)
+    if stair_core is None:
+        stair_core = not single_image and floors > 1 and bool(program_key or floors_key)
+    room_set = room_set_index(area_sq_ft / floors)
+    layout = _cached_layouts(area_sq_ft, floors, single_image, _options_key(room_options),
+                             program_key, floors_key, bool(stair_core), room_set)
+    return _copy_layout(layout)
 
-    # choose rooms based on total floor area (coarse grouping)
-    area_per_floor = area_sq_ft / max(1, floors)
-    if area_per_floor < 1000:
-        rooms = ["Living Room", "Bedroom", "Kitchen", "Bathroom"]
-    elif area_per_floor < 2500:
-        rooms = ["Living Room", "Master Bedroom", "Bedroom 2", "Kitchen", "Dining Area", "Bathroom 1"]
+
+def _copy_rooms(rooms):
+    # structure-aware copy; several times cheaper than copy.deepcopy
+    return [dict(r, doors=[dict(d) for d in r["doors"]], windows=[dict(w) for w in r["windows"]]) for r in rooms]
+
+
+def _copy_layout(layout):
+    return [dict(f, canvas=dict(f["canvas"]), rooms=_copy_rooms(f["rooms"])) for f in layout]
+
+
+def layout_cache_info():
+    return _cached_layouts.cache_info()
+
+
+def geometry_cache_info():
+    return _cached_geometry.cache_info()
+
+
+def clear_layout_cache():
+    """Drop this process's memoized layouts (the shared cache is left alone)."""
+    _cached_layouts.cache_clear()
+    _cached_geometry.cache_clear()
+
+
+_SHARED_CACHE = None
+
+
+def set_shared_cache(cache):
+    """Back the per-process layout memo with a cache shared between workers.
+
+    `cache` is an `ai_cache.ResponseCache` (or anything with get/set); a
+    layout built by one worker is then read, not rebuilt, by the others.
+    Pass None to go back to per-process memoization only.
+    """
+    global _SHARED_CACHE
+    _SHARED_CACHE = cache
+    clear_layout_cache()
+
+
+# Layouts are built in two steps: geometry (room rectangles plus each room's
+# default door and windows) depends only on area, floors and programs and is
+# the expensive part; decoration applies `room_options` on top and is cheap.
+# Each step has its own cache, so editing room options reuses the geometry
+# and only redoes doors and windows.
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _cached_layouts(area_sq_ft, floors, single_image, options_key, program_key="", floors_key="", stair_core=False,
+                    room_set=None):
+    room_options = [(k, v) for k, v in json.loads(options_key)] if options_key else []
+    geometry = _cached_geometry(area_sq_ft, floors, single_image, program_key, floors_key, stair_core, room_set)
+    return _decorate(geometry, room_options)
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _cached_geometry(area_sq_ft, floors, single_image, program_key="", floors_key="", stair_core=False,
+                     room_set=None):
+    if room_set is None:
+        room_set = room_set_index(area_sq_ft / max(1, floors))
+    shared = _SHARED_CACHE
+    if shared is not None:
+        key = json.dumps([LAYOUT_VERSION, area_sq_ft, floors, single_image, program_key, floors_key, stair_core,
+                          room_set], separators=(",", ":"))
+        geometry = shared.get(key)
+        if geometry is not None:
+            return geometry
+    if program_key or floors_key or stair_core:
+        keys = json.loads(floors_key) if floors_key else [program_key] * floors
+        geometry = _build_program_layouts(area_sq_ft, floors, single_image, keys, stair_core, room_set)
     else:
-        rooms = ["Living Room", "Master Bedroom", "Bedroom 2", "Bedroom 3", "Kitchen", "Dining Room", "Guest Room", "Bathroom 1"]
+        geometry = _build_layouts(area_sq_ft, floors, single_image, room_set)
+    if shared is not None:
+        shared.set(key, geometry)
+    return geometry
+
+
+# second door goes on the opposite wall; the row packer has always put it on
+# the right for top/left doors
+_OPPOSITE = {'bottom': 'top', 'top': 'bottom', 'right': 'left', 'left': 'right'}
+_ROW_OPPOSITE = {'bottom': 'top', 'top': 'right', 'right': 'left', 'left': 'right'}
+
+
+def _decorate_rooms(rooms, room_options, engine, fixtures):
+    """Doors and windows for one floor's geometry under `room_options`."""
+    door_w_px, door_h_px, window_w_px, window_h_px = fixtures
+    rows = engine == "rows"
+    out = []
+    for g in rooms:
+        x, y, w, h = g["x"], g["y"], g["w"], g["h"]
+        matched_opts = _match_options(room_options, g["name"].lower())
+        has_opts = isinstance(matched_opts, dict)
+
+        # door: override side if given, else the geometry's default placement
+        door_side = matched_opts.get('door_side') if has_opts else None
+        doors_count = int(matched_opts.get('doors', 1)) if has_opts and 'doors' in matched_opts else 1
+        doors = []
+        if door_side:
+            doors.append(_door_at(door_side, x, y, w, h, door_w_px, door_h_px))
+        elif doors_count > 0 or rows:
+            doors.append(dict(g["door"]))
+        if doors_count > 1 and doors:
+            opp = (_ROW_OPPOSITE if rows else _OPPOSITE)[doors[0]['orientation']]
+            doors.append(_door_at(opp, x, y, w, h, door_w_px, door_h_px))
 
+        if has_opts and 'windows' in matched_opts:
+            num_windows = int(matched_opts.get('windows', 0))
+            win_side = matched_opts.get('window_side', 'top')
+        else:
+            num_windows, win_side = g["default_windows"]
+
+        out.append({
+            "name": g["name"],
+            "area_sq_ft": g["area_sq_ft"],
+            "dims": g["dims"],
+            "x": x,
+            "y": y,
+            "w": w,
+            "h": h,
+            "doors": doors,
+            "windows": _windows_on(win_side, num_windows, x, y, w, h, window_w_px, window_h_px)
+        })
+    return out
+
+
+def _decorate(geometry, room_options):
+    """Turn cached geometry into the public layout format for `room_options`.
+
+    Floors that share a plan are decorated once and copied.
+    """
+    plans = [_decorate_rooms(plan, room_options, geometry["engine"], geometry["fixtures"])
+             for plan in geometry["plans"]]
     layout = []
+    used = set()
+    for f in geometry["floors"]:
+        i = f["plan"]
+        layout.append({"floor": f["floor"], "canvas": dict(f["canvas"]),
+                       "rooms": plans[i] if i not in used else _copy_rooms(plans[i])})
+        used.add(i)
+    return layout
 
-    # canvas sizing for front-end SVG rendering (px)
-    canvas_w = 760
-    canvas_h = 460
-    margin = 12
-
-    # room area weightings (higher -> larger share of floor area)
-    weight_map = {
-        "living": 1.6,
-        "master": 1.4,
-        "bedroom": 1.0,
-        "kitchen": 1.0,
-        "dining": 0.9,
-        "bathroom": 0.4,
-        "guest": 0.9,
-        "study": 0.8,
-    }
 
-    # aspect ratio (width / height) typical per room keyword: (min, max)
-    aspect_map = {
-        "living": (1.4, 1.8),
-        "master": (1.2, 1.6),
-        "bedroom": (1.0, 1.4),
-        "kitchen": (1.0, 1.6),
-        "dining": (1.2, 1.6),
-        "bathroom": (1.0, 1.2),
-        "guest": (1.0, 1.4),
-        "study": (1.0, 1.4),
-    }
+def _build_layouts(area_sq_ft, floors, single_image, room_set=None):
+    area_per_floor = area_sq_ft / max(1, floors)
+    rooms = ROOM_SETS[room_set_index(area_per_floor) if room_set is None else room_set]
+
+    canvas_w, canvas_h, margin = CANVAS_W, CANVAS_H, MARGIN
 
     # if single_image is requested, only generate the first floor (ground floor)
     effective_floors = 1 if single_image else max(1, floors)
 
-    for i in range(effective_floors):
-        floor_name = "Ground Floor" if i == 0 else f"Floor {i}"
-        n = len(rooms)
-        # compute weights
-        weights = []
-        for name in rooms:
-            key = name.lower()
-            matched = 1.0
-            for k, w in weight_map.items():
-                if k in key:
-                    matched = w
-                    break
-            weights.append(matched)
-
-        total_weight = sum(weights) or n
-        # allocate area per room proportional to weight
-        area_per_floor = area_sq_ft / max(1, floors)
-        room_areas = [area_per_floor * (w / total_weight) for w in weights]
-
-        # approximate overall floor footprint in feet (choose a comfortable aspect)
-        floor_aspect = 1.4  # width / height
-        floor_w_ft = math.sqrt(area_per_floor * floor_aspect)
-        floor_h_ft = area_per_floor / floor_w_ft
-
-        # compute pixels-per-foot so footprint fits into canvas with margins
-        avail_w = canvas_w - margin * 2
-        avail_h = canvas_h - margin * 2
-        if floor_w_ft <= 0 or floor_h_ft <= 0:
-            ppf = 1.0
-        else:
-            ppf = min(avail_w / floor_w_ft, avail_h / floor_h_ft)
-
-        # build room descriptors with real-world dims (ft) and pixel dims
-        room_rects = []
-        for name, a in zip(rooms, room_areas):
-            key = name.lower()
-            # find aspect range
-            ar_min, ar_max = (1.0, 1.3)
-            for k, (mn, mx) in aspect_map.items():
-                if k in key:
-                    ar_min, ar_max = mn, mx
-                    break
-            # pick middle of range for deterministic layout
-            aspect = (ar_min + ar_max) / 2.0
-
-            # width_ft * height_ft = area, width/height = aspect => width = sqrt(area * aspect)
-            width_ft = math.sqrt(max(1.0, a) * aspect)
-            height_ft = max(1.0, a) / width_ft
-
-            w_px = max(12, int(round(width_ft * ppf)))
-            h_px = max(12, int(round(height_ft * ppf)))
-
-            room_rects.append({
+    # every floor shares the same program, so lay it out once and reuse it
+    n = len(rooms)
+    profiles = [room_profile(name) for name in rooms]
+    weights = [p[0] for p in profiles]
+
+    total_weight = sum(weights) or n
+    # allocate area per room proportional to weight
+    room_areas = [area_per_floor * (w / total_weight) for w in weights]
+
+    # approximate overall floor footprint in feet (choose a comfortable aspect)
+    floor_aspect = 1.4  # width / height
+    floor_w_ft = math.sqrt(area_per_floor * floor_aspect)
+    floor_h_ft = area_per_floor / floor_w_ft
+
+    # compute pixels-per-foot so footprint fits into canvas with margins
+    avail_w = canvas_w - margin * 2
+    avail_h = canvas_h - margin * 2
+    if floor_w_ft <= 0 or floor_h_ft <= 0:
+        ppf = 1.0
+    else:
+        ppf = min(avail_w / floor_w_ft, avail_h / floor_h_ft)
+
+    # build room descriptors with real-world dims (ft) and pixel dims
+    room_rects = []
+    for name, a, (_, aspect, windowed) in zip(rooms, room_areas, profiles):
+        # width_ft * height_ft = area, width/height = aspect => width = sqrt(area * aspect)
+        width_ft = math.sqrt(max(1.0, a) * aspect)
+        height_ft = max(1.0, a) / width_ft
+
+        w_px = max(12, int(round(width_ft * ppf)))
+        h_px = max(12, int(round(height_ft * ppf)))
+
+        room_rects.append({
+            "name": name,
+            "area_sq_ft": round(a, 1),
+            "width_ft": round(width_ft, 1),
+            "height_ft": round(height_ft, 1),
+            "w_px": w_px,
+            "h_px": h_px,
+            "windowed": windowed,
+        })
+
+    # pack rooms into rows (simple greedy packing)
+    rows = []
+    current_row = {"width": 0, "height": 0, "rooms": []}
+    max_floor_w_px = int(round(floor_w_ft * ppf))
+    if max_floor_w_px < 40:
+        max_floor_w_px = avail_w
+
+    for r in room_rects:
+        if current_row["rooms"] and (current_row["width"] + r["w_px"] + 8) > max_floor_w_px:
+            rows.append(current_row)
+            current_row = {"width": 0, "height": 0, "rooms": []}
+        # add room to current row
+        current_row["rooms"].append(r)
+        current_row["width"] += r["w_px"] + 8
+        current_row["height"] = max(current_row["height"], r["h_px"])
+
+    if current_row["rooms"]:
+        rows.append(current_row)
+
+    # compute total used height and possible vertical scaling if overflow
+    total_rows_h = sum(row["height"] for row in rows) + (len(rows) - 1) * 8
+    if total_rows_h > avail_h and total_rows_h > 0:
+        v_scale = (avail_h / total_rows_h)
+    else:
+        v_scale = 1.0
+
+    # door/window sizes depend only on the floor scale
+    door_w_px = max(12, int(round(3 * ppf)))
+    door_h_px = max(8, int(round(7 * ppf)))
+    window_w_px = max(12, int(round(4 * ppf)))
+    window_h_px = max(8, int(round(3 * ppf)))
+
+    # emit room boxes with positions
+    room_boxes = []
+    y_cursor = margin
+    for row in rows:
+        row_h = int(round(row["height"] * v_scale))
+        # compute row content width to center the row
+        row_content_width = sum(r["w_px"] + 8 for r in row["rooms"]) - 8
+        x_cursor = margin + max(0, (avail_w - row_content_width) // 2)
+        for r in row["rooms"]:
+            w = r["w_px"]
+            h = int(round(r["h_px"] * v_scale))
+            name = r["name"]
+            dims = f"{int(round(r['width_ft']))}' x {int(round(r['height_ft']))}'"
+
+            room_boxes.append({
                 "name": name,
-                "area_sq_ft": round(a, 1),
-                "width_ft": round(width_ft, 1),
-                "height_ft": round(height_ft, 1),
-                "w_px": w_px,
-                "h_px": h_px,
+                "area_sq_ft": r["area_sq_ft"],
+                "dims": dims,
+                "x": int(x_cursor),
+                "y": int(y_cursor),
+                "w": w,
+                "h": h,
+                # default door on the shorter wall centre; windows on top for main room types
+                "door": _door_at('bottom' if w >= h else 'right', x_cursor, y_cursor, w, h, door_w_px, door_h_px),
+                "default_windows": [(2 if w > 220 else 1) if r["windowed"] else 0, 'top']
             })
+            x_cursor += w + 8
+        y_cursor += row_h + 8
 
-        # pack rooms into rows (simple greedy packing)
-        rows = []
-        current_row = {"width": 0, "height": 0, "rooms": []}
-        max_floor_w_px = int(round(floor_w_ft * ppf))
-        if max_floor_w_px < 40:
-            max_floor_w_px = avail_w
-
-        for r in room_rects:
-            if current_row["rooms"] and (current_row["width"] + r["w_px"] + 8) > max_floor_w_px:
-                rows.append(current_row)
-                current_row = {"width": 0, "height": 0, "rooms": []}
-            # add room to current row
-            x_in_row = current_row["width"]
-            current_row["rooms"].append((r, x_in_row))
-            current_row["width"] += r["w_px"] + 8
-            current_row["height"] = max(current_row["height"], r["h_px"])
-
-        if current_row["rooms"]:
-            rows.append(current_row)
+    return {
+        "engine": "rows",
+        "fixtures": [door_w_px, door_h_px, window_w_px, window_h_px],
+        "plans": [room_boxes],
+        "floors": [{"floor": "Ground Floor" if i == 0 else f"Floor {i}", "canvas": {"w": canvas_w, "h": canvas_h},
+                    "plan": 0} for i in range(effective_floors)],
+    }
+
+
+# ---------------- room-program layouts (large floor plates) ----------------
 
-        # compute total used height and possible vertical scaling if overflow
-        total_rows_h = sum(row["height"] for row in rows) + (len(rows) - 1) * 8
-        if total_rows_h > avail_h and total_rows_h > 0:
-            v_scale = (avail_h / total_rows_h)
+def _squarify(areas, x, y, w, h):
+    """Tile the rectangle (x, y, w, h) with `areas` using the squarified treemap.
+
+    `areas` must be sorted descending and sum to w * h. Rooms are laid out in
+    strips along the shorter side, growing a strip while it improves the worst
+    aspect ratio. Linear after the sort; returns (x, y, w, h) per area.
+    """
+    rects = []
+    i, n = 0, len(areas)
+    while i < n:
+        short = min(w, h)
+        if short <= 0:
+            rects.extend((x, y, 0.0, 0.0) for _ in range(n - i))
+            break
+        s2 = short * short
+        row_sum = areas[i]
+        worst = max(s2 / row_sum, row_sum / s2)
+        j = i + 1
+        while j < n:
+            new_sum = row_sum + areas[j]
+            # the strip's largest area is areas[i], its smallest areas[j]
+            new_worst = max(s2 * areas[i] / (new_sum * new_sum), new_sum * new_sum / (s2 * areas[j]))
+            if new_worst > worst:
+                break
+            row_sum, worst = new_sum, new_worst
+            j += 1
+        thickness = row_sum / short
+        if w >= h:
+            cy = y
+            for a in areas[i:j]:
+                rects.append((x, cy, thickness, a / thickness))
+                cy += a / thickness
+            x += thickness
+            w -= thickness
         else:
-            v_scale = 1.0
-
-        # emit room boxes with positions
-        room_boxes = []
-        y_cursor = margin
-        for row in rows:
-            row_h = int(round(row["height"] * v_scale))
-            x_cursor = margin
-            for r, x_offset in row["rooms"]:
-                w = int(round(r["w_px"]))
-                h = int(round(r["h_px"] * v_scale))
-                # if the row width fits in the available width center it
-                # compute row content width to center the row
-            # compute row content width to support centering
-            row_content_width = sum(int(round(rr[0]["w_px"])) + 8 for rr in row["rooms"]) - 8
-            row_x_start = margin + max(0, (avail_w - row_content_width) // 2)
-            x_cursor = row_x_start
-            for r, x_offset in row["rooms"]:
-                w = int(round(r["w_px"]))
-                h = int(round(r["h_px"] * v_scale))
-                name = r["name"]
-                width_ft = r["width_ft"]
-                height_ft = r["height_ft"]
-                dims = f"{int(round(width_ft))}' x {int(round(height_ft))}'"
-
-                # allow room_options override per room (match by substring key)
-                lowkey = name.lower()
-                matched_opts = {}
-                if isinstance(room_options, dict):
-                    for k, v in room_options.items():
-                        if k.lower() in lowkey:
-                            matched_opts = v
-                            break
-
-                # compute door placement: default on shorter wall center unless overridden
-                door_w_px = max(12, int(round(3 * ppf)))
-                door_h_px = max(8, int(round(7 * ppf)))
-                door_side = matched_opts.get('door_side') if isinstance(matched_opts, dict) else None
-                doors_count = int(matched_opts.get('doors', 1)) if isinstance(matched_opts, dict) and 'doors' in matched_opts else 1
-
-                doors = []
-                def add_door_at(side):
-                    if side == 'top':
-                        return {"x": int(x_cursor + (w - door_w_px) / 2), "y": int(y_cursor - 1), "w": door_w_px, "h": 4, "orientation": "top"}
-                    if side == 'bottom':
-                        return {"x": int(x_cursor + (w - door_w_px) / 2), "y": int(y_cursor + h - 1), "w": door_w_px, "h": 4, "orientation": "bottom"}
-                    if side == 'left':
-                        return {"x": int(x_cursor - 1), "y": int(y_cursor + (h - door_h_px) / 2), "w": 4, "h": door_h_px, "orientation": "left"}
-                    return {"x": int(x_cursor + w - 1), "y": int(y_cursor + (h - door_h_px) / 2), "w": 4, "h": door_h_px, "orientation": "right"}
-
-                if door_side:
-                    doors.append(add_door_at(door_side))
-                else:
-                    # default heuristic
-                    if w >= h:
-                        doors.append(add_door_at('bottom'))
-                    else:
-                        doors.append(add_door_at('right'))
-                # additional doors if requested
-                if doors_count > 1:
-                    # place extra door on opposite side
-                    opp = 'top' if doors[0]['orientation'] == 'bottom' else 'left' if doors[0]['orientation'] == 'right' else 'right'
-                    doors.append(add_door_at(opp))
-
-                # windows: decide from matched_opts or defaults for main room types
-                window_w_px = max(12, int(round(4 * ppf)))
-                window_h_px = max(8, int(round(3 * ppf)))
-                windows = []
-                if isinstance(matched_opts, dict) and 'windows' in matched_opts:
-                    num_windows = int(matched_opts.get('windows', 0))
-                    win_side = matched_opts.get('window_side', 'top')
-                else:
-                    if any(k in lowkey for k in ("living", "bedroom", "kitchen", "dining", "master", "guest")):
-                        num_windows = 2 if w > 220 else 1
-                        win_side = 'top'
-                    else:
-                        num_windows = 0
-                        win_side = 'top'
-
-                for wi in range(num_windows):
-                    if num_windows == 1:
-                        wx = x_cursor + int((w - window_w_px) / 2)
-                    else:
-                        spacing = max(4, (w - (num_windows * window_w_px)) // (num_windows + 1))
-                        wx = x_cursor + spacing * (wi + 1) + window_w_px * wi
-                    if win_side == 'top':
-                        wy = y_cursor - 1
-                    elif win_side == 'bottom':
-                        wy = y_cursor + h - window_h_px
-                    elif win_side == 'left':
-                        wx = x_cursor - 1
-                        wy = y_cursor + int((h - window_h_px) / 2)
-                    else:
-                        wx = x_cursor + w - window_w_px
-                        wy = y_cursor + int((h - window_h_px) / 2)
-                    windows.append({"x": int(wx), "y": int(wy), "w": window_w_px, "h": window_h_px, "orientation": win_side})
-
-                room_boxes.append({
-                    "name": name,
-                    "area_sq_ft": r["area_sq_ft"],
-                    "dims": dims,
-                    "x": int(x_cursor),
-                    "y": int(y_cursor),
-                    "w": w,
-                    "h": h,
-                    "doors": doors,
-                    "windows": windows
-                })
-                x_cursor += w + 8
-            y_cursor += row_h + 8
-
-        layout.append({"floor": floor_name, "canvas": {"w": canvas_w, "h": canvas_h}, "rooms": room_boxes})
+            cx = x
+            for a in areas[i:j]:
+                rects.append((cx, y, a / thickness, thickness))
+                cx += a / thickness
+            y += thickness
+            h -= thickness
+        i = j
+    return rects
 
-    return layout
+
+class _WallIndex:
+    """Spatial index of room walls keyed by the grid line they sit on.
+
+    Packed rooms share exact pixel edges, so two rooms are neighbours when
+    one's right (bottom) wall and the other's left (top) wall lie on the same
+    line and overlap. Walls on one line never overlap each other, so each
+    line keeps them sorted and a query is a bisect plus the hits.
+    """
+
+    def __init__(self, boxes):
+        lines = {side: defaultdict(list) for side in ("left", "right", "top", "bottom")}
+        for idx, (x, y, w, h) in enumerate(boxes):
+            lines["left"][x].append((y, y + h, idx))
+            lines["right"][x + w].append((y, y + h, idx))
+            lines["top"][y].append((x, x + w, idx))
+            lines["bottom"][y + h].append((x, x + w, idx))
+        self.lines = {}
+        for side, by_coord in lines.items():
+            self.lines[side] = {}
+            for coord, walls in by_coord.items():
+                walls.sort()
+                self.lines[side][coord] = ([wall[0] for wall in walls], walls)
+
+    def _query(self, side, coord, lo, hi):
+        entry = self.lines[side].get(coord)
+        if entry is None:
+            return
+        starts, walls = entry
+        k = max(0, bisect_right(starts, lo) - 1)
+        while k < len(walls) and walls[k][0] < hi:
+            a, b, idx = walls[k]
+            if min(b, hi) > max(a, lo):
+                yield idx, max(a, lo), min(b, hi)
+            k += 1
+
+    def neighbours(self, box):
+        """Yield (side, neighbour index, segment start, segment end) for one room."""
+        x, y, w, h = box
+        for idx, a, b in self._query("left", x + w, y, y + h):
+            yield "right", idx, a, b
+        for idx, a, b in self._query("right", x, y, y + h):
+            yield "left", idx, a, b
+        for idx, a, b in self._query("top", y + h, x, x + w):
+            yield "bottom", idx, a, b
+        for idx, a, b in self._query("bottom", y, x, x + w):
+            yield "top", idx, a, b
+
+
+def _door_on_segment(side, x, y, w, h, a, b, door_w_px, door_h_px):
+    # center a door on the shared wall segment [a, b]
+    span = b - a
+    if side in ('top', 'bottom'):
+        dw = min(door_w_px, span)
+        return {"x": int(a + (span - dw) / 2), "y": int(y - 1 if side == 'top' else y + h - 1), "w": dw, "h": 4,
+                "orientation": side}
+    dh = min(door_h_px, span)
+    return {"x": int(x - 1 if side == 'left' else x + w - 1), "y": int(a + (span - dh) / 2), "w": 4, "h": dh,
+            "orientation": side}
+
+
+def _default_program(room_set):
+    return [[name, 1] for name in ROOM_SETS[room_set]]
+
+
+def _program_names(program):
+    names = []
+    for room_type, count in program:
+        names.extend([room_type] if count == 1 else (f"{room_type} {k}" for k in range(1, count + 1)))
+    return names
+
+
+def _program_plate(area_per_floor, max_rooms, stair_core):
+    """Everything the floors of one building share: footprint, canvas, pixel
+    scale, door/window sizes and the stair core strip (ft coordinates)."""
+    # bigger programs get a proportionally larger canvas
+    scale = min(MAX_CANVAS_SCALE, max(1.0, math.sqrt(max_rooms / 8.0)))
+    canvas_w, canvas_h, margin = int(CANVAS_W * scale), int(CANVAS_H * scale), MARGIN
+    floor_w_ft = math.sqrt(area_per_floor * 1.4)
+    floor_h_ft = area_per_floor / floor_w_ft
+    ppf = min((canvas_w - margin * 2) / floor_w_ft, (canvas_h - margin * 2) / floor_h_ft)
+
+    core = None
+    pack_w_ft = floor_w_ft
+    if stair_core:
+        lo, hi = STAIR_CORE_WIDTH_FT
+        core_w = min(floor_w_ft * 0.25, max(lo, min(hi, floor_w_ft * 0.08)))
+        pack_w_ft = floor_w_ft - core_w
+        core = (pack_w_ft, 0.0, core_w, floor_h_ft)
+
+    return {
+        "canvas_w": canvas_w,
+        "canvas_h": canvas_h,
+        "margin": margin,
+        "ppf": ppf,
+        "area_per_floor": area_per_floor,
+        "floor_w_ft": floor_w_ft,
+        "floor_h_ft": floor_h_ft,
+        "pack_w_ft": pack_w_ft,
+        "core": core,
+        "door_w_px": max(12, int(round(3 * ppf))),
+        "door_h_px": max(8, int(round(7 * ppf))),
+        "window_w_px": max(12, int(round(4 * ppf))),
+        "window_h_px": max(8, int(round(3 * ppf))),
+    }
+
+
+def _pack_program(plate, program):
+    """Lay out one room program (possibly hundreds of rooms) on a floor plate.
+
+    Rooms get floor area by keyword weight and are packed with a squarified
+    treemap that fills the plate (minus any stair core) in O(n log n). The
+    default door goes on the longest wall shared with a neighbour (found
+    through `_WallIndex`, larger rooms such as lobbies preferred); default
+    windows go on exterior walls only.
+    """
+    names = _program_names(program)
+    n = len(names)
+    margin, ppf = plate["margin"], plate["ppf"]
+    door_w_px, door_h_px = plate["door_w_px"], plate["door_h_px"]
+
+    pack_area = plate["pack_w_ft"] * plate["floor_h_ft"]
+    # "Office 17" has the profile of "Office": look up each type once
+    type_profiles = [room_profile(room_type) for room_type, _ in program]
+    profiles = [p for p, (_, count) in zip(type_profiles, program) for _ in range(count)]
+    total_weight = sum(p[0] for p in profiles) or n
+    room_areas = [pack_area * (p[0] / total_weight) for p in profiles]
+
+    order = sorted(range(n), key=lambda k: room_areas[k], reverse=True)
+    rects_ft = _squarify([room_areas[k] for k in order], 0.0, 0.0, plate["pack_w_ft"], plate["floor_h_ft"])
+    if plate["core"] is not None:
+        rects_ft.append(plate["core"])
+        names.append("Stair Core")
+        profiles.append((0.0, 1.0, False))
+        room_areas.append(plate["core"][2] * plate["core"][3])
+        order.append(n)
+
+    # snap edges (not sizes) to pixels so neighbours share exact walls
+    boxes = []
+    for fx, fy, fw, fh in rects_ft:
+        x0, y0 = margin + int(round(fx * ppf)), margin + int(round(fy * ppf))
+        x1, y1 = margin + int(round((fx + fw) * ppf)), margin + int(round((fy + fh) * ppf))
+        boxes.append((x0, y0, x1 - x0, y1 - y0))
+    edge = (margin, margin, margin + int(round(plate["floor_w_ft"] * ppf)), margin + int(round(plate["floor_h_ft"] * ppf)))
+    index = _WallIndex(boxes)
+
+    room_boxes = []
+    for pos, k in enumerate(order):
+        name = names[k]
+        x, y, w, h = boxes[pos]
+        fx, fy, fw, fh = rects_ft[pos]
+
+        best = None
+        for side, other, a, b in index.neighbours(boxes[pos]):
+            rank = (b - a >= min(door_w_px, door_h_px), profiles[order[other]][0], b - a)
+            if best is None or rank > best[0]:
+                best = (rank, side, a, b)
+        if best is not None:
+            door = _door_on_segment(best[1], x, y, w, h, best[2], best[3], door_w_px, door_h_px)
+        else:
+            door = _door_at('bottom' if w >= h else 'right', x, y, w, h, door_w_px, door_h_px)
+
+        exterior = [side for side, on_edge in (
+            ('top', y == edge[1]), ('bottom', y + h == edge[3]),
+            ('left', x == edge[0]), ('right', x + w == edge[2])) if on_edge]
+        if profiles[k][2] and exterior:
+            win_side = exterior[0]
+            default_windows = [2 if win_side in ('top', 'bottom') and w > 220 else 1, win_side]
+        else:
+            default_windows = [0, 'top']
+
+        room_boxes.append({
+            "name": name,
+            "area_sq_ft": round(room_areas[k], 1),
+            "dims": f"{int(round(fw))}' x {int(round(fh))}'",
+            "x": x,
+            "y": y,
+            "w": w,
+            "h": h,
+            "door": door,
+            "default_windows": default_windows
+        })
+    return room_boxes
+
+
+def _pack_program_job(args):
+    return _pack_program(*args)
+
+
+_FLOOR_POOL = None
+
+
+def set_floor_pool(pool):
+    """Pack distinct floor programs of big buildings in `pool` (a
+    `ProcessPoolExecutor` owned by the caller). None, the default, packs
+    them in the calling thread."""
+    global _FLOOR_POOL
+    _FLOOR_POOL = pool
+
+
+def _build_program_layouts(area_sq_ft, floors, single_image, program_keys, stair_core, room_set=None):
+    """Multi-floor program layouts: shared plate once, one packing per distinct program.
+
+    The footprint, scale and stair core are computed once for the building.
+    Floors that share a program reuse one packing (a 20-floor tower of
+    identical floors costs one layout); distinct programs are packed in the
+    `set_floor_pool` process pool, if one is set, when there is enough work
+    to amortize it.
+    """
+    area_per_floor = area_sq_ft / max(1, floors)
+    effective_floors = 1 if single_image else max(1, floors)
+    keys = program_keys[:effective_floors]
+    distinct = list(dict.fromkeys(keys))
+    if room_set is None:
+        room_set = room_set_index(area_per_floor)
+    programs = {key: json.loads(key) if key else _default_program(room_set) for key in distinct}
+    room_counts = {key: sum(count for _, count in program) for key, program in programs.items()}
+
+    plate = _program_plate(area_per_floor, max(room_counts.values()), stair_core)
+    jobs = [(plate, programs[key]) for key in distinct]
+    if _FLOOR_POOL is not None and len(jobs) > 1 and sum(room_counts.values()) >= PARALLEL_MIN_ROOMS:
+        packed = list(_FLOOR_POOL.map(_pack_program_job, jobs))
+    else:
+        packed = [_pack_program(*job) for job in jobs]
+    plan_index = {key: i for i, key in enumerate(distinct)}
+
+    return {
+        "engine": "program",
+        "fixtures": [plate["door_w_px"], plate["door_h_px"], plate["window_w_px"], plate["window_h_px"]],
+        "plans": packed,
+        "floors": [{"floor": "Ground Floor" if i == 0 else f"Floor {i}",
+                    "canvas": {"w": plate["canvas_w"], "h": plate["canvas_h"]}, "plan": plan_index[key]}
+                   for i, key in enumerate(keys)],
+    }
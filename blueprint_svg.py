@@ -0,0 +1,190 @@
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+# Bump when the drawing changes: it is part of the content hash, so old URLs
+# keep serving what they always served and new layouts get new URLs.
+SVG_VERSION = 1
+SVG_ROUTE = "/api/blueprint"
+RENDER_CACHE_BYTES = 64 * 1024 * 1024
+HASH_RE = re.compile(r"^[0-9a-f]{24}$")
+# A hash cannot be re-rendered from its URL, so a floor served again restarts
+# its shared-cache TTL, at most once per this many seconds
+REFRESH_INTERVAL = 3600
+
+_RENDERED = OrderedDict()    # hash -> {"floor": name, "svg": str}
+_REFRESHED = {}              # hash -> when its shared-cache TTL was last restarted
+_BYTES = 0
+_LOCK = threading.Lock()
+_SHARED_CACHE = None
+_STATS = {"hits": 0, "shared_hits": 0, "misses": 0, "renders": 0}
+
+
+def set_shared_cache(cache):
+    """Back the render cache with one shared between workers (an
+    `ai_cache.ResponseCache`), so `/api/blueprint/<hash>.svg` resolves on
+    whichever worker the request lands. None = per-process only."""
+    global _SHARED_CACHE
+    _SHARED_CACHE = cache
+    clear_render_cache()
+
+
+def clear_render_cache():
+    global _BYTES
+    with _LOCK:
+        _RENDERED.clear()
+        _REFRESHED.clear()
+        _BYTES = 0
+
+
+def render_cache_info():
+    with _LOCK:
+        return dict(_STATS, entries=len(_RENDERED), bytes=_BYTES, max_bytes=RENDER_CACHE_BYTES)
+
+
+def layout_hash(floor):
+    """Content hash of one floor layout (everything but its own `svg` URL)."""
+    body = {k: v for k, v in floor.items() if k != "svg"}
+    # no sort_keys: blueprint_gen builds every dict in a fixed key order, and a
+    # differently ordered but equal layout only costs one extra render
+    blob = json.dumps([SVG_VERSION, body], separators=(",", ":"), check_circular=False)
+    return hashlib.sha256(blob.encode()).hexdigest()[:24]
+
+
+def _n(value):
+    # match JS number formatting in attributes: 12.0 -> "12"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _label(parts, x, y, size, fill, text, centered=False):
+    anchor = ' text-anchor="middle" dominant-baseline="middle"' if centered else ""
+    parts.append(f'<text x="{_n(x)}" y="{_n(y)}" font-size="{size}" fill="{fill}"{anchor}>{escape(str(text))}</text>')
+
+
+def render_floor(floor):
+    """SVG document for one floor from `blueprint_gen.generate_floor_layouts`.
+
+    Draws what the dashboard used to build in the DOM: room rectangles with
+    name and dimensions, doors (brown, "D") and windows (blue, "W").
+    """
+    canvas = floor.get("canvas") or {}
+    w, h = canvas.get("w") or 760, canvas.get("h") or 300
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{_n(w)}" height="{_n(h)}" viewBox="0 0 {_n(w)} {_n(h)}"'
+        ' style="border:1px solid #e2e8f0;border-radius:8px;background:#fff">',
+        f'<title>{escape(str(floor.get("floor", "")))}</title>',
+    ]
+    for r in floor.get("rooms") or ():
+        parts.append(f'<rect x="{_n(r["x"])}" y="{_n(r["y"])}" width="{_n(r["w"])}" height="{_n(r["h"])}"'
+                     ' fill="#f8fafc" stroke="#94a3b8" stroke-width="1"/>')
+        _label(parts, r["x"] + max(6, r["w"] / 10), r["y"] + 20, 12, "#0f172a", r.get("name", ""))
+        _label(parts, r["x"] + max(6, r["w"] / 10), r["y"] + 36, 11, "#475569", r.get("dims", ""))
+        for d in r.get("doors") or ():
+            parts.append(f'<rect x="{_n(d["x"])}" y="{_n(d["y"])}" width="{_n(d["w"])}" height="{_n(d["h"])}"'
+                         ' fill="#8b5a2b" stroke="#5a3820" stroke-width="1"/>')
+            _label(parts, d["x"] + max(6, d["w"] / 2), d["y"] + max(6, d["h"] / 2), 10, "#fff", "D", True)
+        for win in r.get("windows") or ():
+            parts.append(f'<rect x="{_n(win["x"])}" y="{_n(win["y"])}" width="{_n(win["w"])}" height="{_n(win["h"])}"'
+                         ' fill="#e0f2ff" stroke="#60a5fa" stroke-width="1"/>')
+            _label(parts, win["x"] + max(6, win["w"] / 2), win["y"] + max(6, win["h"] / 2), 10, "#0369a1", "W", True)
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def _remember(key, entry):
+    global _BYTES
+    with _LOCK:
+        if key in _RENDERED:
+            _RENDERED.move_to_end(key)
+            return
+        _RENDERED[key] = entry
+        _BYTES += len(entry["svg"])
+        while _BYTES > RENDER_CACHE_BYTES and len(_RENDERED) > 1:
+            old_key, old = _RENDERED.popitem(last=False)
+            _REFRESHED.pop(old_key, None)
+            _BYTES -= len(old["svg"])
+
+
+def _lookup(key):
+    with _LOCK:
+        entry = _RENDERED.get(key)
+        if entry is not None:
+            _RENDERED.move_to_end(key)
+            _STATS["hits"] += 1
+            return entry
+    shared = _SHARED_CACHE
+    if shared is not None:
+        entry = shared.get(key)
+        if entry is not None:
+            with _LOCK:
+                _STATS["shared_hits"] += 1
+            _remember(key, entry)
+            return entry
+    return None
+
+
+def _refresh(key, entry):
+    """Keep a floor that is still being served in the shared cache for another TTL."""
+    shared = _SHARED_CACHE
+    if shared is None:
+        return
+    now = time.time()
+    with _LOCK:
+        if now - _REFRESHED.get(key, 0) < REFRESH_INTERVAL:
+            return
+        _REFRESHED[key] = now
+    if not shared.touch(key):
+        shared.set(key, entry)   # pruned from disk while this process still had it
+
+
+def ensure_rendered(floor):
+    """Render `floor` unless its content hash is cached already; return the hash.
+
+    Either way the shared entry's TTL restarts (see `REFRESH_INTERVAL`), so
+    a URL handed out now stays resolvable for at least TTL - REFRESH_INTERVAL.
+    """
+    key = layout_hash(floor)
+    entry = _lookup(key)
+    if entry is None:
+        entry = {"floor": str(floor.get("floor", "")), "svg": render_floor(floor)}
+        with _LOCK:
+            _STATS["renders"] += 1
+        _remember(key, entry)
+    _refresh(key, entry)
+    return key
+
+
+def attach_svg_urls(blueprint):
+    """Set `svg` on every floor to its `/api/blueprint/<hash>.svg` URL (rendering on a miss)."""
+    for floor in blueprint or ():
+        floor["svg"] = f"{SVG_ROUTE}/{ensure_rendered(floor)}.svg"
+    return blueprint
+
+
+def get_rendered(key):
+    """{"floor", "svg"} for a hash, or None if it was never rendered (or has expired)."""
+    if not HASH_RE.match(key):
+        return None
+    entry = _lookup(key)
+    if entry is None:
+        with _LOCK:
+            _STATS["misses"] += 1
+    return entry
+
+
+def zip_floors(entries):
+    """ZIP archive (bytes) with one `NN_<floor name>.svg` per entry."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i, entry in enumerate(entries, 1):
+            name = re.sub(r"[^A-Za-z0-9._-]+", "_", entry["floor"]).strip("_") or "floor"
+            zf.writestr(f"{i:02d}_{name}.svg", entry["svg"])
+    return buf.getvalue()
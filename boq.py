@@ -0,0 +1,336 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+RATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rates")
+DEFAULT_REGION = "IN"
+
+# Line items a project expands into: (code, description, unit, category,
+# quantity per sq yard of floor area). Each category sums to the
+# ConstructionCalculator thumb rule it replaces: cement 1.2 bags, steel 3.5 kg
+# (+1% binding wire), sand 0.6 t, aggregate 13.5 cu ft (1.5 per sq ft) and
+# 72 bricks (8 per sq ft) per sq yard.
+BOQ_ITEMS = (
+    ("cement_opc53", "Cement OPC 53 grade, 50 kg (concrete)", "bag", "cement", 0.8),
+    ("cement_ppc", "Cement PPC, 50 kg (masonry & plaster)", "bag", "cement", 0.4),
+    ("steel_fe500d", "TMT bars Fe500D, 12-25 mm (columns & beams)", "kg", "steel", 2.1),
+    ("steel_fe500", "TMT bars Fe500, 8-10 mm (slabs & stirrups)", "kg", "steel", 1.4),
+    ("binding_wire", "Binding wire, 18 gauge", "kg", "steel", 0.035),
+    ("m_sand", "Manufactured sand (concrete)", "ton", "sand", 0.36),
+    ("river_sand", "River sand (plaster)", "ton", "sand", 0.24),
+    ("aggregate_20mm", "Coarse aggregate, 20 mm", "cu_ft", "aggregate", 9.45),
+    ("aggregate_10mm", "Coarse aggregate, 10 mm", "cu_ft", "aggregate", 4.05),
+    ("bricks", "Burnt clay bricks, first class", "nos", "masonry", 72.0),
+    ("electrical_points", "Electrical points (wiring, switch & box)", "point", "fittings", 0.3),
+    ("plumbing_fittings", "Plumbing & sanitary fitting sets", "set", "fittings", 0.02),
+    ("door_sets", "Door frame & shutter sets", "set", "fittings", 0.04),
+    ("window_sets", "Window frames with glazing", "sq_ft", "fittings", 1.2),
+)
+WHOLE_UNITS = ("bag", "nos", "point", "set")   # bought whole: quantities round up
+
+ITEM_CODES = tuple(item[0] for item in BOQ_ITEMS)
+CATEGORIES = tuple(dict.fromkeys(item[3] for item in BOQ_ITEMS))
+_COEFFS = np.array([item[4] for item in BOQ_ITEMS], dtype=np.float64)
+_WHOLE = np.array([item[2] in WHOLE_UNITS for item in BOQ_ITEMS])
+# (items x categories) 0/1 matrix: amounts @ _CATEGORY_MATRIX = subtotals per category
+_CATEGORY_MATRIX = np.array([[item[3] == c for c in CATEGORIES] for item in BOQ_ITEMS], dtype=np.float64)
+
+
+class RateTable:
+    """One immutable snapshot of the regional rate files.
+
+    Rates live in a single read-only (regions x items) float64 matrix, with
+    `index` mapping region code to row and columns in `ITEM_CODES` order, so
+    pricing any number of projects is one gather and one multiply. Regions
+    that `inherits` another are resolved when the table is built.
+    """
+
+    __slots__ = ("version", "loaded_at", "regions", "index", "names", "currencies", "effective", "daily_wage",
+                 "rates")
+
+    def __init__(self, version, regions, names, currencies, effective, daily_wage, rates):
+        self.version = version
+        self.loaded_at = time.time()
+        self.regions = tuple(regions)
+        self.index = {code: i for i, code in enumerate(self.regions)}
+        self.names = tuple(names)
+        self.currencies = tuple(currencies)
+        self.effective = tuple(effective)
+        self.daily_wage = np.array(daily_wage, dtype=np.float64)   # NaN = none set
+        self.rates = np.array(rates, dtype=np.float64).reshape(len(self.regions), len(ITEM_CODES))
+        self.daily_wage.flags.writeable = False
+        self.rates.flags.writeable = False
+
+    def region_index(self, region):
+        i = self.index.get(str(region).upper())
+        if i is None:
+            raise ValueError(f"unknown region '{region}'; available: {', '.join(self.regions)}")
+        return i
+
+    def indices(self, regions, n):
+        """Row per project for a region code (applied to all `n`) or a list of codes."""
+        if regions is None or isinstance(regions, str):
+            return np.full(n, self.region_index(regions or DEFAULT_REGION), dtype=np.intp)
+        if len(regions) != n:
+            raise ValueError("region must have one entry per project")
+        # region codes repeat heavily, so look each distinct one up once
+        rows = {}
+        for r in regions:
+            if r not in rows:
+                rows[r] = self.region_index(r or DEFAULT_REGION)
+        return np.array([rows[r] for r in regions], dtype=np.intp)
+
+    def describe(self, i):
+        return {
+            "region": self.regions[i],
+            "name": self.names[i],
+            "currency": self.currencies[i],
+            "effective": self.effective[i],
+            "daily_wage": None if np.isnan(self.daily_wage[i]) else float(self.daily_wage[i]),
+        }
+
+
+def load_rate_tables(path=RATES_DIR):
+    """Build a `RateTable` from every `*.json` file in `path`.
+
+    A file holds one region: {"region": "IN-MH", "name": ..., "currency": "INR",
+    "inherits": "IN", "effective": "2026-04-01", "daily_wage": 750,
+    "rates": {"cement_opc53": 430, ...}}. Inherited regions supply any rate,
+    currency or wage a file leaves out; every region must end up with a rate
+    for every item in `BOQ_ITEMS`.
+    """
+    files = sorted(glob.glob(os.path.join(path, "*.json")))
+    if not files:
+        raise ValueError(f"no rate tables (*.json) in {path}")
+    digest = hashlib.sha256()
+    docs = {}
+    for name in files:
+        with open(name, "rb") as f:
+            blob = f.read()
+        digest.update(blob)
+        doc = json.loads(blob)
+        code = str(doc.get("region") or os.path.splitext(os.path.basename(name))[0]).upper()
+        if code in docs:
+            raise ValueError(f"region {code} is defined twice")
+        unknown = set(doc.get("rates") or {}) - set(ITEM_CODES)
+        if unknown:
+            raise ValueError(f"{os.path.basename(name)}: unknown item(s) {', '.join(sorted(unknown))}")
+        docs[code] = doc
+
+    resolved = {}
+
+    def resolve(code, chain=()):
+        if code in resolved:
+            return resolved[code]
+        if code in chain:
+            raise ValueError(f"rate table inheritance cycle: {' -> '.join(chain + (code,))}")
+        doc = docs.get(code)
+        if doc is None:
+            raise ValueError(f"{chain[-1]} inherits unknown region {code}")
+        parent = doc.get("inherits")
+        merged = dict(resolve(str(parent).upper(), chain + (code,))) if parent else {"rates": {}}
+        merged["rates"] = dict(merged["rates"], **(doc.get("rates") or {}))
+        for key in ("currency", "effective", "daily_wage"):
+            if doc.get(key) is not None:
+                merged[key] = doc[key]
+        merged["name"] = doc.get("name") or code
+        resolved[code] = merged
+        return merged
+
+    regions = sorted(docs)
+    rows = []
+    for code in regions:
+        merged = resolve(code)
+        missing = [item for item in ITEM_CODES if item not in merged["rates"]]
+        if missing:
+            raise ValueError(f"region {code} has no rate for {', '.join(missing)}")
+        row = [float(merged["rates"][item]) for item in ITEM_CODES]
+        if min(row) < 0:
+            raise ValueError(f"region {code} has a negative rate")
+        rows.append(row)
+    return RateTable(
+        version=digest.hexdigest()[:12],
+        regions=regions,
+        names=[resolved[c]["name"] for c in regions],
+        currencies=[resolved[c].get("currency", "INR") for c in regions],
+        effective=[resolved[c].get("effective") for c in regions],
+        daily_wage=[resolved[c].get("daily_wage", np.nan) for c in regions],
+        rates=rows,
+    )
+
+
+class RateBook:
+    """The current `RateTable`, reloaded while the server runs.
+
+    `table` re-checks the files' mtimes at most every `check_interval`
+    seconds and swaps in a new snapshot when they changed; `reload()` forces
+    it. A table that fails to load is reported and the previous one is kept,
+    so a half-edited file never takes pricing down. Readers hold a reference
+    to one snapshot, so a swap never mixes rates from two versions.
+    """
+
+    def __init__(self, path=RATES_DIR, check_interval=30):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._table = None
+        self._fingerprint = None
+        self._checked = 0.0
+        self.reloads = 0
+        self.last_error = None
+
+    def _files_fingerprint(self):
+        stamps = []
+        for name in sorted(glob.glob(os.path.join(self.path, "*.json"))):
+            st = os.stat(name)
+            stamps.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(stamps)
+
+    def reload(self):
+        """Load the files now; raises (keeping the old table) if they are invalid."""
+        with self._lock:
+            fingerprint = self._files_fingerprint()
+            try:
+                table = load_rate_tables(self.path)
+            except (OSError, ValueError, TypeError) as e:
+                self.last_error = str(e)
+                raise ValueError(f"rate tables not reloaded: {e}")
+            self._table, self._fingerprint = table, fingerprint
+            self._checked = time.monotonic()
+            self.reloads += 1
+            self.last_error = None
+            return table
+
+    @property
+    def table(self):
+        table = self._table
+        if table is None:
+            return self.reload()
+        if self.check_interval is not None and time.monotonic() - self._checked >= self.check_interval:
+            self._checked = time.monotonic()
+            try:
+                changed = self._files_fingerprint() != self._fingerprint
+            except OSError:
+                changed = False
+            if changed:
+                try:
+                    table = self.reload()
+                    print(f"💱 Rate tables reloaded (version {table.version})")
+                except ValueError as e:
+                    print(f"⚠️ {e}")
+        return self._table
+
+    def stats(self):
+        table = self._table
+        return {
+            "path": self.path,
+            "version": table.version if table else None,
+            "regions": len(table.regions) if table else 0,
+            "items": len(ITEM_CODES),
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
+
+
+_BOOK = None
+_BOOK_LOCK = threading.Lock()
+
+
+def configure_rates(path=RATES_DIR, check_interval=30):
+    """Point pricing at another rate directory (loaded on first use)."""
+    global _BOOK
+    with _BOOK_LOCK:
+        _BOOK = RateBook(path, check_interval)
+    return _BOOK
+
+
+def rate_book():
+    global _BOOK
+    if _BOOK is None:
+        with _BOOK_LOCK:
+            if _BOOK is None:
+                _BOOK = RateBook()
+    return _BOOK
+
+
+def line_quantities(area_yards, num_floors):
+    """(projects x items) quantity matrix for per-floor areas (sq yards) and floor counts."""
+    area_floors = np.asarray(area_yards, dtype=np.float64).reshape(-1) * np.asarray(num_floors, dtype=np.float64)
+    qty = np.multiply.outer(area_floors, _COEFFS)
+    # the epsilon keeps 1200 * 0.8 = 960.0000000000001 at 960 bags
+    return np.where(_WHOLE, np.ceil(qty - 1e-9), qty)
+
+
+def price_batch(area_yards, num_floors, region=None, table=None):
+    """Price many projects' line items in one vectorized pass.
+
+    `area_yards` and `num_floors` are arrays (one entry per project);
+    `region` is one code for all projects or a list. Returns arrays:
+    `quantities`, `rates` and `amounts` (projects x items, columns in
+    `ITEM_CODES` order), `totals` and `categories` (projects x `CATEGORIES`)
+    plus each project's region row and default `daily_wage` (NaN if unset).
+    """
+    table = table or rate_book().table
+    qty = line_quantities(area_yards, num_floors)
+    rows = table.indices(region, qty.shape[0])
+    rates = table.rates[rows]
+    amounts = qty * rates
+    categories = amounts @ _CATEGORY_MATRIX
+    return {
+        "table": table,
+        "rows": rows,
+        "quantities": qty,
+        "rates": rates,
+        "amounts": amounts,
+        "totals": amounts.sum(axis=1),
+        "categories": categories,
+        "daily_wage": table.daily_wage[rows],
+    }
+
+
+def bill_of_quantities(area_yards, num_floors, region=None, table=None):
+    """Line-item bill for one project: items with quantity, rate and amount,
+    subtotals per category and the material total, in the region's currency."""
+    priced = price_batch([area_yards], [num_floors], region, table)
+    table = priced["table"]
+    qty, rates, amounts = priced["quantities"][0], priced["rates"][0], priced["amounts"][0]
+    items = []
+    for i, (code, description, unit, category, _) in enumerate(BOQ_ITEMS):
+        items.append({
+            "code": code,
+            "description": description,
+            "category": category,
+            "unit": unit,
+            "quantity": round(float(qty[i]), 2),
+            "rate": float(rates[i]),
+            "amount": round(float(amounts[i]), 2),
+        })
+    return dict(
+        table.describe(int(priced["rows"][0])),
+        rates_version=table.version,
+        items=items,
+        categories={c: round(float(v), 2) for c, v in zip(CATEGORIES, priced["categories"][0])},
+        total=round(float(priced["totals"][0]), 2),
+    )
+
+
+def compare_regions(area_yards, num_floors, regions=None, table=None):
+    """One project priced in several regions (all of them by default), cheapest first."""
+    table = table or rate_book().table
+    regions = list(regions) if regions else list(table.regions)
+    priced = price_batch(np.full(len(regions), float(area_yards)), np.full(len(regions), float(num_floors)),
+                         regions, table)
+    rows = []
+    for p, row in enumerate(priced["rows"]):
+        rows.append(dict(
+            table.describe(int(row)),
+            categories={c: round(float(v), 2) for c, v in zip(CATEGORIES, priced["categories"][p])},
+            total=round(float(priced["totals"][p]), 2),
+        ))
+    rows.sort(key=lambda r: r["total"])
+    return {"rates_version": table.version, "regions": rows}
@@ -1,5 +1,7 @@
 import math
 from blueprint_gen import generate_floor_layouts
+from scheduler import schedule_project
+from boq import bill_of_quantities, price_batch, rate_book
 
 
 class ConstructionCalculator:
@@ -8,28 +10,43 @@ class ConstructionCalculator:
     Inputs are given in square yards (built_up_area). Internally the class
     converts to square feet for layout/blueprint calculations but keeps
     thumb-rule rates per sq yard where appropriate.
+
+    With a `region` (a rate table code, see `boq`), materials are priced
+    line by line from that region's rates instead of the flat
+    `COST_PER_SQ_YARD * 0.6`, and the region's daily wage is the default.
     """
 
     # Defaults / constants
     DAILY_WAGE_PER_WORKER = 500
     COST_PER_SQ_YARD = 1500
     OVERHEAD_PERCENTAGE = 10
+    OUTPUT_PER_WORKER_DAY = 5     # sq yards (x floors) one worker completes per day
 
     # Thumb rules per sq yard
     STEEL_PER_SQ_YARD_KG = 3.5    # kg per sq yard
     CEMENT_PER_SQ_YARD = 1.2      # bags per sq yard
     SAND_PER_SQ_YARD_TONS = 0.6   # tons per sq yard
 
-    def __init__(self, built_up_area, floors=1, daily_wage=None, cost_per_sq_yard=None):
+    def __init__(self, built_up_area, floors=1, daily_wage=None, cost_per_sq_yard=None, region=None):
         self.built_up_area_yards = float(built_up_area)
         self.built_up_area_ft = self.built_up_area_yards * 9.0
         self.num_floors = self._parse_floors(floors)
+        self.rates = None
+        self.region = None
+        if region:
+            # one snapshot for the whole calculation, even if the tables reload meanwhile
+            self.rates = rate_book().table
+            self.region = self.rates.regions[self.rates.region_index(region)]
+            wage = float(self.rates.daily_wage[self.rates.index[self.region]])
+            if not math.isnan(wage):  # NaN: the region sets no wage
+                self.DAILY_WAGE_PER_WORKER = wage
         if daily_wage:
             self.DAILY_WAGE_PER_WORKER = daily_wage
         if cost_per_sq_yard:
             self.COST_PER_SQ_YARD = cost_per_sq_yard
 
-    def _parse_floors(self, floors):
+    @staticmethod
+    def _parse_floors(floors):
         if isinstance(floors, int):
             return floors
         s = str(floors).upper().strip()
@@ -80,14 +97,25 @@ class ConstructionCalculator:
         }
 
     def calculate_costs(self, workers_data):
+        """Labour, material and overhead costs over `duration_days`.
+
+        `duration_days` is the productivity thumb rule (`OUTPUT_PER_WORKER_DAY`,
+        at least 30 days) that labour cost and the model prompts are based on;
+        the crew-leveled critical path from `critical_path_schedule` is
+        reported separately as `leveled_days`.
+        """
         total_workers = sum(workers_data.values())
         # Productivity factor: area (sq yards) * floors / (workers * output)
-        estimated_days = math.ceil((self.built_up_area_yards * self.num_floors) / (max(1, total_workers) * 5))
+        estimated_days = math.ceil((self.built_up_area_yards * self.num_floors) / (max(1, total_workers) * self.OUTPUT_PER_WORKER_DAY))
         if estimated_days < 30:
             estimated_days = 30
 
         labor_cost = total_workers * estimated_days * self.DAILY_WAGE_PER_WORKER
-        material_cost = self.built_up_area_yards * self.num_floors * (self.COST_PER_SQ_YARD * 0.6)
+        if self.region:
+            material_cost = float(price_batch([self.built_up_area_yards], [self.num_floors], self.region,
+                                              self.rates)["totals"][0])
+        else:
+            material_cost = self.built_up_area_yards * self.num_floors * (self.COST_PER_SQ_YARD * 0.6)
         overhead = (labor_cost + material_cost) * (self.OVERHEAD_PERCENTAGE / 100.0)
         total_cost = labor_cost + material_cost + overhead
 
@@ -101,53 +129,53 @@ class ConstructionCalculator:
             "duration_months": round(estimated_days / 30.0, 1)
         }
 
-    def generate_blueprint(self):
-        """Generate a simple floor-wise layout using `blueprint_gen.generate_floor_layouts`.
+    def assumptions(self):
+        """Location, rates and pricing basis behind the estimate."""
+        assumptions = {
+            "location": "India",
+            "cost_per_sq_yard": self.COST_PER_SQ_YARD,
+            "overhead_percentage": self.OVERHEAD_PERCENTAGE,
+            "material_cost_basis": "cost_per_sq_yard",
+        }
+        if self.region:
+            region = self.rates.describe(self.rates.index[self.region])
+            assumptions.update(location=region["name"], region=self.region, currency=region["currency"],
+                               daily_wage=self.DAILY_WAGE_PER_WORKER, rates_version=self.rates.version,
+                               material_cost_basis="boq")
+        return assumptions
+
+    def calculate_boq(self):
+        """Bill of quantities: line items priced at `region` (or `boq.DEFAULT_REGION`).
 
-        Returns a list of dicts: [{floor: 'Ground Floor', rooms: [...]}, ...]
+        See `boq.bill_of_quantities` for the returned keys.
         """
-        return generate_floor_layouts(self.built_up_area_ft, self.num_floors)
+        return bill_of_quantities(self.built_up_area_yards, self.num_floors, self.region, self.rates)
 
-    def generate_blueprint(self, room_options=None):
+    def generate_blueprint(self, room_options=None, room_program=None, all_floors=False, floor_programs=None,
+                           stair_core=None):
         """Generate blueprint with optional `room_options` overrides.
 
         `room_options` is a dict mapping room keyword -> options, e.g.
         {"bedroom": {"windows":2, "door_side":"left"}, "bathroom": {"windows":0}}
+
+        `room_program` maps room type -> count per floor for large plates, e.g.
+        {"office": 240, "meeting": 12, "toilet": 8}
+
+        `all_floors` returns every floor instead of only the ground floor;
+        `floor_programs` ({"0": {...}, "1-19": {...}}) varies the program per floor.
+        """
+        return generate_floor_layouts(self.built_up_area_ft, self.num_floors, single_image=not all_floors,
+                                      room_options=room_options, room_program=room_program,
+                                      floor_programs=floor_programs, stair_core=stair_core)
+
+    def critical_path_schedule(self, include_tasks=False):
+        """Critical-path schedule leveled to the crews from `calculate_workers`.
+
+        See `scheduler.schedule_project` for the returned keys.
         """
-        return generate_floor_layouts(self.built_up_area_ft, self.num_floors, single_image=True, room_options=room_options)
+        return schedule_project(self.built_up_area_yards, self.num_floors, self.calculate_workers(),
+                                include_tasks=include_tasks)
 
     def generate_schedule(self):
-        # Simple algorithmic schedule (kept for fallback)
-        workers = self.calculate_workers()
-        weeks = self.calculate_costs(workers)['duration_weeks']
-        if weeks < 10:
-            weeks = 10
-
-        phases = [
-            {"phase": "Site Preparation", "activities": ["Site clearing", "Leveling", "Temporary facilities"]},
-            {"phase": "Foundation Work", "activities": ["Excavation", "Foundation laying", "Concrete curing"]},
-            {"phase": "Ground Floor Slab", "activities": ["Formwork", "Reinforcement", "Concrete pouring"]},
-            {"phase": "Column & Wall Construction", "activities": ["Brickwork", "Column casting"]},
-            {"phase": "Floor Slab (Next Floors)", "activities": ["Formwork", "Reinforcement", "Pouring"]},
-            {"phase": "Brickwork & Masonry", "activities": ["Wall laying", "Plastering prep"]},
-            {"phase": "Plastering", "activities": ["Wall plastering", "Ceiling plastering"]},
-            {"phase": "Electrical Fittings", "activities": ["Wiring", "Switch boards", "Light fixtures"]},
-            {"phase": "Plumbing Fixtures", "activities": ["Piping", "Sanitary fittings", "Testing"]},
-            {"phase": "Wall Painting", "activities": ["Primer", "Base coat", "Final color"]},
-            {"phase": "Doors & Windows", "activities": ["Frame installation", "Glass fitting"]},
-            {"phase": "Final Finishing", "activities": ["Cleaning", "Inspection", "Handover"]}
-        ]
-
-        schedule = []
-        steps = max(1, len(phases) // weeks)
-        current_week = 1
-        for i in range(0, len(phases), steps):
-            phase_group = phases[i:i+steps]
-            if current_week > weeks:
-                break
-            all_activities = []
-            for p in phase_group:
-                all_activities.extend(p['activities'])
-            schedule.append({"week": current_week, "phase": phase_group[0]['phase'], "activities": all_activities})
-            current_week += 2
-        return schedule
+        """Weekly schedule entries ({week, phase, activities}) from `critical_path_schedule`."""
+        return self.critical_path_schedule()["weeks"]
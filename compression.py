@@ -0,0 +1,81 @@
+import gzip
+
+from metrics import timed
+
+try:
+    import brotli  # optional: `pip install brotli` adds "br" to the negotiated encodings
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "image/svg+xml", "text/csv", "text/html",
+                      "text/css", "text/plain", "application/javascript", "text/javascript")
+
+
+def available_encodings():
+    """Encodings this process can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding):
+    """Best encoding for an `Accept-Encoding` header value, or None for identity.
+
+    Honours q-values (`gzip;q=0` refuses gzip) and `*`; on equal q the
+    server's preference (`available_encodings`) decides.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body, encoding, gzip_level=5, brotli_quality=5):
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    if encoding == "gzip":
+        # mtime=0 keeps the output a pure function of the body
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    raise ValueError(f"unsupported encoding '{encoding}'")
+
+
+def compress_response(response, accept_encoding, min_bytes=1024, gzip_level=5, brotli_quality=5, timings=None):
+    """Compress a buffered Flask response in place when the client accepts it.
+
+    Skips streamed responses (SSE, exports), bodies under `min_bytes`,
+    non-text types and anything already encoded. Always adds
+    `Vary: Accept-Encoding` to compressible types so shared caches keep the
+    variants apart, and weakens a strong ETag once the body is re-encoded.
+    Time spent compressing is recorded as the "compress" stage.
+    """
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 206, 304) or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+    with timed("compress", timings):
+        response.set_data(compress(body, encoding, gzip_level, brotli_quality))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,31 @@
+# Gunicorn settings for `gunicorn -c gunicorn.conf.py wsgi:app`; every value
+# can be overridden from the environment.
+#
+# Workers are preforked processes, each serving WEB_THREADS requests at a time
+# (most of a request is spent waiting on Ollama, so threads are cheap
+# concurrency). `kill -HUP <master pid>` reloads gracefully: new workers are
+# started with fresh code and config, and old ones finish their in-flight
+# requests (up to graceful_timeout) before exiting.
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", min(4, multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.environ.get("WEB_THREADS", 8))
+worker_class = "gthread"
+
+# Longer than the AI engine's 30s read timeout so slow generations can finish
+timeout = int(os.environ.get("WEB_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 45))
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth; jitter avoids all of them restarting at once
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+# Services start threads and open SQLite handles, which must not cross a
+# fork, so the app is imported (and create_app() run) in each worker.
+preload_app = False
+
+# ACCESS_LOG="" turns the access log off
+accesslog = os.environ.get("ACCESS_LOG", "-") or None
@@ -0,0 +1,198 @@
+import itertools
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class QueueFullError(RuntimeError):
+    """Raised by `JobQueue.submit` / `BoundedExecutor.submit` when the backlog is full."""
+
+
+class Job:
+    def __init__(self, fn, payload, priority):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.payload = payload
+        self.priority = priority
+        self.status = "queued"
+        self.progress = 0
+        self.stage = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def update(self, progress, stage):
+        """Called from the job function to report progress (0-100)."""
+        self.progress = progress
+        self.stage = stage
+
+    def to_dict(self):
+        out = {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": self.progress,
+            "stage": self.stage,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if self.result is not None:
+            out["result"] = self.result
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+class JobQueue:
+    """Bounded priority queue drained by a fixed pool of worker threads.
+
+    `workers` caps how many jobs (and so model generations) run at once;
+    `max_depth` caps how many may wait, beyond which `submit` raises
+    `QueueFullError`. Finished jobs are kept for `retention` seconds (at most
+    `max_jobs` of them) so clients can poll for results.
+    """
+
+    def __init__(self, workers=2, max_depth=100, retention=3600, max_jobs=1000):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self._queue = queue.PriorityQueue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name=f"ai-job-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, fn, payload, priority="normal"):
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of: {', '.join(PRIORITIES)}")
+        job = Job(fn, payload, priority)
+        with self._lock:
+            if self._queue.qsize() >= self.max_depth:
+                self.rejected += 1
+                raise QueueFullError(f"job queue is full ({self.max_depth} waiting)")
+            self._prune()
+            self._jobs[job.id] = job
+        self._queue.put((PRIORITIES[priority], next(self._seq), job))
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job):
+        """Approximate place in line (1 = next) for a queued job."""
+        if job.status != "queued":
+            return 0
+        rank = (PRIORITIES[job.priority], job.created)
+        with self._lock:
+            return 1 + sum(1 for other in self._jobs.values()
+                           if other.status == "queued" and (PRIORITIES[other.priority], other.created) < rank)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            if len(self._jobs) < self.max_jobs and not (job.finished and job.finished < cutoff):
+                break
+            if job.finished:
+                del self._jobs[job_id]
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            with self._lock:
+                self._running += 1
+            job.status = "running"
+            job.started = time.time()
+            try:
+                job.result = job.fn(job)
+                job.status = "done"
+                job.progress = 100
+                job.stage = "done"
+                self.completed += 1
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                self.failed += 1
+            finally:
+                job.finished = time.time()
+                with self._lock:
+                    self._running -= 1
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queue.qsize(),
+                "running": self._running,
+                "max_depth": self.max_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+
+class BoundedExecutor:
+    """`ThreadPoolExecutor` with a capped backlog.
+
+    At most `workers` calls run and `max_queue` more wait; past that
+    `submit` raises `QueueFullError` at once instead of queueing work that
+    would only start long after its caller gave up on it.
+    """
+
+    def __init__(self, workers=8, max_queue=32, thread_name_prefix=""):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise QueueFullError(f"executor backlog is full ({self.max_queue} waiting)")
+            self._pending += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": min(self._pending, self.workers),
+                "queued": max(0, self._pending - self.workers),
+                "max_queue": self.max_queue,
+                "rejected": self.rejected,
+            }
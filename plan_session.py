@@ -0,0 +1,231 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from blueprint_svg import attach_svg_urls
+from calculator import ConstructionCalculator
+
+# Request fields a session tracks, with the defaults /api/calculate uses
+INPUT_DEFAULTS = {
+    "built_up_area": 1000,
+    "floors": "G+2",
+    "daily_wage": None,
+    "cost_per_sq_yard": None,
+    "room_options": None,
+    "room_program": None,
+    "all_floors": False,
+    "floor_programs": None,
+    "stair_core": None,
+    "region": None,
+}
+
+# Which inputs each deterministic output is computed from
+DEPENDS_ON = {
+    "workers": ("built_up_area", "floors"),
+    "costs": ("built_up_area", "floors", "daily_wage", "cost_per_sq_yard", "region"),
+    "materials": ("built_up_area", "floors"),
+    "boq": ("built_up_area", "floors", "region"),
+    "blueprint": ("built_up_area", "floors", "room_options", "room_program", "all_floors",
+                  "floor_programs", "stair_core"),
+    "schedule": ("built_up_area", "floors"),
+    "assumptions": ("cost_per_sq_yard", "daily_wage", "region"),
+}
+
+
+def _compute(calculator, inputs, outputs, name):
+    if name == "workers":
+        return calculator.calculate_workers()
+    if name == "costs":
+        return calculator.calculate_costs(outputs["workers"])
+    if name == "materials":
+        return calculator.calculate_materials()
+    if name == "boq":
+        # only priced from a region, like /api/calculate
+        return calculator.calculate_boq() if calculator.region else None
+    if name == "blueprint":
+        return attach_svg_urls(calculator.generate_blueprint(
+            room_options=inputs["room_options"],
+            room_program=inputs["room_program"],
+            all_floors=bool(inputs["all_floors"]),
+            floor_programs=inputs["floor_programs"],
+            stair_core=inputs["stair_core"]
+        ))
+    if name == "schedule":
+        return calculator.generate_schedule()
+    return calculator.assumptions()
+
+
+class PlanSession:
+    """One user's plan plus everything derived from it, updated by deltas.
+
+    `apply` takes only the fields that changed and recomputes the outputs
+    whose inputs (see `DEPENDS_ON`) actually differ; everything else is kept.
+    Model calls are keyed on the prompt inputs (area, floors, duration), so
+    edits that do not move those, such as the wage or room options, never
+    reach the model.
+    """
+
+    def __init__(self, inputs, session_id=None, version=0):
+        self.id = session_id or uuid.uuid4().hex
+        self.version = version
+        self.inputs = dict(INPUT_DEFAULTS)
+        self.outputs = {}
+        self.ai = {}        # name -> (key, future)
+        self.touched = time.time()
+        self.lock = threading.Lock()
+        self.apply(inputs, initial=True)
+        if version:
+            self.version = version
+
+    def apply(self, changes, initial=False):
+        """Merge `changes` into the inputs; return the names of recomputed outputs.
+
+        Everything is recomputed on copies and committed together, so a change
+        the calculator rejects (ValueError) leaves the session as it was.
+        """
+        unknown = set(changes) - set(INPUT_DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown input(s): {', '.join(sorted(unknown))}")
+        changed = {k for k, v in changes.items() if initial or self.inputs.get(k) != v}
+        inputs = dict(self.inputs, **changes)
+        dirty = [name for name, deps in DEPENDS_ON.items() if initial or changed.intersection(deps)]
+        if not dirty:
+            self.inputs = inputs
+            return []
+
+        calculator = ConstructionCalculator(
+            built_up_area=inputs["built_up_area"],
+            floors=inputs["floors"],
+            daily_wage=inputs["daily_wage"],
+            cost_per_sq_yard=inputs["cost_per_sq_yard"],
+            region=inputs["region"]
+        )
+        outputs = dict(self.outputs)
+        for name in dirty:  # DEPENDS_ON is in dependency order (costs after workers)
+            outputs[name] = _compute(calculator, inputs, outputs, name)
+        self.inputs, self.outputs = inputs, outputs
+        self.version += 1
+        self.touched = time.time()
+        return dirty
+
+    def ai_keys(self):
+        """Prompt inputs of the two model calls; a call is only re-run when its key changes."""
+        costs = self.outputs["costs"]
+        area, floors = self.inputs["built_up_area"], self.inputs["floors"]
+        return {
+            "insight": (area, floors, costs["duration_weeks"]),
+            "schedule": (area, floors, costs["duration_days"]),
+        }
+
+    def refresh_ai(self, submit, names=("insight", "schedule")):
+        """Start the model calls in `names` whose key changed; `submit(name)` returns a Future.
+
+        Returns the names that were (re)started.
+        """
+        started = []
+        for name, key in self.ai_keys().items():
+            if name not in names:
+                continue
+            current = self.ai.get(name)
+            if current is None or current[0] != key:
+                self.ai[name] = (key, submit(name))
+                started.append(name)
+        return started
+
+    def ai_results(self):
+        """({name: result} for finished calls, [names still running])."""
+        done, pending = {}, []
+        for name, (_, future) in self.ai.items():
+            if future.done():
+                done[name] = future.result()
+            else:
+                pending.append(name)
+        return done, pending
+
+
+class SessionStore:
+    """In-memory sessions, dropped after `ttl` seconds idle or beyond `max_sessions` (oldest first).
+
+    With a `backing` cache (an `ai_cache.ResponseCache` on the shared SQLite
+    file) the inputs are saved on every change, so a worker process that has
+    never seen a session rebuilds it from them; with the shared layout and
+    AI caches that costs a few milliseconds.
+    """
+
+    def __init__(self, max_sessions=1000, ttl=3600, backing=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.backing = backing
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.restored = 0
+
+    def create(self, inputs):
+        session = PlanSession(inputs)
+        self._add(session)
+        self.save(session)
+        return session
+
+    def _add(self, session):
+        with self._lock:
+            self._sessions[session.id] = session
+            self._prune()
+
+    def save(self, session):
+        if self.backing is not None:
+            self.backing.set(session.id, {"inputs": session.inputs, "version": session.version})
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                if time.time() - session.touched > self.ttl:
+                    del self._sessions[session_id]
+                    session = None
+                else:
+                    self._sessions.move_to_end(session_id)
+        if self.backing is None:
+            if session is not None:
+                session.touched = time.time()
+            return session
+
+        saved = self.backing.get(session_id)
+        if saved is None:
+            # expired, or deleted through another worker
+            with self._lock:
+                self._sessions.pop(session_id, None)
+            return None
+        if session is None:
+            session = PlanSession(saved["inputs"], session_id=session_id, version=saved["version"])
+            self._add(session)
+            self.restored += 1
+        elif saved["version"] > session.version:
+            # another worker applied edits since; catch up on just those
+            with session.lock:
+                session.apply(saved["inputs"])
+                session.version = saved["version"]
+        # reading a session counts as activity: push back the saved entry's expiry too
+        self.backing.touch(session_id)
+        session.touched = time.time()
+        return session
+
+    def delete(self, session_id):
+        with self._lock:
+            found = self._sessions.pop(session_id, None) is not None
+        if self.backing is not None:
+            found = self.backing.delete(session_id) or found
+        return found
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_sessions and oldest.touched >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "max_sessions": self.max_sessions, "ttl": self.ttl,
+                    "restored": self.restored}
@@ -0,0 +1,234 @@
+import base64
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# Sortable list columns (API name -> column); each has a (column, id) index
+SORT_COLUMNS = {
+    "created": "created",
+    "built_up_area": "built_up_area",
+    "floors": "num_floors",
+    "total_cost": "total_cost",
+}
+# Range filters (query parameter -> (column, operator))
+FILTERS = {
+    "min_area": ("built_up_area", ">="),
+    "max_area": ("built_up_area", "<="),
+    "floors": ("num_floors", "="),
+    "min_cost": ("total_cost", ">="),
+    "max_cost": ("total_cost", "<="),
+    "since": ("created", ">="),
+    "until": ("created", "<"),
+}
+SUMMARY_COLUMNS = ("id", "name", "created", "built_up_area", "floors", "num_floors", "total_cost", "duration_days")
+DETAIL_COLUMNS = ("inputs", "result", "blueprint", "ai_insight", "ai_schedule")
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH = 1000
+_JSON_PATH = re.compile(r"^\$(\.\w+)+$")
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS projects (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        created REAL NOT NULL,
+        built_up_area REAL NOT NULL,
+        floors TEXT NOT NULL,
+        num_floors INTEGER NOT NULL,
+        total_cost REAL NOT NULL,
+        duration_days INTEGER NOT NULL,
+        inputs TEXT NOT NULL,
+        result TEXT NOT NULL,
+        blueprint TEXT,
+        ai_insight TEXT,
+        ai_schedule TEXT,
+        insight_key TEXT,
+        schedule_key TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS projects_created ON projects(created, id)",
+    "CREATE INDEX IF NOT EXISTS projects_area ON projects(built_up_area, id)",
+    "CREATE INDEX IF NOT EXISTS projects_floors ON projects(num_floors, id)",
+    "CREATE INDEX IF NOT EXISTS projects_cost ON projects(total_cost, id)",
+    # partial: only rows that actually hold a model output
+    "CREATE INDEX IF NOT EXISTS projects_insight_key ON projects(insight_key, id) WHERE insight_key IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS projects_schedule_key ON projects(schedule_key, id) WHERE schedule_key IS NOT NULL",
+)
+
+
+def encode_cursor(value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+
+class ProjectStore:
+    """Saved projects and everything computed for them, in one SQLite file.
+
+    Lists page by keyset cursor (`(sort value, id)` of the last row), so a
+    page costs the same at row 50 and row 50,000, and `export_rows` walks
+    the table the same way in fixed-size batches. Model outputs are saved
+    with the engine's normalized prompt key (`insight_key`, `schedule_key`)
+    and `find_ai` returns them for any later plan with matching inputs.
+    """
+
+    def __init__(self, path="projects.db"):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=10000")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        self._lock = threading.Lock()
+        self.ai_hits = 0
+
+    def save(self, inputs, num_floors, result, name=None, ai=None):
+        """Insert a project; `ai` maps "insight"/"schedule" to (key, value). Returns its id."""
+        ai = ai or {}
+        insight_key, insight = ai.get("insight", (None, None))
+        schedule_key, schedule = ai.get("schedule", (None, None))
+        rest = {k: v for k, v in result.items() if k not in ("blueprint", "ai_insight", "ai_pending", "project_id")}
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO projects (name, created, built_up_area, floors, num_floors, total_cost, duration_days,"
+                " inputs, result, blueprint, ai_insight, ai_schedule, insight_key, schedule_key)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, time.time(), float(inputs.get("built_up_area") or 0), str(inputs.get("floors")), num_floors,
+                 result["costs"]["total_cost"], result["costs"]["duration_days"],
+                 json.dumps(inputs), json.dumps(rest), json.dumps(result.get("blueprint")),
+                 json.dumps(result.get("ai_insight")), json.dumps(schedule) if schedule is not None else None,
+                 insight_key, schedule_key))
+            self._db.commit()
+            return cur.lastrowid
+
+    def set_ai(self, project_id, kind, key, value):
+        """Attach a model output that finished after the project was saved."""
+        if kind == "insight":
+            sql = "UPDATE projects SET ai_insight = ?, insight_key = ? WHERE id = ?"
+        else:
+            sql = "UPDATE projects SET ai_schedule = ?, schedule_key = ? WHERE id = ?"
+        with self._lock:
+            self._db.execute(sql, (json.dumps(value), key, project_id))
+            self._db.commit()
+
+    def find_ai(self, kind, key):
+        """Most recent saved model output ("insight" or "schedule") for a prompt key, or None."""
+        column, key_column = ("ai_insight", "insight_key") if kind == "insight" else ("ai_schedule", "schedule_key")
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {column} FROM projects WHERE {key_column} = ? ORDER BY id DESC LIMIT 1", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.ai_hits += 1
+        return json.loads(row[0])
+
+    def get(self, project_id):
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS + DETAIL_COLUMNS)} FROM projects WHERE id = ?", (project_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        project = dict(zip(SUMMARY_COLUMNS, row))
+        detail = dict(zip(DETAIL_COLUMNS, row[len(SUMMARY_COLUMNS):]))
+        project["inputs"] = json.loads(detail["inputs"])
+        project.update(json.loads(detail["result"]))
+        project["blueprint"] = json.loads(detail["blueprint"]) if detail["blueprint"] else None
+        project["ai_insight"] = json.loads(detail["ai_insight"]) if detail["ai_insight"] else None
+        if detail["ai_schedule"]:
+            project["schedule"] = json.loads(detail["ai_schedule"])
+        return project
+
+    def delete(self, project_id):
+        with self._lock:
+            cur = self._db.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+            self._db.commit()
+            return cur.rowcount > 0
+
+    @staticmethod
+    def _where(filters, sort_column, descending, cursor):
+        clauses, params = [], []
+        for name, value in (filters or {}).items():
+            column, op = FILTERS[name]
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+        if cursor is not None:
+            value, row_id = cursor
+            clauses.append(f"({sort_column}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend([value, row_id])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _page(self, columns, filters, sort, descending, cursor, limit):
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"unknown sort '{sort}'; use one of {', '.join(SORT_COLUMNS)}")
+        unknown = set(filters or {}) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"unknown filter(s): {', '.join(sorted(unknown))}")
+        sort_column = SORT_COLUMNS[sort]
+        where, params = self._where(filters, sort_column, descending, cursor)
+        direction = "DESC" if descending else "ASC"
+        sql = (f"SELECT {', '.join(columns)} FROM projects{where}"
+               f" ORDER BY {sort_column} {direction}, id {direction} LIMIT ?")
+        with self._lock:
+            return self._db.execute(sql, params + [limit]).fetchall()
+
+    def list(self, filters=None, sort="created", descending=True, cursor=None, limit=50):
+        """One page of project summaries: `(rows, next_cursor or None)`."""
+        limit = max(1, min(MAX_PAGE_SIZE, int(limit)))
+        rows = self._page(SUMMARY_COLUMNS, filters, sort, descending,
+                          decode_cursor(cursor) if cursor else None, limit + 1)
+        more = len(rows) > limit
+        rows = [dict(zip(SUMMARY_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if more:
+            last = rows[-1]
+            next_cursor = encode_cursor(last[SORT_COLUMNS[sort]], last["id"])
+        return rows, next_cursor
+
+    def export_rows(self, filters=None, sort="created", descending=True, include_blueprint=False, extract=None):
+        """Yield every matching project, `EXPORT_BATCH` rows per query (the lock
+        is released between batches).
+
+        By default a row is the summary plus decoded inputs, result and AI
+        outputs. With `extract` ({name: JSON path into the stored result, e.g.
+        "$.costs.labor_cost"}) it is the summary, `has_ai_insight` and just
+        those values, pulled out by SQLite's json_extract without decoding
+        the whole result in Python.
+        """
+        if extract:
+            bad = [path for path in extract.values() if not _JSON_PATH.match(path)]
+            if bad:
+                raise ValueError(f"invalid JSON path(s): {', '.join(bad)}")
+            names = SUMMARY_COLUMNS + ("has_ai_insight",) + tuple(extract)
+            exprs = SUMMARY_COLUMNS + ("insight_key IS NOT NULL",) + tuple(
+                f"json_extract(result, '{path}')" for path in extract.values())
+            decoded = ()
+        else:
+            decoded = ("inputs", "result", "ai_insight", "ai_schedule") + (("blueprint",) if include_blueprint else ())
+            names = exprs = SUMMARY_COLUMNS + decoded
+        sort_index = names.index(SORT_COLUMNS[sort]) if sort in SORT_COLUMNS else None
+        cursor = None
+        while True:
+            rows = self._page(exprs, filters, sort, descending, cursor, EXPORT_BATCH)
+            for row in rows:
+                record = dict(zip(names, row))
+                for column in decoded:
+                    record[column] = json.loads(record[column]) if record[column] else None
+                yield record
+            if len(rows) < EXPORT_BATCH:
+                return
+            cursor = (rows[-1][sort_index], rows[-1][0])
+
+    def stats(self):
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+        return {"projects": count, "ai_reused": self.ai_hits, "path": self.path}
@@ -0,0 +1,169 @@
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from batch_calc import estimate_arrays
+
+# Uncertain inputs and the calculator attribute that holds their point value
+UNCERTAIN_INPUTS = {
+    "cost_per_sq_yard": "COST_PER_SQ_YARD",
+    "daily_wage": "DAILY_WAGE_PER_WORKER",
+    "overhead_percentage": "OVERHEAD_PERCENTAGE",
+    "productivity": "OUTPUT_PER_WORKER_DAY",
+}
+# Distribution name -> its parameters (see `draw`)
+DISTRIBUTIONS = {
+    "normal": ("mean", "sd"),
+    "lognormal": ("mean", "sigma"),
+    "uniform": ("low", "high"),
+    "triangular": ("low", "mode", "high"),
+    "pert": ("low", "mode", "high"),
+}
+PERCENTILES = (10, 50, 80, 90, 95)
+CHUNK_SIZE = 50000
+
+
+def draw(rng, spec, n):
+    """Draw `n` samples for one input.
+
+    `spec` is a plain number (fixed) or a dict with `dist` set to one of
+    normal(mean, sd), lognormal(mean, sigma), uniform(low, high),
+    triangular(low, mode, high) or pert(low, mode, high).
+    """
+    if not isinstance(spec, dict):
+        return np.full(n, float(spec))
+    dist = spec.get("dist", "normal")
+    if dist == "normal":
+        return rng.normal(spec["mean"], spec["sd"], n)
+    if dist == "lognormal":
+        # parameterized by the median (`mean` of the underlying value) and log-sigma
+        return spec["mean"] * rng.lognormal(0.0, spec["sigma"], n)
+    if dist == "uniform":
+        return rng.uniform(spec["low"], spec["high"], n)
+    if dist == "triangular":
+        return rng.triangular(spec["low"], spec["mode"], spec["high"], n)
+    if dist == "pert":
+        low, mode, high = spec["low"], spec["mode"], spec["high"]
+        if high <= low:
+            return np.full(n, float(mode))
+        alpha = 1 + 4 * (mode - low) / (high - low)
+        beta = 1 + 4 * (high - mode) / (high - low)
+        return low + rng.beta(alpha, beta, n) * (high - low)
+    raise ValueError(f"unknown distribution '{dist}'")
+
+
+def validate_spec(name, spec):
+    """Raise ValueError unless `spec` is a number or a known distribution with
+    numeric parameters that numpy accepts (checked with a one-sample draw)."""
+    if isinstance(spec, dict):
+        dist = spec.get("dist", "normal")
+        params = DISTRIBUTIONS.get(dist)
+        if params is None:
+            raise ValueError(f"{name}: unknown distribution '{dist}'; use one of {', '.join(DISTRIBUTIONS)}")
+        missing = [p for p in params if not isinstance(spec.get(p), (int, float)) or isinstance(spec.get(p), bool)]
+        if missing:
+            raise ValueError(f"{name}: {dist} needs numeric {', '.join(missing)}")
+    else:
+        try:
+            float(spec)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name}: expected a number or a distribution object") from None
+    try:
+        draw(np.random.default_rng(0), spec, 1)
+    except ValueError as e:
+        raise ValueError(f"{name}: {e}") from None
+
+
+def _simulate_chunk(args):
+    seed, n, area, num_floors, specs, boq = args
+    rng = np.random.default_rng(seed)
+    rate = np.maximum(0.0, draw(rng, specs["cost_per_sq_yard"], n))
+    wage = np.maximum(0.0, draw(rng, specs["daily_wage"], n))
+    overhead = np.maximum(0.0, draw(rng, specs["overhead_percentage"], n))
+    productivity = np.maximum(0.1, draw(rng, specs["productivity"], n))
+    material = None
+    if boq is not None:
+        # priced from a regional BOQ: the rate draws scale its total around the point rate
+        total, point_rate = boq
+        material = total * (rate / point_rate)
+    arrays = estimate_arrays(area, num_floors, wage, rate, overhead, productivity, material)
+    return arrays["total_cost"], arrays["duration_days"]
+
+
+def _summary(samples):
+    pct = np.percentile(samples, PERCENTILES)
+    out = {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, pct)}
+    out.update({
+        "mean": round(float(samples.mean()), 2),
+        "std": round(float(samples.std()), 2),
+        "min": round(float(samples.min()), 2),
+        "max": round(float(samples.max()), 2),
+    })
+    return out
+
+
+def _histogram(samples, bins):
+    if samples.min() == samples.max():
+        return {"edges": [float(samples.min()), float(samples.max())], "counts": [int(samples.size)]}
+    counts, edges = np.histogram(samples, bins=bins)
+    return {"edges": np.round(edges, 2).tolist(), "counts": counts.tolist()}
+
+
+def simulate(calculator, distributions=None, samples=100000, seed=42, bins=40, workers=1, start_date=None):
+    """Monte Carlo cost and schedule risk for one project.
+
+    Inputs not listed in `distributions` stay at the calculator's point
+    value. With a `region` the material cost is the BOQ total, and draws of
+    `cost_per_sq_yard` act as a price factor on it (draw / point value). Samples are generated in fixed-size chunks, each from its own
+    child of `seed`, so results are identical whether the chunks run in this
+    process or across a `workers`-sized process pool.
+    """
+    distributions = distributions or {}
+    unknown = set(distributions) - set(UNCERTAIN_INPUTS)
+    if unknown:
+        raise ValueError(f"unknown uncertain input(s): {', '.join(sorted(unknown))}")
+    specs = {name: distributions.get(name, getattr(calculator, attr)) for name, attr in UNCERTAIN_INPUTS.items()}
+    for name, spec in specs.items():
+        validate_spec(name, spec)
+    start = datetime.date.fromisoformat(start_date) if start_date else None
+
+    samples = int(samples)
+    if samples < 1:
+        raise ValueError("samples must be positive")
+    if int(bins) < 1:
+        raise ValueError("bins must be positive")
+    sizes = [CHUNK_SIZE] * (samples // CHUNK_SIZE)
+    if samples % CHUNK_SIZE:
+        sizes.append(samples % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    boq = None
+    if calculator.region:
+        boq = (calculator.calculate_boq()["total"], float(calculator.COST_PER_SQ_YARD))
+    jobs = [(s, n, calculator.built_up_area_yards, calculator.num_floors, specs, boq) for s, n in zip(seeds, sizes)]
+
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_chunk, jobs))
+    else:
+        parts = [_simulate_chunk(job) for job in jobs]
+
+    cost = np.concatenate([p[0] for p in parts])
+    days = np.concatenate([p[1] for p in parts])
+
+    result = {
+        "samples": samples,
+        "seed": seed,
+        "inputs": specs,
+        "total_cost": _summary(cost),
+        "duration_days": _summary(days),
+        "histograms": {
+            "total_cost": _histogram(cost, bins),
+            "duration_days": _histogram(days, bins),
+        },
+    }
+    if start is not None:
+        result["completion_dates"] = {
+            f"p{p}": (start + datetime.timedelta(days=int(np.ceil(d)))).isoformat()
+            for p, d in zip(PERCENTILES, np.percentile(days, PERCENTILES))
+        }
+    return result
@@ -0,0 +1,360 @@
+import bisect
+import heapq
+import math
+from collections import deque
+from functools import lru_cache
+
+# Crew trades from ConstructionCalculator.calculate_workers, in resource-index order
+TRADES = ("masons", "helpers", "steel_workers", "carpenters", "supervisors")
+_TRADE_INDEX = {t: i for i, t in enumerate(TRADES)}
+
+ZONE_SQ_YARDS = 250       # a floor plate is worked in zones of about this size
+MAX_ZONES = 50
+TARGET_TASK_DAYS = 3      # zone gangs are sized to finish their share of work in about this many days
+SUPERVISOR_SPAN = 4       # concurrent tasks one supervisor can oversee
+CURING_DAYS = 7           # slab/footing concrete before the next lift is loaded
+DESHUTTER_DAYS = 14       # slab props stay until masonry below can start
+MAX_WEEK_ENTRIES = 26     # same cap as the model schedule (ai_engine.MAX_SCHEDULE_ENTRIES)
+SCHEDULE_CACHE_SIZE = 256
+
+# (key, label, phase, lead trade, sq yards per lead worker-day, {support trade: gang size relative to lead})
+SITE = ("site", "Site clearing & temporary facilities", "Site Preparation", "helpers", 60.0, {})
+SUBSTRUCTURE = (
+    ("excavation", "Excavation", "Foundation Work", "helpers", 4.0, {}),
+    ("footings", "Footings & foundation concrete", "Foundation Work", "masons", 6.0,
+     {"steel_workers": 0.5, "helpers": 1.0}),
+    ("plinth", "Plinth beam & backfill", "Foundation Work", "steel_workers", 10.0, {"masons": 0.5, "helpers": 1.0}),
+)
+FLOOR_ACTIVITIES = (
+    ("columns", "Columns", "Column & Slab Construction", "steel_workers", 8.0, {"carpenters": 1.0, "helpers": 1.0}),
+    ("formwork", "Slab formwork", "Column & Slab Construction", "carpenters", 6.0, {"helpers": 1.0}),
+    ("rebar", "Slab reinforcement", "Column & Slab Construction", "steel_workers", 8.0, {"helpers": 0.5}),
+    ("pour", "Slab concreting", "Column & Slab Construction", "masons", 30.0, {"helpers": 2.0}),
+    ("masonry", "Brickwork & masonry", "Brickwork & Masonry", "masons", 4.0, {"helpers": 1.0}),
+    ("mep", "Electrical & plumbing rough-in", "Electrical & Plumbing", "helpers", 10.0, {}),
+    ("plaster", "Plastering", "Plastering", "masons", 5.0, {"helpers": 1.0}),
+    ("finishes", "Flooring, doors, windows & painting", "Finishing", "masons", 6.0,
+     {"carpenters": 0.5, "helpers": 1.0}),
+)
+HANDOVER = ("handover", "Cleaning, inspection & handover", "Final Finishing", "helpers", 200.0, {})
+
+
+class _Graph:
+    """Tasks as parallel lists; `preds[i]` holds (task, lag_days) pairs."""
+
+    def __init__(self, workers):
+        self.limits = [max(1, int(workers.get(t, 1))) for t in TRADES]
+        self.limits[_TRADE_INDEX["supervisors"]] *= SUPERVISOR_SPAN
+        self.labels, self.phases, self.floors = [], [], []
+        self.durations, self.demands, self.preds = [], [], []
+        self._sizes = {}
+
+    def _sizing(self, activity, area):
+        """(duration days, ((trade index, crew), ...)) for one task; every zone shares it.
+
+        The lead gang comes from the task's own work (area / rate worker-days),
+        sized to finish in about TARGET_TASK_DAYS and capped by the trade, so
+        small zones book small gangs and leave the rest of the trade free.
+        """
+        sizing = self._sizes.get((activity[0], area))
+        if sizing is None:
+            _, _, _, lead, rate, support = activity
+            lead_i = _TRADE_INDEX[lead]
+            work = area / rate
+            gang = min(self.limits[lead_i], max(1, math.ceil(work / TARGET_TASK_DAYS)))
+            demand = {lead_i: gang, _TRADE_INDEX["supervisors"]: 1}
+            for trade, share in support.items():
+                i = _TRADE_INDEX[trade]
+                demand[i] = min(self.limits[i], max(1, math.ceil(gang * share)))
+            sizing = self._sizes[(activity[0], area)] = (max(1, math.ceil(work / gang)), tuple(demand.items()))
+        return sizing
+
+    def add(self, activity, area, floor=None, preds=()):
+        duration, demand = self._sizing(activity, area)
+        self.labels.append(activity[1])
+        self.phases.append(activity[2])
+        self.floors.append(floor)
+        self.durations.append(duration)
+        self.demands.append(demand)
+        self.preds.append(tuple(preds))
+        return len(self.labels) - 1
+
+
+def build_graph(area_yards, num_floors, workers):
+    """Task graph for a building: substructure per zone, then one chain per floor and zone.
+
+    Column lifts wait for the slab below to cure, masonry waits for the slab
+    above it to be de-shuttered, and services and finishes follow masonry
+    floor by floor.
+    """
+    graph = _Graph(workers)
+    zones = max(1, min(MAX_ZONES, math.ceil(area_yards / ZONE_SQ_YARDS)))
+    zone_area = area_yards / zones
+
+    site = graph.add(SITE, area_yards)
+    below = []
+    for _ in range(zones):
+        previous, lag = site, 0
+        for activity in SUBSTRUCTURE:
+            previous = graph.add(activity, zone_area, preds=((previous, lag),))
+            lag = CURING_DAYS if activity[0] == "footings" else 0
+        below.append((previous, 0))
+
+    finishes = []
+    for floor in range(num_floors):
+        for zone in range(zones):
+            task = graph.add(FLOOR_ACTIVITIES[0], zone_area, floor, preds=(below[zone],))
+            for activity in FLOOR_ACTIVITIES[1:]:
+                lag = DESHUTTER_DAYS if activity[0] == "masonry" else 0
+                previous = task
+                task = graph.add(activity, zone_area, floor, preds=((previous, lag),))
+                if activity[0] == "pour":
+                    below[zone] = (task, CURING_DAYS)
+            finishes.append((task, 0))
+
+    graph.add(HANDOVER, area_yards * num_floors, preds=finishes)
+    return graph
+
+
+def topological_order(preds):
+    """Kahn's algorithm over predecessor lists, O(tasks + edges)."""
+    n = len(preds)
+    succs = [[] for _ in range(n)]
+    indegree = [len(p) for p in preds]
+    for i, task_preds in enumerate(preds):
+        for p, lag in task_preds:
+            succs[p].append((i, lag))
+    ready = deque(i for i in range(n) if not indegree[i])
+    order = []
+    while ready:
+        i = ready.popleft()
+        order.append(i)
+        for s, _ in succs[i]:
+            indegree[s] -= 1
+            if not indegree[s]:
+                ready.append(s)
+    if len(order) != n:
+        raise ValueError("task graph has a cycle")
+    return order, succs
+
+
+def critical_path(graph):
+    """Unconstrained forward/backward pass: (earliest starts, latest starts, makespan)."""
+    order, succs = topological_order(graph.preds)
+    durations = graph.durations
+    es = [0] * len(durations)
+    for i in order:
+        for p, lag in graph.preds[i]:
+            es[i] = max(es[i], es[p] + durations[p] + lag)
+    makespan = max((es[i] + durations[i] for i in order), default=0)
+    ls = [0] * len(durations)
+    for i in reversed(order):
+        latest_finish = min((ls[s] - lag for s, lag in succs[i]), default=makespan)
+        ls[i] = latest_finish - durations[i]
+    return es, ls, makespan
+
+
+def level(graph, ls):
+    """Parallel schedule generation: walk forward through the days on which
+    something finishes or becomes ready and, at each, start every ready task
+    whose crews are free, least latest start first. Crews are only booked
+    from the current day on, so a check against what is free right now is
+    enough. Returns start days."""
+    durations, demands, preds = graph.durations, graph.demands, graph.preds
+    n = len(durations)
+    free = list(graph.limits)
+    start = [0] * n
+    waiting = [len(p) for p in preds]
+    ready_at = [0] * n
+    succs = [[] for _ in range(n)]
+    for i, task_preds in enumerate(preds):
+        for p, lag in task_preds:
+            succs[p].append((i, lag))
+
+    released = [(0, i) for i in range(n) if not waiting[i]]   # (ready day, task)
+    heapq.heapify(released)
+    running = []                                                # (finish day, task)
+    # ready tasks grouped by crew demand, each sorted by (latest start, task): once the
+    # head of a group does not fit, nothing behind it does either
+    eligible = {demand: [] for demand in set(demands)}
+    now = 0
+    while released or running:
+        while running and running[0][0] <= now:
+            _, i = heapq.heappop(running)
+            for r, units in demands[i]:
+                free[r] += units
+            for s, lag in succs[i]:
+                ready_at[s] = max(ready_at[s], now + lag)
+                waiting[s] -= 1
+                if not waiting[s]:
+                    heapq.heappush(released, (ready_at[s], s))
+        while released and released[0][0] <= now:
+            _, i = heapq.heappop(released)
+            bisect.insort(eligible[demands[i]], (ls[i], i))
+
+        heads = [(group[0], demand) for demand, group in eligible.items() if group]
+        heapq.heapify(heads)
+        while heads:
+            (_, i), demand = heapq.heappop(heads)
+            if all(free[r] >= units for r, units in demand):
+                for r, units in demand:
+                    free[r] -= units
+                start[i] = now
+                heapq.heappush(running, (now + durations[i], i))
+                group = eligible[demand]
+                del group[0]
+                if group:
+                    heapq.heappush(heads, (group[0], demand))
+
+        upcoming = [h[0][0] for h in (running, released) if h]
+        if not upcoming:
+            break
+        now = min(upcoming)
+    return start
+
+
+def _floor_name(floor):
+    return "G" if floor == 0 else str(floor)
+
+
+def _floor_span(floors):
+    floors = sorted(floors)
+    if floors[0] == floors[-1]:
+        return f"floor {_floor_name(floors[0])}"
+    return f"floors {_floor_name(floors[0])}-{_floor_name(floors[-1])}"
+
+
+def _resource_chain(graph, start, finish, last):
+    """Walk back from the last task along whatever held each task back: a
+    predecessor finishing (plus lag) exactly at its start, or else a task that
+    shares a trade and released it that day."""
+    by_finish = {}
+    for i, f in enumerate(finish):
+        by_finish.setdefault(f, []).append(i)
+    chain = [last]
+    i = last
+    while start[i] > 0:
+        driver = None
+        for p, lag in graph.preds[i]:
+            if finish[p] + lag == start[i]:
+                driver = p
+                break
+        if driver is None:
+            trades = {r for r, _ in graph.demands[i]}
+            for j in by_finish.get(start[i], ()):
+                if j != i and trades.intersection(r for r, _ in graph.demands[j]):
+                    driver = j
+                    break
+        if driver is None:
+            break
+        chain.append(driver)
+        i = driver
+    chain.reverse()
+    return chain
+
+
+def _chain_segments(graph, chain, start, finish):
+    """Merge consecutive chain tasks of the same activity and floor."""
+    segments = []
+    for i in chain:
+        label, floor = graph.labels[i], graph.floors[i]
+        if segments and segments[-1]["activity"] == label and segments[-1]["floor"] == floor:
+            segments[-1]["finish_day"] = finish[i]
+            continue
+        segments.append({"activity": label, "phase": graph.phases[i], "floor": floor,
+                         "start_day": start[i], "finish_day": finish[i]})
+    for s in segments:
+        s["floor"] = None if s["floor"] is None else _floor_name(s["floor"])
+    return segments
+
+
+def _weekly(graph, start, finish, chain, makespan):
+    """Group the leveled tasks into at most MAX_WEEK_ENTRIES week windows.
+
+    Each entry is `{"week", "phase", "activities"}` like the model schedule;
+    the phase is the one on the critical chain when the window opens.
+    """
+    total_weeks = max(1, math.ceil(makespan / 7.0))
+    per_entry = math.ceil(total_weeks / MAX_WEEK_ENTRIES)
+    window = per_entry * 7
+    entries = math.ceil(total_weeks / per_entry)
+    active = [{} for _ in range(entries)]     # label -> floors worked in the window
+    for i, label in enumerate(graph.labels):
+        for w in range(start[i] // window, (finish[i] - 1) // window + 1):
+            active[w].setdefault(label, set()).add(graph.floors[i])
+
+    weeks = []
+    c = 0
+    for w in range(entries):
+        opens = w * window
+        while c + 1 < len(chain) and finish[chain[c]] <= opens:
+            c += 1
+        activities = []
+        for label, floors in active[w].items():
+            floors.discard(None)
+            activities.append(f"{label} ({_floor_span(floors)})" if floors else label)
+        weeks.append({"week": w * per_entry + 1, "phase": graph.phases[chain[c]], "activities": activities})
+    return weeks
+
+
+def schedule_project(area_yards, num_floors, workers, include_tasks=False):
+    """Critical-path schedule for the building, leveled to the crew sizes in `workers`.
+
+    Returns `leveled_days`/`leveled_weeks` of the leveled plan,
+    `unleveled_days` (precedence only, unlimited crews), the resource-driven
+    `critical_path`, average `utilization` per trade, and `weeks` in the
+    weekly-entry shape the UI and the model schedule use. `include_tasks`
+    adds every task with its start and finish day.
+    """
+    result = _cached_schedule(float(area_yards), max(1, int(num_floors)),
+                              tuple(sorted((t, workers.get(t, 1)) for t in TRADES)), include_tasks)
+    # structure-aware copy so callers can't mutate the cached entry
+    out = dict(result, utilization=dict(result["utilization"]),
+               critical_path=[dict(s) for s in result["critical_path"]],
+               weeks=[dict(w, activities=list(w["activities"])) for w in result["weeks"]])
+    if include_tasks:
+        out["tasks"] = [dict(t) for t in result["tasks"]]
+    return out
+
+
+def schedule_cache_info():
+    return _cached_schedule.cache_info()
+
+
+def clear_schedule_cache():
+    _cached_schedule.cache_clear()
+
+
+@lru_cache(maxsize=SCHEDULE_CACHE_SIZE)
+def _cached_schedule(area_yards, num_floors, workers_key, include_tasks):
+    graph = build_graph(area_yards, num_floors, dict(workers_key))
+    _, ls, unleveled = critical_path(graph)
+    start = level(graph, ls)
+    finish = [s + d for s, d in zip(start, graph.durations)]
+    busy = [0] * len(TRADES)     # crew-days booked per trade
+    for i, d in enumerate(graph.durations):
+        for r, units in graph.demands[i]:
+            busy[r] += units * d
+    makespan = max(finish)
+    chain = _resource_chain(graph, start, finish, max(range(len(finish)), key=finish.__getitem__))
+
+    result = {
+        "leveled_days": makespan,
+        "leveled_weeks": math.ceil(makespan / 7.0),
+        "unleveled_days": unleveled,
+        "task_count": len(start),
+        "critical_path": _chain_segments(graph, chain, start, finish),
+        "utilization": {
+            trade: round(100.0 * busy[r] / (graph.limits[r] * makespan), 1)
+            for r, trade in enumerate(TRADES)
+        },
+        "weeks": _weekly(graph, start, finish, chain, makespan),
+    }
+    if include_tasks:
+        result["tasks"] = [
+            {"activity": graph.labels[i], "phase": graph.phases[i],
+             "floor": None if graph.floors[i] is None else _floor_name(graph.floors[i]),
+             "start_day": start[i], "finish_day": finish[i]}
+            for i in range(len(start))
+        ]
+    return result
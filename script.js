@@ -1,5 +1,9 @@
 // Wire the form and render results into the template's IDs
 let roomOptionsObj = {};
+// Inputs of the plan on screen and its /api/sessions id, so room-builder
+// edits re-render only the blueprint instead of re-running the whole plan
+let lastPlanData = null;
+let planSessionId = null;
 document.getElementById('planner-form').addEventListener('submit', async function(e) {
     e.preventDefault();
 
@@ -9,29 +13,29 @@ document.getElementById('planner-form').addEventListener('submit', async functio
     submitBtn.disabled = true;
 
     // Read form values from template
+    const floors = Number(document.getElementById('floors').value) || 1;
     const data = {
         built_up_area: Number(document.getElementById('area').value) || 100,
-        floors: Number(document.getElementById('floors').value) || 1,
-        target_timeline: Number(document.getElementById('timeline').value) || undefined
+        floors: floors,
+        target_timeline: Number(document.getElementById('timeline').value) || undefined,
+        // one plan per floor, not just the ground floor, for multi-storey buildings
+        all_floors: floors > 1,
+        // compact columnar blueprint; decodeBlueprint() expands it
+        blueprint_format: 'columnar'
     };
+    const region = document.getElementById('region').value;
+    if (region) data.region = region;
     if (roomOptionsObj && Object.keys(roomOptionsObj).length) data.room_options = roomOptionsObj;
 
     // show loading
     document.getElementById('loading').classList.remove('hidden');
     document.getElementById('results').classList.add('hidden');
 
+    lastPlanData = null;
+    planSessionId = null;
     try {
-        const res = await fetch('/api/calculate', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(data)
-        });
-        const result = await res.json();
-        if (!res.ok) throw new Error(result.error || 'Calculation failed');
-
-        renderResults(result, data);
-        document.getElementById('results').classList.remove('hidden');
-        document.getElementById('results').scrollIntoView({ behavior: 'smooth' });
+        await streamPlan(data);
+        lastPlanData = data;
     } catch (err) {
         alert('Error: ' + err.message);
     } finally {
@@ -41,7 +45,117 @@ document.getElementById('planner-form').addEventListener('submit', async functio
     }
 });
 
+// Consume /api/calculate/stream (Server-Sent Events over a POST fetch):
+// numbers render as soon as `calculation` arrives. Tokens are raw model output (JSON
+// fragments), so they only drive a progress count until the parsed `insight`/`schedule`.
+async function streamPlan(data) {
+    const res = await fetch('/api/calculate/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    });
+    if (!res.ok) {
+        const err = await res.json().catch(() => ({}));
+        throw new Error(err.error || 'Calculation failed');
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let insightChars = 0;
+    let scheduleChars = 0;
+
+    function handle(event, payload) {
+        if (event === 'calculation') {
+            renderResults(Object.assign({}, payload, { ai_insight: null, schedule: null }), data);
+            document.getElementById('ai-summary').innerText = 'Generating AI insights...';
+            document.getElementById('ai-schedule').innerText = 'Generating schedule...';
+            document.getElementById('loading').classList.add('hidden');
+            document.getElementById('results').classList.remove('hidden');
+            document.getElementById('results').scrollIntoView({ behavior: 'smooth' });
+        } else if (event === 'insight_token') {
+            insightChars += payload.token.length;
+            document.getElementById('ai-summary').innerText = `Generating AI insights... (${insightChars} characters)`;
+        } else if (event === 'schedule_token') {
+            scheduleChars += payload.token.length;
+            document.getElementById('ai-schedule').innerText = `Generating schedule... (${scheduleChars} characters)`;
+        } else if (event === 'insight') {
+            renderInsight(payload);
+        } else if (event === 'schedule') {
+            renderSchedule(payload);
+        }
+    }
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let sep;
+        while ((sep = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            let event = 'message';
+            let payload = '';
+            message.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) payload += line.slice(6);
+            });
+            handle(event, payload ? JSON.parse(payload) : null);
+        }
+    }
+}
+
 function renderResults(result, input) {
+    renderInsight(result.ai_insight);
+
+    // Costs
+    const costEl = document.getElementById('cost-details');
+    if (result.costs) {
+        const c = result.costs;
+        costEl.innerHTML = `
+            <div><strong>Material:</strong> ₹${numberWithCommas(Math.round(c.material_cost))}</div>
+            <div><strong>Labor:</strong> ₹${numberWithCommas(Math.round(c.labor_cost))}</div>
+            <div><strong>Overhead:</strong> ₹${numberWithCommas(Math.round(c.overhead))}</div>
+            <div style="margin-top:8px; border-top:1px solid #ddd; padding-top:8px;"><strong>Total:</strong> ₹${numberWithCommas(Math.round(c.total_cost))}</div>
+        `;
+    }
+
+    // Labor
+    const laborEl = document.getElementById('labor-details');
+    if (result.workers) {
+        let html = '';
+        for (const [k, v] of Object.entries(result.workers)) {
+            html += `<div><strong>${k.replace('_',' ').toUpperCase()}:</strong> ${v}</div>`;
+        }
+        html += `<div style="margin-top:8px;"><strong>TOTAL WORKERS:</strong> ${result.total_workers}</div>`;
+        laborEl.innerHTML = html;
+    }
+
+    // Materials
+    const matEl = document.getElementById('material-details');
+    if (result.materials) {
+        let html = '';
+        for (const [k, v] of Object.entries(result.materials)) {
+            html += `<div><strong>${k.toUpperCase()}:</strong> ${v}</div>`;
+        }
+        matEl.innerHTML = html;
+    }
+
+    renderBoq(result.boq);
+    renderBlueprint(result.blueprint);
+    renderSchedule(result.schedule);
+
+    // Assumptions
+    const assumptionsEl = document.getElementById('assumptions');
+    if (assumptionsEl && result.assumptions) {
+        assumptionsEl.innerHTML = `
+            <div><strong>Location:</strong> ${result.assumptions.location}</div>
+            <div><strong>Rate:</strong> ₹${result.assumptions.cost_per_sq_yard}/sq yard</div>
+        `;
+    }
+}
+
+function renderInsight(aiInsight) {
     // AI Insights (structured)
     const aiBox = document.getElementById('ai-insights');
     const aiSummary = document.getElementById('ai-summary');
@@ -67,10 +181,10 @@ function renderResults(result, input) {
         return s;
     }
 
-    if (result.ai_insight) {
-        if (result.ai_insight.ok && Array.isArray(result.ai_insight.insights)) {
+    if (aiInsight) {
+        if (aiInsight.ok && Array.isArray(aiInsight.insights)) {
             // sanitize each insight and filter out empty/heading-only items
-            const cleaned = result.ai_insight.insights.map(sanitize).filter(Boolean);
+            const cleaned = aiInsight.insights.map(sanitize).filter(Boolean);
             // if first cleaned item is a short heading like "Analysis...", drop it
             if (cleaned.length && /^Analysis/i.test(cleaned[0])) cleaned.shift();
 
@@ -86,19 +200,19 @@ function renderResults(result, input) {
             });
             aiBox.appendChild(ul);
 
-            if (result.ai_insight.raw && result.ai_insight.raw.includes('AI Model Offline')) {
+            if (aiInsight.raw && aiInsight.raw.includes('AI Model Offline')) {
                 aiBox.classList.add('ai-offline');
                 aiSummary.classList.add('ai-offline');
             } else {
                 aiBox.classList.remove('ai-offline');
                 aiSummary.classList.remove('ai-offline');
             }
-        } else if (typeof result.ai_insight === 'string') {
-            const s = sanitize(result.ai_insight);
+        } else if (typeof aiInsight === 'string') {
+            const s = sanitize(aiInsight);
             aiSummary.innerText = s.split('\n')[0] || s;
             aiBox.innerText = s;
-        } else if (result.ai_insight.insights) {
-            const cleaned = result.ai_insight.insights.map(sanitize).filter(Boolean);
+        } else if (aiInsight.insights) {
+            const cleaned = aiInsight.insights.map(sanitize).filter(Boolean);
             aiSummary.innerText = cleaned[0] || 'AI recommendations available.';
             aiBox.innerText = cleaned.join('\n');
         }
@@ -120,183 +234,135 @@ function renderResults(result, input) {
             aiToggle.innerText = 'Hide details';
         }
     };
+}
 
-    // Costs
-    const costEl = document.getElementById('cost-details');
-    if (result.costs) {
-        const c = result.costs;
-        costEl.innerHTML = `
-            <div><strong>Material:</strong> ₹${numberWithCommas(Math.round(c.material_cost))}</div>
-            <div><strong>Labor:</strong> ₹${numberWithCommas(Math.round(c.labor_cost))}</div>
-            <div><strong>Overhead:</strong> ₹${numberWithCommas(Math.round(c.overhead))}</div>
-            <div style="margin-top:8px; border-top:1px solid #ddd; padding-top:8px;"><strong>Total:</strong> ₹${numberWithCommas(Math.round(c.total_cost))}</div>
-        `;
-    }
-
-    // Labor
-    const laborEl = document.getElementById('labor-details');
-    if (result.workers) {
-        let html = '';
-        for (const [k, v] of Object.entries(result.workers)) {
-            html += `<div><strong>${k.replace('_',' ').toUpperCase()}:</strong> ${v}</div>`;
+// Expand the server's "columnar-1" blueprint encoding (see blueprint_codec.py)
+// into the plain [{floor, canvas, rooms: [{..., doors, windows}], svg}] list.
+// Plain blueprints pass through unchanged.
+function decodeBlueprint(encoded) {
+    if (!encoded || encoded.encoding !== 'columnar-1') return encoded;
+    const { strings: str, floors, rooms, doors, windows } = encoded;
+    const next = { room: 0, doors: 0, windows: 0 };
+    const openings = (kind, table, count) => {
+        const items = [];
+        for (let i = next[kind]; i < next[kind] + count; i++) {
+            items.push({ x: table.x[i], y: table.y[i], w: table.w[i], h: table.h[i],
+                         orientation: str[table.orientation[i]] });
         }
-        html += `<div style="margin-top:8px;"><strong>TOTAL WORKERS:</strong> ${result.total_workers}</div>`;
-        laborEl.innerHTML = html;
-    }
-
-    // Materials
-    const matEl = document.getElementById('material-details');
-    if (result.materials) {
-        let html = '';
-        for (const [k, v] of Object.entries(result.materials)) {
-            html += `<div><strong>${k.toUpperCase()}:</strong> ${v}</div>`;
+        next[kind] += count;
+        return items;
+    };
+    return floors.rooms.map((count, f) => {
+        const floorRooms = [];
+        for (let r = next.room; r < next.room + count; r++) {
+            floorRooms.push({
+                name: str[rooms.name[r]], area_sq_ft: rooms.area_sq_ft[r], dims: str[rooms.dims[r]],
+                x: rooms.x[r], y: rooms.y[r], w: rooms.w[r], h: rooms.h[r],
+                doors: openings('doors', doors, rooms.doors[r]),
+                windows: openings('windows', windows, rooms.windows[r])
+            });
         }
-        matEl.innerHTML = html;
-    }
+        next.room += count;
+        const floor = { floor: str[floors.floor[f]], canvas: { w: floors.canvas_w[f], h: floors.canvas_h[f] },
+                        rooms: floorRooms };
+        if (floors.svg[f] != null) floor.svg = floors.svg[f];
+        return floor;
+    });
+}
 
-    // Blueprint (render SVG floor plans)
+function renderBlueprint(blueprint) {
+    // Floor plans are rendered to SVG on the server; each floor carries the
+    // URL of its drawing (content-addressed, so the browser caches it for good)
     const bpEl = document.getElementById('blueprint-details');
     bpEl.innerHTML = '';
-    if (result.blueprint && Array.isArray(result.blueprint)) {
-        result.blueprint.forEach(f => {
-            const container = document.createElement('div');
-            container.className = 'floor';
-            const title = document.createElement('h4');
-            title.textContent = f.floor;
-            container.appendChild(title);
-
-            // export SVG button
-            const exportBtn = document.createElement('button');
-            exportBtn.type = 'button';
-            exportBtn.textContent = 'Export SVG';
-            exportBtn.style.marginBottom = '6px';
-            exportBtn.className = 'btn';
-            container.appendChild(exportBtn);
-
-            const svgNS = 'http://www.w3.org/2000/svg';
-            const canvasW = (f.canvas && f.canvas.w) ? f.canvas.w : 760;
-            const canvasH = (f.canvas && f.canvas.h) ? f.canvas.h : 300;
-            const svg = document.createElementNS(svgNS, 'svg');
-            svg.setAttribute('width', canvasW);
-            svg.setAttribute('height', canvasH);
-            svg.setAttribute('viewBox', `0 0 ${canvasW} ${canvasH}`);
-            svg.style.border = '1px solid #e2e8f0';
-            svg.style.borderRadius = '8px';
-            svg.style.background = '#fff';
-
-            // draw rooms
-            if (Array.isArray(f.rooms)) {
-                f.rooms.forEach((r, idx) => {
-                    const rect = document.createElementNS(svgNS, 'rect');
-                    rect.setAttribute('x', r.x);
-                    rect.setAttribute('y', r.y);
-                    rect.setAttribute('width', r.w);
-                    rect.setAttribute('height', r.h);
-                    rect.setAttribute('fill', '#f8fafc');
-                    rect.setAttribute('stroke', '#94a3b8');
-                    rect.setAttribute('stroke-width', '1');
-                    svg.appendChild(rect);
-
-                    // room label
-                    const text = document.createElementNS(svgNS, 'text');
-                    text.setAttribute('x', r.x + Math.max(6, r.w / 10));
-                    text.setAttribute('y', r.y + 20);
-                    text.setAttribute('font-size', '12');
-                    text.setAttribute('fill', '#0f172a');
-                    text.textContent = r.name;
-                    svg.appendChild(text);
-
-                    // dims smaller text
-                    const dims = document.createElementNS(svgNS, 'text');
-                    dims.setAttribute('x', r.x + Math.max(6, r.w / 10));
-                    dims.setAttribute('y', r.y + 36);
-                    dims.setAttribute('font-size', '11');
-                    dims.setAttribute('fill', '#475569');
-                    dims.textContent = r.dims;
-                    svg.appendChild(dims);
-
-                    // draw doors if present (array)
-                    if (Array.isArray(r.doors)) {
-                        r.doors.forEach(function(d) {
-                            const door = document.createElementNS(svgNS, 'rect');
-                            door.setAttribute('x', d.x);
-                            door.setAttribute('y', d.y);
-                            door.setAttribute('width', d.w);
-                            door.setAttribute('height', d.h);
-                            door.setAttribute('fill', '#8b5a2b');
-                            door.setAttribute('stroke', '#5a3820');
-                            door.setAttribute('stroke-width', '1');
-                            svg.appendChild(door);
-
-                            // label
-                            const dl = document.createElementNS(svgNS, 'text');
-                            dl.setAttribute('x', d.x + Math.max(6, d.w / 2));
-                            dl.setAttribute('y', d.y + Math.max(6, d.h / 2));
-                            dl.setAttribute('font-size', '10');
-                            dl.setAttribute('fill', '#fff');
-                            dl.setAttribute('text-anchor', 'middle');
-                            dl.setAttribute('dominant-baseline', 'middle');
-                            dl.textContent = 'D';
-                            svg.appendChild(dl);
-                        });
-                    }
-
-                    // draw windows if present
-                    if (Array.isArray(r.windows)) {
-                        r.windows.forEach(function(win) {
-                            const wRect = document.createElementNS(svgNS, 'rect');
-                            wRect.setAttribute('x', win.x);
-                            wRect.setAttribute('y', win.y);
-                            wRect.setAttribute('width', win.w);
-                            wRect.setAttribute('height', win.h);
-                            wRect.setAttribute('fill', '#e0f2ff');
-                            wRect.setAttribute('stroke', '#60a5fa');
-                            wRect.setAttribute('stroke-width', '1');
-                            svg.appendChild(wRect);
-
-                            // label
-                            const wl = document.createElementNS(svgNS, 'text');
-                            wl.setAttribute('x', win.x + Math.max(6, win.w / 2));
-                            wl.setAttribute('y', win.y + Math.max(6, win.h / 2));
-                            wl.setAttribute('font-size', '10');
-                            wl.setAttribute('fill', '#0369a1');
-                            wl.setAttribute('text-anchor', 'middle');
-                            wl.setAttribute('dominant-baseline', 'middle');
-                            wl.textContent = 'W';
-                            svg.appendChild(wl);
-                        });
-                    }
-                });
-            }
-
-            container.appendChild(svg);
-            // wire export action after svg is appended
-            exportBtn.onclick = function() {
-                try {
-                    const serializer = new XMLSerializer();
-                    const svgString = serializer.serializeToString(svg);
-                    const blob = new Blob([svgString], {type: 'image/svg+xml'});
-                    const url = URL.createObjectURL(blob);
-                    const a = document.createElement('a');
-                    a.href = url;
-                    a.download = `${f.floor.replace(/\s+/g, '_')}.svg`;
-                    document.body.appendChild(a);
-                    a.click();
-                    a.remove();
-                    URL.revokeObjectURL(url);
-                } catch (err) {
-                    alert('Failed to export SVG: ' + err.message);
-                }
-            };
-            bpEl.appendChild(container);
-        });
+    blueprint = decodeBlueprint(blueprint);
+    if (!(blueprint && Array.isArray(blueprint))) return;
+
+    const hashes = blueprint.filter(f => f.svg).map(f => f.svg.split('/').pop().replace(/\.svg$/, ''));
+    if (hashes.length > 1) {
+        const zipLink = document.createElement('a');
+        zipLink.className = 'btn';
+        zipLink.textContent = 'Download all floors (ZIP)';
+        zipLink.href = `/api/blueprint/${hashes.join('-')}.zip`;
+        zipLink.download = 'blueprint.zip';
+        zipLink.style.display = 'inline-block';
+        zipLink.style.marginBottom = '10px';
+        bpEl.appendChild(zipLink);
     }
 
-    // Schedule
+    blueprint.forEach(f => {
+        if (!f.svg) return;
+        const container = document.createElement('div');
+        container.className = 'floor';
+        const title = document.createElement('h4');
+        title.textContent = f.floor;
+        container.appendChild(title);
+
+        // export SVG link
+        const exportLink = document.createElement('a');
+        exportLink.className = 'btn';
+        exportLink.textContent = 'Export SVG';
+        exportLink.href = f.svg;
+        exportLink.download = `${f.floor.replace(/\s+/g, '_')}.svg`;
+        exportLink.style.display = 'inline-block';
+        exportLink.style.marginBottom = '6px';
+        container.appendChild(exportLink);
+
+        const img = document.createElement('img');
+        img.src = f.svg;
+        img.alt = `${f.floor} plan`;
+        img.width = (f.canvas && f.canvas.w) ? f.canvas.w : 760;
+        img.height = (f.canvas && f.canvas.h) ? f.canvas.h : 300;
+        img.loading = 'lazy';
+        img.decoding = 'async';
+        container.appendChild(img);
+        bpEl.appendChild(container);
+    });
+}
+
+function renderBoq(boq) {
+    const boqEl = document.getElementById('boq-details');
+    if (!boqEl) return;
+    boqEl.innerHTML = '';
+    if (!(boq && Array.isArray(boq.items))) return;
+    const table = document.createElement('table');
+    table.className = 'boq';
+    const head = table.insertRow();
+    ['Item', 'Quantity', 'Unit', 'Rate', 'Amount'].forEach(h => {
+        const th = document.createElement('th');
+        th.textContent = h;
+        head.appendChild(th);
+    });
+    boq.items.forEach(item => {
+        const row = table.insertRow();
+        [item.description, numberWithCommas(item.quantity), item.unit, numberWithCommas(item.rate),
+         numberWithCommas(Math.round(item.amount))].forEach(v => { row.insertCell().textContent = v; });
+    });
+    const total = table.insertRow();
+    total.className = 'boq-total';
+    total.insertCell().textContent = `Total (${boq.name}, ${boq.currency})`;
+    total.insertCell().colSpan = 3;
+    total.insertCell().textContent = numberWithCommas(Math.round(boq.total));
+    boqEl.appendChild(table);
+}
+
+// Fill the region picker from the loaded rate tables
+fetch('/api/rates').then(res => res.ok ? res.json() : null).then(rates => {
+    const select = document.getElementById('region');
+    if (!(rates && select)) return;
+    rates.regions.forEach(r => {
+        const option = document.createElement('option');
+        option.value = r.region;
+        option.textContent = r.name;
+        select.appendChild(option);
+    });
+}).catch(() => {});
+
+function renderSchedule(schedule) {
     const scheduleEl = document.getElementById('ai-schedule');
     scheduleEl.innerHTML = '';
-    if (Array.isArray(result.schedule)) {
-        result.schedule.forEach(w => {
+    if (Array.isArray(schedule)) {
+        schedule.forEach(w => {
             const wk = document.createElement('div');
             wk.className = 'week';
             wk.innerHTML = `<div class="week-title">Week ${w.week || ''} - ${w.phase}</div>`;
@@ -308,17 +374,8 @@ function renderResults(result, input) {
             }
             scheduleEl.appendChild(wk);
         });
-    } else if (typeof result.schedule === 'string') {
-        scheduleEl.innerText = result.schedule;
-    }
-
-    // Assumptions
-    const assumptionsEl = document.getElementById('assumptions');
-    if (assumptionsEl && result.assumptions) {
-        assumptionsEl.innerHTML = `
-            <div><strong>Location:</strong> ${result.assumptions.location}</div>
-            <div><strong>Rate:</strong> ₹${result.assumptions.cost_per_sq_yard}/sq yard</div>
-        `;
+    } else if (typeof schedule === 'string') {
+        scheduleEl.innerText = schedule;
     }
 }
 
@@ -333,6 +390,7 @@ document.getElementById('rb-add')?.addEventListener('click', function() {
         roomOptionsObj[roomKey] = {windows: windows, doors: doors, door_side: door_side};
         // small feedback: log to console (keeps UI minimal)
         console.log('Room option added:', roomKey, roomOptionsObj[roomKey]);
+        refreshBlueprint();
     } catch (e) {
         alert('Failed to add room option: ' + e.message);
     }
@@ -341,8 +399,37 @@ document.getElementById('rb-add')?.addEventListener('click', function() {
 document.getElementById('rb-clear')?.addEventListener('click', function() {
     roomOptionsObj = {};
     console.log('Room options cleared');
+    refreshBlueprint();
 });
 
+// Push the current room options to the plan's session and redraw the blueprint
+async function refreshBlueprint() {
+    if (!lastPlanData) return;
+    try {
+        let res = null;
+        if (planSessionId) {
+            res = await fetch(`/api/sessions/${planSessionId}`, {
+                method: 'PATCH',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ room_options: roomOptionsObj, blueprint_format: 'columnar' })
+            });
+        }
+        if (!res || res.status === 404) {
+            res = await fetch('/api/sessions', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ ...lastPlanData, room_options: roomOptionsObj })
+            });
+        }
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const body = await res.json();
+        planSessionId = body.session_id;
+        if (body.outputs && body.outputs.blueprint) renderBlueprint(body.outputs.blueprint);
+    } catch (e) {
+        console.warn('Blueprint refresh failed:', e.message);
+    }
+}
+
 function numberWithCommas(x) {
     return x.toString().replace(/\B(?=(\d{3})+(?!\d))/g, ',');
 }
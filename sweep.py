@@ -0,0 +1,183 @@
+import math
+
+import numpy as np
+from calculator import ConstructionCalculator
+from batch_calc import estimate_arrays, parse_floor_values
+
+# Sweepable inputs, in grid axis order, with the single-point default used
+# when an axis is not given (same defaults as /api/calculate)
+SWEEP_PARAMS = (
+    ("built_up_area", 1000),
+    ("floors", "G+2"),
+    ("daily_wage", ConstructionCalculator.DAILY_WAGE_PER_WORKER),
+    ("cost_per_sq_yard", ConstructionCalculator.COST_PER_SQ_YARD),
+)
+METRICS = ("total_cost", "duration_days", "labor_cost", "material_cost", "overhead", "total_workers")
+INTEGER_METRICS = ("duration_days", "total_workers")
+
+
+def axis_length(name, spec):
+    """Number of points `build_axis` will produce, computed without allocating them."""
+    if isinstance(spec, dict):
+        start, stop = float(spec["start"]), float(spec["stop"])
+        if "step" in spec:
+            step = float(spec["step"])
+            if not step or not math.isfinite(step) or not math.isfinite(start) or not math.isfinite(stop):
+                raise ValueError(f"axis '{name}' needs finite start, stop and a non-zero step")
+            # np.arange(start, stop + step / 2, step)
+            count = (stop + step / 2.0 - start) / step
+            if not math.isfinite(count):
+                raise ValueError(f"axis '{name}' has too many points")
+            return max(0, math.ceil(count))
+        return max(0, int(spec.get("num", 10)))
+    if isinstance(spec, (list, tuple)):
+        return len(spec)
+    return 1
+
+
+def build_axis(name, spec, default):
+    """Expand one axis spec into (labels, numeric values).
+
+    `spec` may be a scalar, a list of values, or a range dict
+    `{"start", "stop", "num"}` / `{"start", "stop", "step"}` (stop inclusive).
+    Floors accept "G+N" strings or plain floor counts.
+    """
+    if spec is None:
+        labels = [default]
+    elif isinstance(spec, dict):
+        start, stop = spec["start"], spec["stop"]
+        if "step" in spec:
+            step = spec["step"]
+            labels = np.arange(start, stop + step / 2.0, step).tolist()
+        else:
+            labels = np.linspace(start, stop, int(spec.get("num", 10))).tolist()
+    elif isinstance(spec, (list, tuple)):
+        labels = list(spec)
+    else:
+        labels = [spec]
+    if not labels:
+        raise ValueError(f"axis '{name}' is empty")
+
+    if name == "floors":
+        # range specs come back from numpy as floats; "3.0" would not parse as a floor count
+        for i, label in enumerate(labels):
+            if isinstance(label, float):
+                if not label.is_integer():
+                    raise ValueError(f"axis 'floors' needs whole floor counts, got {label}")
+                labels[i] = int(label)
+        values = parse_floor_values(labels)
+    else:
+        values = np.array([v if v else default for v in labels], dtype=np.float64)
+    return labels, values
+
+
+class ParameterSweep:
+    """Cartesian grid over the calculator inputs, evaluated in bulk.
+
+    Points are addressed by flat index (C order over `SWEEP_PARAMS`), so any
+    slice of the grid can be computed without materializing the full mesh.
+    With `max_points`, a larger grid raises ValueError before any axis is
+    allocated.
+    """
+
+    def __init__(self, axes=None, max_points=None):
+        axes = axes or {}
+        unknown = set(axes) - {name for name, _ in SWEEP_PARAMS}
+        if unknown:
+            raise ValueError(f"unknown sweep parameter(s): {', '.join(sorted(unknown))}")
+        self.names = [name for name, _ in SWEEP_PARAMS]
+        if max_points is not None:
+            size = math.prod(axis_length(name, axes.get(name)) for name in self.names)
+            if size > max_points:
+                raise ValueError(f"grid has {size} points; limit is {max_points}")
+        self.labels = {}
+        self.values = {}
+        for name, default in SWEEP_PARAMS:
+            self.labels[name], self.values[name] = build_axis(name, axes.get(name), default)
+        self.shape = tuple(len(self.values[name]) for name in self.names)
+        self.size = math.prod(self.shape)
+
+    def _evaluate(self, area, floors, wage, rate, metrics):
+        arrays = estimate_arrays(area, floors, wage, rate)
+        return {m: arrays[m] for m in metrics}
+
+    def evaluate(self, start=0, stop=None, metrics=("total_cost", "duration_days")):
+        """Evaluate grid points [start, stop) and return {metric: 1-D array}."""
+        stop = self.size if stop is None else min(stop, self.size)
+        coords = np.unravel_index(np.arange(start, stop), self.shape)
+        columns = [self.values[name][idx] for name, idx in zip(self.names, coords)]
+        return self._evaluate(*columns, metrics)
+
+    def chunks(self, chunk_size=100000, metrics=("total_cost", "duration_days")):
+        """Yield (offset, {metric: array}) slices covering the whole grid."""
+        for offset in range(0, self.size, chunk_size):
+            yield offset, self.evaluate(offset, offset + chunk_size, metrics)
+
+    def grid(self, metrics=("total_cost", "duration_days")):
+        """Evaluate the full grid; each metric is reshaped to `self.shape`."""
+        return {m: v.reshape(self.shape) for m, v in self.evaluate(metrics=metrics).items()}
+
+    def base_point(self):
+        """Middle value of every axis, used as the reference for sensitivities."""
+        return {name: self.values[name][len(self.values[name]) // 2] for name in self.names}
+
+    def sensitivity(self, metrics=("total_cost", "duration_days")):
+        """Tornado-chart swings and local partial derivatives around `base_point`.
+
+        Tornado: each swept parameter is moved to its axis min and max with the
+        others held at the base. Partials use a central difference with a step
+        of 1% of the axis range (one floor for `floors`). All probe points are
+        evaluated in a single vectorized call.
+        """
+        base = self.base_point()
+        swept = [name for name in self.names if len(self.values[name]) > 1]
+        probes = [dict(base)]
+        plan = []
+        for name in swept:
+            lo, hi = float(self.values[name].min()), float(self.values[name].max())
+            h = 1.0 if name == "floors" else (hi - lo) / 100.0
+            x = float(base[name])
+            minus = max(x - h, 1.0 if name == "floors" else 0.0)
+            plan.append((name, lo, hi, x, minus, x + h))
+            for value in (lo, hi, minus, x + h):
+                probes.append(dict(base, **{name: value}))
+
+        columns = [np.array([p[name] for p in probes], dtype=np.float64) for name in self.names]
+        results = self._evaluate(*columns, metrics)
+        at_base = {m: float(results[m][0]) for m in metrics}
+
+        tornado = []
+        partials = {}
+        for i, (name, lo, hi, x, minus, plus) in enumerate(plan):
+            j = 1 + i * 4
+            entry = {"parameter": name, "low_value": lo, "high_value": hi}
+            partials[name] = {}
+            for m in metrics:
+                low, high = float(results[m][j]), float(results[m][j + 1])
+                entry[m] = {"low": round(low, 2), "high": round(high, 2), "swing": round(abs(high - low), 2)}
+                slope = (float(results[m][j + 3]) - float(results[m][j + 2])) / (plus - minus)
+                elasticity = slope * x / at_base[m] if at_base[m] else 0.0
+                partials[name][m] = {"derivative": round(slope, 4), "elasticity": round(elasticity, 4)}
+            tornado.append(entry)
+        tornado.sort(key=lambda e: e[metrics[0]]["swing"], reverse=True)
+
+        return {
+            "base": {name: float(v) for name, v in base.items()},
+            "base_metrics": {m: round(v, 2) for m, v in at_base.items()},
+            "tornado": tornado,
+            "partials": partials,
+        }
+
+    def axes_payload(self):
+        return {name: self.labels[name] for name in self.names}
+
+
+def metric_lists(results):
+    """Convert metric arrays to JSON-friendly lists (rounded money, int counts)."""
+    out = {}
+    for m, arr in results.items():
+        if m in INTEGER_METRICS:
+            out[m] = arr.astype(np.int64).tolist()
+        else:
+            out[m] = np.round(arr, 2).tolist()
+    return out
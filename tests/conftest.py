@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# no Ollama and no database files: AI calls fail fast into their fallbacks
+os.environ.setdefault("OLLAMA_API_URL", "http://127.0.0.1:9/api/generate")
+os.environ.setdefault("AI_WARMUP", "0")
+os.environ.setdefault("AI_CACHE_PATH", "")
+os.environ.setdefault("PROJECTS_PATH", "")
+
+
+@pytest.fixture(scope="session")
+def client():
+    import app
+
+    return app.create_app().test_client()
@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+
+from ai_engine import AIEngine
+
+PROJECT = {"area": 1000, "floors": "G+2", "timeline": 30}
+ANSWER = json.dumps({"insights": ["Test the soil.", "Order steel early."]})
+
+
+class _FakeStream:
+    status_code = 200
+
+    def __init__(self, release):
+        self.release = release
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_lines(self):
+        self.release.wait(5)
+        for i in range(0, len(ANSWER), 8):
+            yield json.dumps({"response": ANSWER[i:i + 8], "done": False}).encode()
+        yield json.dumps({"response": "", "done": True}).encode()
+
+
+def _engine(release):
+    engine = AIEngine()
+    engine.posts = 0
+
+    def post(payload, stream=False):
+        engine.posts += 1
+        return _FakeStream(release)
+
+    engine._post = post
+    return engine
+
+
+def test_identical_concurrent_streams_share_one_generation():
+    release = threading.Event()
+    engine = _engine(release)
+    results = {}
+
+    def consume(name):
+        results[name] = list(engine.stream_analysis(PROJECT))
+
+    threads = [threading.Thread(target=consume, args=(name,)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert engine.posts == 1
+    assert engine.flights.stats()["merged"] == 1
+    first, second = (results[name][-1]["result"] for name in ("first", "second"))
+    assert first["insights"] == second["insights"] == ["Test the soil.", "Order steel early."]
+    assert "".join(e["token"] for e in results["first"][:-1]) == ANSWER
+    assert [e["token"] for e in results["second"][:-1]] == [ANSWER]
+
+
+def test_blocking_call_joins_a_running_stream():
+    release = threading.Event()
+    engine = _engine(release)
+    stream = engine.stream_analysis(PROJECT)
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(tokens=list(stream)))
+    thread.start()
+    time.sleep(0.1)
+    waiter = threading.Thread(target=lambda: results.update(blocking=engine.analyze_project(PROJECT)))
+    waiter.start()
+    time.sleep(0.1)
+    release.set()
+    thread.join(5)
+    waiter.join(5)
+
+    assert engine.posts == 1
+    assert results["blocking"]["insights"] == results["tokens"][-1]["result"]["insights"]
+
+
+def test_abandoned_stream_releases_its_followers():
+    release = threading.Event()
+    release.set()
+    engine = _engine(release)
+    stream = engine.stream_analysis(PROJECT)
+    next(stream)
+    stream.close()
+
+    assert engine.flights.stats()["in_flight"] == 0
+
+
+def test_schedule_entry_without_phase_rejects_the_answer():
+    from metrics import AI_ERRORS
+
+    raw = json.dumps({"weeks": [
+        {"week": 1, "phase": "Site Preparation", "activities": ["Clearing"]},
+        {"week": 2, "phase": "  ", "activities": ["Excavation"]},
+        {"week": 3, "phase": "Foundation Work", "activities": ["Footings"]},
+    ]})
+    before = AI_ERRORS._values.get(("schedule", "parse"), 0)
+    result = AIEngine._parse_schedule(raw)
+    assert not result["ok"] and "entry 2" in result["error"]
+    assert AI_ERRORS._values[("schedule", "parse")] == before + 1
+
+
+def test_rejected_schedule_falls_back_and_is_counted():
+    import app
+    from calculator import ConstructionCalculator
+    from metrics import AI_FALLBACKS
+
+    calculator = ConstructionCalculator(1000, "G+2")
+    before = AI_FALLBACKS._values.get(("schedule", "ai_error"), 0)
+    schedule = app._resolve_schedule(AIEngine._parse_schedule(json.dumps({"weeks": [{"week": 1}]})), calculator)
+    assert schedule == calculator.generate_schedule()
+    assert AI_FALLBACKS._values[("schedule", "ai_error")] == before + 1
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+
+@pytest.mark.parametrize("body, message", [
+    ({"built_up_area": [1000, None]}, "project 1: built_up_area must be a positive number"),
+    ({"built_up_area": [1000, "lots"]}, "project 1: built_up_area must be a positive number"),
+    ({"built_up_area": [-5]}, "project 0: built_up_area must be a positive number"),
+    ({"projects": [{"built_up_area": 1000, "floors": "tower"}]}, "project 0: invalid floors"),
+    ({"built_up_area": 1000, "daily_wage": "cheap"}, "daily_wage must be a positive number"),
+    ({"built_up_area": [1000, 1200], "region": ["IN-DL", "atlantis"]}, "project 1:"),
+])
+def test_bad_projects_are_rejected(client, body, message):
+    response = client.post("/api/calculate/batch", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith(message)
+
+
+def test_valid_batch_is_strict_json(client):
+    response = client.post("/api/calculate/batch", json={"projects": [
+        {"built_up_area": 1000, "floors": "G+2"},
+        {"built_up_area": 250.5, "floors": 3, "daily_wage": 650},
+    ]})
+    assert response.status_code == 200
+    body = json.loads(response.get_data(as_text=True), parse_constant=lambda c: pytest.fail(f"{c} in response"))
+    assert body["count"] == 2
+
+
+def test_include_ai_answers_within_the_latency_budget(client, monkeypatch):
+    import time
+
+    import app
+
+    monkeypatch.setattr(app, "_ai_insight", lambda project_data: time.sleep(2) or {"summary": "late"})
+    started = time.monotonic()
+    response = client.post("/api/calculate/batch", json={
+        "built_up_area": [1000, 2000], "include_ai": True, "latency_budget_ms": 100,
+    })
+    assert time.monotonic() - started < 1.5
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["ai_pending"] == ["insight"]
+    assert body["ai_insight"] == [app.FALLBACK_INSIGHT] * 2
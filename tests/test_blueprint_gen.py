@@ -0,0 +1,23 @@
+import random
+
+from blueprint_gen import _build_layouts, _decorate, clear_layout_cache, generate_floor_layouts
+
+
+def _unmemoized(area_sq_ft, floors=1):
+    return _decorate(_build_layouts(float(area_sq_ft), floors, True), [])
+
+
+def test_fractional_areas_match_unmemoized_generator():
+    rng = random.Random(7)
+    clear_layout_cache()
+    for _ in range(300):
+        area = round(rng.uniform(200, 60000), 2)
+        # warm the memo with a neighbouring area first
+        generate_floor_layouts(area + 0.4)
+        assert generate_floor_layouts(area) == _unmemoized(area)
+
+
+def test_memoized_layouts_are_independent_copies():
+    first = generate_floor_layouts(35242.17)
+    first[0]["rooms"][0]["name"] = "changed"
+    assert generate_floor_layouts(35242.17) == _unmemoized(35242.17)
@@ -0,0 +1,29 @@
+import threading
+
+import app
+from job_queue import BoundedExecutor
+
+
+def test_full_ai_executor_answers_with_the_fallback_at_once(client, monkeypatch):
+    release = threading.Event()
+    executor = BoundedExecutor(workers=1, max_queue=0)
+    executor.submit(release.wait, 5)
+    monkeypatch.setattr(app, "AI_EXECUTOR", executor)
+    try:
+        response = client.post("/api/calculate", json={"built_up_area": 1000})
+        assert response.status_code == 200
+        assert response.get_json()["ai_insight"] == app.FALLBACK_INSIGHT
+        assert "ai_pending" not in response.get_json()
+        assert executor.stats()["rejected"] == 1
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_all_floors_returns_a_plan_per_floor(client):
+    # what the form sends for a four-storey building
+    response = client.post("/api/calculate", json={"built_up_area": 1000, "floors": 4, "all_floors": True,
+                                                   "latency_budget_ms": 0})
+    assert response.status_code == 200
+    floors = [f["floor"] for f in response.get_json()["blueprint"]]
+    assert floors == ["Ground Floor", "Floor 1", "Floor 2", "Floor 3"]
@@ -0,0 +1,30 @@
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize("path", ["/api/calculate", "/api/calculate/stream", "/api/jobs", "/api/sessions", "/api/boq"])
+def test_floors_above_max_floors_are_rejected(client, path):
+    response = client.post(path, json={"built_up_area": 12500, "floors": f"G+{app.MAX_FLOORS}"})
+    assert response.status_code == 400
+    assert f"at most {app.MAX_FLOORS} floors" in response.get_json()["error"]
+
+
+def test_session_edit_above_max_floors_is_rejected(client):
+    created = client.post("/api/sessions", json={"built_up_area": 1000, "floors": "G+2"}).get_json()
+    response = client.patch(f"/api/sessions/{created['session_id']}", json={"floors": app.MAX_FLOORS + 1})
+    assert response.status_code == 400
+
+
+def test_batch_floors_above_max_floors_are_rejected(client):
+    response = client.post("/api/calculate/batch", json={"built_up_area": [1000, 1000], "floors": ["G+2", "G+500"]})
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("project 1: at most")
+
+
+def test_tallest_supported_building_is_planned(client):
+    response = client.post("/api/calculate", json={
+        "built_up_area": 1000, "floors": f"G+{app.MAX_FLOORS - 1}", "latency_budget_ms": 0,
+    })
+    assert response.status_code == 200
+    assert response.get_json()["schedule_summary"]["leveled_days"] > 0
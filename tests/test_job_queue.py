@@ -0,0 +1,20 @@
+import threading
+
+import pytest
+
+from job_queue import BoundedExecutor, QueueFullError
+
+
+def test_bounded_executor_rejects_past_its_backlog():
+    release = threading.Event()
+    executor = BoundedExecutor(workers=1, max_queue=1)
+    running = executor.submit(release.wait, 5)
+    queued = executor.submit(lambda: "queued")
+    with pytest.raises(QueueFullError):
+        executor.submit(lambda: "rejected")
+    assert executor.stats()["rejected"] == 1
+
+    release.set()
+    assert running.result(5) and queued.result(5) == "queued"
+    assert executor.submit(lambda: "accepted").result(5) == "accepted"
+    executor.shutdown()
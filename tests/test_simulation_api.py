@@ -0,0 +1,28 @@
+import pytest
+
+import app
+
+
+def _simulate(client, simulation):
+    return client.post("/api/calculate", json={"built_up_area": 1000, "latency_budget_ms": 0, "simulation": simulation})
+
+
+@pytest.mark.parametrize("simulation, message", [
+    ({"distributions": {"daily_wage": {"dist": "gamma", "mean": 1}}}, "unknown distribution 'gamma'"),
+    ({"distributions": {"daily_wage": {"dist": "normal", "mean": 500}}}, "normal needs numeric sd"),
+    ({"distributions": {"daily_wage": {"dist": "normal", "mean": 500, "sd": -1}}}, "daily_wage:"),
+    ({"start_date": "soon"}, "simulation:"),
+    ({"bins": 0}, "bins must be positive"),
+    ({"bins": "many"}, "simulation:"),
+])
+def test_bad_simulation_options_are_rejected(client, simulation, message):
+    response = _simulate(client, simulation)
+    assert response.status_code == 400
+    assert message in response.get_json()["error"]
+
+
+def test_bins_are_capped(client):
+    response = _simulate(client, {"samples": 5000, "bins": 10 ** 9,
+                                  "distributions": {"daily_wage": {"dist": "uniform", "low": 400, "high": 700}}})
+    assert response.status_code == 200
+    assert len(response.get_json()["risk"]["histograms"]["total_cost"]["counts"]) == app.RISK_MAX_BINS
@@ -0,0 +1,25 @@
+import pytest
+
+from calculator import ConstructionCalculator
+from sweep import ParameterSweep
+
+
+def test_range_spec_floors_axis_parses_each_count():
+    sweep = ParameterSweep({"floors": {"start": 1, "stop": 6, "num": 6}})
+    assert sweep.labels["floors"] == [1, 2, 3, 4, 5, 6]
+    assert sweep.values["floors"].tolist() == [1, 2, 3, 4, 5, 6]
+    costs = sweep.grid()["total_cost"].ravel().tolist()
+    calculators = [ConstructionCalculator(1000, f"G+{n - 1}") for n in range(1, 7)]
+    expected = [c.calculate_costs(c.calculate_workers())["total_cost"] for c in calculators]
+    assert costs == pytest.approx(expected)
+
+
+def test_step_spec_floors_axis_matches_list_axis():
+    stepped = ParameterSweep({"floors": {"start": 2, "stop": 8, "step": 2}})
+    listed = ParameterSweep({"floors": [2, 4, 6, 8]})
+    assert stepped.values["floors"].tolist() == listed.values["floors"].tolist()
+
+
+def test_fractional_floors_are_rejected():
+    with pytest.raises(ValueError, match="whole floor counts"):
+        ParameterSweep({"floors": {"start": 1, "stop": 2, "num": 3}})
@@ -0,0 +1,9 @@
+"""Production entry point: `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+Gunicorn imports this module in every worker after forking, so each worker
+builds its own AI engine, thread pools and SQLite handles; the caches are
+shared between workers through the SQLite file at `AI_CACHE_PATH`.
+"""
+from app import create_app
+
+app = create_app()